@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'career_match.settings')
 
 application = get_asgi_application()
+
+# Load the career model once per worker instead of on the first request
+from matching.apps import start_serving  # noqa: E402
+
+start_serving()
@@ -134,3 +134,73 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Career model
+# Directory holding the model bundles written by matching/train.py
+CAREER_MODEL_DIR = BASE_DIR / 'matching' / 'model'
+
+# Load the model when a WSGI/ASGI worker (or runserver) starts instead of on the first
+# request. Management commands and tests never preload
+CAREER_MODEL_PRELOAD = True
+
+# Seconds between checks for a retrained model on disk (0 disables hot reload)
+CAREER_MODEL_RELOAD_INTERVAL = 5.0
+
+# Inputs with at most this many rows are scored with the flat forest instead of
+# the sklearn model. Measured on the 300-tree forest the flat one is faster up to
+# ~32 rows (26 ms vs 35 ms) and slower from ~40 (64 rows: 46 ms vs 43 ms)
+CAREER_FLAT_FOREST_MAX_ROWS = 32
+
+# Re-hash every bundle file against its manifest before loading it
+CAREER_BUNDLE_VERIFY = False
+
+# Largest number of profiles accepted by the batch prediction endpoint
+CAREER_BATCH_MAX_PROFILES = 1000
+
+# Micro-batching for /predict/async/ under ASGI: how long a request may wait for others
+# to join its batch, the largest batch, and the threads running predict_proba
+CAREER_COALESCE_MAX_WAIT_MS = 5
+CAREER_COALESCE_MAX_BATCH = 64
+CAREER_COALESCE_WORKERS = 2
+
+# Prediction cache: entries per worker, seconds an entry stays valid, and how many
+# of the most frequent profiles in CAREER_USER_DATA_PATH to pre-warm at startup
+CAREER_PREDICTION_CACHE_SIZE = 10000
+CAREER_PREDICTION_CACHE_TTL = 3600
+CAREER_PREDICTION_CACHE_PREWARM = 0
+CAREER_USER_DATA_PATH = BASE_DIR / 'Cleaned_Users.csv'
+
+# Per-feature explanations of single predictions kept per worker (same TTL as above),
+# and how many of the top recommendations get one (the rest list matching skills)
+CAREER_EXPLANATION_CACHE_SIZE = 10000
+CAREER_EXPLAIN_TOP_N = 1
+
+# Per-stage latency tracing of prediction requests: fraction of requests traced,
+# traces kept in memory (see /predict/traces/), and an optional rotating log file
+CAREER_TRACE_SAMPLE_RATE = 0.1
+CAREER_TRACE_BUFFER_SIZE = 1000
+CAREER_TRACE_LOG_PATH = None
+
+# Career catalog (descriptions and required skills shown with each prediction)
+# 'csv' reads CAREER_DATA_PATH, 'db' reads the matching.Career table
+CAREER_CATALOG_SOURCE = 'csv'
+CAREER_DATA_PATH = BASE_DIR / 'career_data.csv'
+
+# Seconds between catalog rebuilds, so running workers pick up careers loaded with
+# load_data or edits to CAREER_DATA_PATH (0 disables)
+CAREER_CATALOG_REFRESH_INTERVAL = 60.0
+
+# PredictionResult rows for requests that carry a "userId" are written in batches by
+# a background thread: rows per INSERT, longest wait before a partial batch is
+# written, and queued rows beyond which new ones are dropped (see /predict/writes/)
+CAREER_WRITE_BEHIND_MAX_BATCH = 500
+CAREER_WRITE_BEHIND_MAX_WAIT_MS = 1000
+CAREER_WRITE_BEHIND_MAX_QUEUE = 10000
+
+# Most completions kept per prefix by the skill/interest typeahead (see /typeahead/)
+CAREER_TYPEAHEAD_MAX_RESULTS = 20
+
+# Missing skills tried per /predict/uplift/ request, the most promising for the target
+# career first. With the profile's own row they fit one flat-forest call
+# (CAREER_FLAT_FOREST_MAX_ROWS)
+CAREER_UPLIFT_MAX_CANDIDATES = 31
@@ -16,11 +16,22 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from matching.views import predict_career
+from matching.views import (
+    career_readiness, predict_career, predict_career_async, predict_career_batch, predict_skill_uplift,
+    prediction_cache_stats, prediction_traces, prediction_write_stats, typeahead,
+)
 from matching import views
 
 urlpatterns = [
     path('predict/', predict_career),
+    path('predict/async/', predict_career_async),
+    path('predict/batch/', predict_career_batch),
+    path('predict/uplift/', predict_skill_uplift),
+    path('predict/cache/', prediction_cache_stats),
+    path('predict/traces/', prediction_traces),
+    path('predict/writes/', prediction_write_stats),
+    path('typeahead/', typeahead),
+    path('readiness/', career_readiness),
     
 ]
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'career_match.settings')
 
 application = get_wsgi_application()
+
+# Load the career model once per worker instead of on the first request
+from matching.apps import start_serving  # noqa: E402
+
+start_serving()
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.apps import AppConfig
 
 
@@ -5,6 +6,39 @@ class MatchingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'matching'
 
+    def ready(self):
+        # Only hook up what runs after each bundle load here; the model itself is
+        # loaded by start_serving (wsgi.py/asgi.py) or on first use, so management
+        # commands and the test runner don't pay for it
+        from matching import catalog
+        from matching.explain import warm_explainer
+        from matching.registry import registry
+        from matching.typeahead import catalog_changed, warm_typeahead
 
-    
+        # Skill and interest completions are rebuilt whenever a new bundle loads or the
+        # catalog watcher sees a change, and older bundles need node values extracted
+        # before predictions can be explained
+        registry.on_load(warm_typeahead)
+        registry.on_load(warm_explainer)
+        catalog.on_change(catalog_changed)
 
+
+def start_serving():
+    """Load the career model and warm its caches in a process that serves requests"""
+    if not getattr(settings, 'CAREER_MODEL_PRELOAD', True):
+        return
+    from matching.registry import registry
+    # Runs the on_load listeners, so typeahead and explanations are ready too
+    registry.start()
+
+    prewarm = getattr(settings, 'CAREER_PREDICTION_CACHE_PREWARM', 0)
+    if prewarm and registry.loaded:
+        from matching.cache import prewarm_cache
+        try:
+            prewarm_cache(registry.get(), settings.CAREER_USER_DATA_PATH, prewarm)
+        except Exception as e:
+            print(f"Could not pre-warm prediction cache: {str(e)}")
+
+    if getattr(settings, 'CAREER_CATALOG_SOURCE', 'csv') == 'csv':
+        from matching.catalog import get_catalog
+        get_catalog()
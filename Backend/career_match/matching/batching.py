@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+
+class PredictionCoalescer:
+    """Coalesces concurrent single-row predictions into one predict_proba call.
+
+    Each awaiting request adds its encoded row to the pending batch for its model
+    bundle. The batch is scored in a worker thread once it holds max_batch rows or
+    max_wait_ms after its first row arrived, whichever comes first, and every caller
+    gets its own row of probabilities back. max_wait_ms bounds the extra latency a
+    request can pick up from waiting for company.
+    """
+
+    def __init__(self, max_wait_ms=5, max_batch=64, max_workers=2):
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="career-predict")
+        # Keyed by (event loop, bundle): a future may only be resolved on its own loop,
+        # and several loops run at once when each thread has its own
+        self._pending = {}
+        self._timers = {}
+        self._lock = threading.Lock()
+        # asyncio only keeps weak references to tasks
+        self._tasks = set()
+
+    async def predict_proba(self, bundle, row):
+        """Probabilities for one encoded row, scored together with concurrent requests"""
+        loop = asyncio.get_running_loop()
+        key = (loop, bundle)
+        future = loop.create_future()
+        with self._lock:
+            batch = self._pending.setdefault(key, [])
+            batch.append((row, future))
+            size = len(batch)
+
+        if size >= self.max_batch:
+            self._flush(key)
+        elif size == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        with self._lock:
+            batch = self._pending.pop(key, None)
+            timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if batch:
+            task = asyncio.ensure_future(self._run(key[1], batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, bundle, batch):
+        X = np.vstack([row for row, _ in batch])
+        try:
+            probabilities = await asyncio.get_running_loop().run_in_executor(
+                self._executor, bundle.predict_proba, X
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), row_probabilities in zip(batch, probabilities):
+            if not future.done():
+                future.set_result(row_probabilities)
+
+
+coalescer = PredictionCoalescer(
+    max_wait_ms=getattr(settings, 'CAREER_COALESCE_MAX_WAIT_MS', 5),
+    max_batch=getattr(settings, 'CAREER_COALESCE_MAX_BATCH', 64),
+    max_workers=getattr(settings, 'CAREER_COALESCE_WORKERS', 2),
+)
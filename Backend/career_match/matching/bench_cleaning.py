@@ -0,0 +1,114 @@
+"""Benchmark the vectorized cleaning in matching/cleaning.py against the row-by-row
+loops train.py used before, on a synthetic Cleaned_Users-shaped CSV.
+
+    python matching/bench_cleaning.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Make the matching package importable when this file is run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from matching.cleaning import EDUCATION_MAPPING, clean_education_column, clean_token_column
+
+
+def legacy_clean_token_column(column):
+    """The loop clean_skills_column/clean_interests_column used before cleaning.py"""
+    cleaned = []
+    for entry in column:
+        if isinstance(entry, str):
+            entry = entry.lower().strip()
+            if ',' in entry:
+                tokens = [token.strip() for token in entry.split(',') if token.strip()]
+            else:
+                tokens = [token.strip() for token in entry.split() if token.strip()]
+            cleaned.append(tokens)
+        elif isinstance(entry, list):
+            cleaned.append([token.strip().lower() for token in entry if token.strip()])
+        else:
+            cleaned.append([])
+    return cleaned
+
+
+def legacy_clean_education_column(df, column='education'):
+    """The .apply based clean_education_column used before cleaning.py"""
+    def clean_level(level):
+        if pd.isnull(level):
+            return None
+        key = str(level).strip().lower().replace(" ", "")
+        return EDUCATION_MAPPING.get(key)
+
+    df[column] = df[column].apply(clean_level)
+    df.dropna(subset=[column], inplace=True)
+    return df
+
+
+SKILLS = ["python", "sql", "data analysis", "machine learning", "communication", "teamwork",
+          "project management", "excel", "java", "design", "Public Speaking", "networking"]
+INTERESTS = ["technology", "data science", "art", "music", "healthcare", "finance", "Education"]
+EDUCATION = ["Bachelor's", "bachelors degree", "Master's", "PhD", "Doctorate", "High School Diploma",
+             "UCE Certificate", "diploma", None]
+
+
+def make_users(rows, seed=0):
+    """Synthetic users with the same columns and messiness as Cleaned_Users.csv"""
+    rng = np.random.default_rng(seed)
+
+    def token_lists(vocabulary):
+        counts = rng.integers(0, 5, rows)
+        picks = rng.integers(0, len(vocabulary), counts.sum())
+        entries, start = [], 0
+        for count in counts:
+            tokens = [vocabulary[i] for i in picks[start:start + count]]
+            start += count
+            # Mostly comma separated, some space separated, some with stray whitespace
+            separator = [", ", ",", " ", " ,  "][rng.integers(0, 4)]
+            entries.append(separator.join(tokens) if tokens else (None if rng.random() < 0.5 else ""))
+        return entries
+
+    return pd.DataFrame({
+        'age': rng.integers(16, 65, rows),
+        'education': [EDUCATION[i] for i in rng.integers(0, len(EDUCATION), rows)],
+        'skills': token_lists(SKILLS),
+        'interests': token_lists(INTERESTS),
+        'recommended_career': rng.integers(0, 100, rows).astype(str),
+    })
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<32} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.csv")
+        make_users(rows).to_csv(path, index=False)
+        users = pd.read_csv(path, encoding='latin1')
+    print(f"{rows} synthetic users")
+
+    legacy_skills = timed("skills, loop", legacy_clean_token_column, users['skills'])
+    skills = timed("skills, vectorized", clean_token_column, users['skills'])
+    assert skills == legacy_skills, "vectorized skills differ from the loop"
+
+    legacy_interests = timed("interests, loop", legacy_clean_token_column, users['interests'])
+    interests = timed("interests, vectorized", clean_token_column, users['interests'])
+    assert interests == legacy_interests, "vectorized interests differ from the loop"
+
+    legacy_education = timed("education, apply", legacy_clean_education_column, users[['education']].copy())
+    education = timed("education, vectorized", clean_education_column, users[['education']].copy())
+    pd.testing.assert_series_equal(education['education'], legacy_education['education'])
+    print("Vectorized output matches the loops")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    main(parser.parse_args().rows)
@@ -0,0 +1,83 @@
+"""Compare two-stage recommendation (catalog skill-overlap shortlist, then the model
+on the shortlist only) against the full predict_proba path: per-request latency and
+recall@3 against the full path's top 3, for several shortlist sizes.
+
+Profiles come from Cleaned_Users.csv and are scored one at a time, like requests.
+
+    python matching/bench_retrieval.py --profiles 500 --sizes 5 10 20 40
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Make the matching package importable when this file is run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'career_match.settings')
+from matching.catalog import CareerCatalog, get_career_data_path
+from matching.cleaning import clean_user_frame
+from matching.readiness import ReadinessMatrix
+from matching.registry import get_model_dir, load_bundle
+from matching.retrieval import CandidateIndex, rank_shortlist
+
+
+def load_profiles(path, count):
+    user_data = pd.read_csv(path, encoding='latin1')
+    user_data.columns = user_data.columns.str.strip().str.lower()
+    user_data = clean_user_frame(user_data).head(count)
+    return [
+        {'skills': skills, 'interests': interests, 'education': education}
+        for skills, interests, education in zip(user_data['skills'], user_data['interests'], user_data['education'])
+    ]
+
+
+def top3(probabilities):
+    return set(np.argsort(probabilities)[::-1][:3].tolist())
+
+
+def timed(function, profiles):
+    """(results, mean microseconds per profile) over one warm pass"""
+    function(profiles[0])
+    start = time.perf_counter()
+    results = [function(profile) for profile in profiles]
+    return results, (time.perf_counter() - start) / len(profiles) * 1e6
+
+
+def main(data_path, count, sizes):
+    bundle = load_bundle(get_model_dir())
+    index = CandidateIndex(bundle, ReadinessMatrix(CareerCatalog.from_csv(get_career_data_path())))
+    profiles = load_profiles(data_path, count)
+    rows = [bundle.encoder.encode(profile) for profile in profiles]
+    n_classes = len(bundle.target_encoder.classes_)
+    print(f"{len(profiles)} profiles, {n_classes} classes, {len(index.indexed_classes)} in the catalog, "
+          f"{len(index.unindexed_classes)} always shortlisted")
+
+    full, full_us = timed(lambda X: top3(bundle.predict_proba(X)[0]), rows)
+    print(f"{'full':>10} {n_classes:>5} classes {full_us:9.1f} us/request   recall@3 1.000")
+
+    for size in sizes:
+        pairs = list(zip(profiles, rows))
+        shortlist_sizes = []
+
+        def two_stage(pair):
+            shortlist = index.shortlist(pair[0], size)
+            shortlist_sizes.append(len(shortlist))
+            return top3(rank_shortlist(bundle, pair[1], shortlist))
+
+        results, us = timed(two_stage, pairs)
+        _, retrieval_us = timed(lambda profile: index.shortlist(profile, size), profiles)
+        recall = np.mean([len(got & want) / 3 for got, want in zip(results, full)])
+        print(f"{'top ' + str(size):>10} {np.mean(shortlist_sizes):5.0f} classes {us:9.1f} us/request   "
+              f"recall@3 {recall:.3f}   (shortlist {retrieval_us:.1f} us)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(os.path.dirname(__file__), '..', 'Cleaned_Users.csv'))
+    parser.add_argument('--profiles', type=int, default=500)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 20, 40])
+    args = parser.parse_args()
+    main(args.data, args.profiles, args.sizes)
@@ -0,0 +1,294 @@
+"""Versioned model bundles for career_match.
+
+A bundle is one immutable directory under <model_dir>/bundles/<version>/:
+
+    manifest.json     version, checksums, training data hash, sklearn version, ...
+    encoders.joblib   skills/interests/education/target encoders, scaler, feature_names
+    forest/*.npy      the FlatForest arrays, loaded with mmap_mode='r'
+    rf_model.joblib   the sklearn model, only loaded when a large batch needs it
+
+A bundle trained by matching/streaming.py holds a linear model and no forest/; it
+is loaded up front and serves every request.
+
+<model_dir>/CURRENT names the bundle to serve and is replaced atomically on publish.
+Because the forest arrays are memory-mapped, every worker serving the same bundle
+shares one copy of them through the OS page cache, and loading a bundle only reads
+the manifest and the (small) encoders.
+"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import joblib
+import numpy as np
+import sklearn
+
+from matching.encoding import FeatureEncoder
+from matching.forest import FlatForest
+
+BUNDLE_FORMAT = 1
+BUNDLES_DIR = "bundles"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+ENCODERS_FILE = "encoders.joblib"
+MODEL_FILE = "rf_model.joblib"
+FOREST_DIR = "forest"
+
+# Separate pickles written by train.py before bundles existed
+LEGACY_MODEL_FILE = "rf_model.pkl"
+LEGACY_FLAT_FOREST_FILE = "rf_flat.npz"
+LEGACY_FILES = {
+    'skills_encoder': "skills_encoder.pkl",
+    'interests_encoder': "interests_encoder.pkl",
+    'education_encoder': "education_encoder.pkl",
+    'target_encoder': "target_encoder.pkl",
+    'feature_names': "feature_names.pkl",
+}
+
+
+class ModelBundle:
+    """A consistent snapshot of the model and encoders loaded from one model directory.
+
+    Bundles are never mutated after loading. A request should fetch the bundle once
+    and use it for every step so a concurrent reload can't mix old and new encoders.
+    """
+
+    def __init__(self, model_path, skills_encoder, interests_encoder, education_encoder,
+                 target_encoder, feature_names, version, flat_forest=None, manifest=None,
+                 flat_forest_max_rows=32):
+        self.model_path = model_path
+        self.flat_forest = flat_forest
+        self.skills_encoder = skills_encoder
+        self.interests_encoder = interests_encoder
+        self.education_encoder = education_encoder
+        self.target_encoder = target_encoder
+        self.feature_names = feature_names
+        self.version = version
+        self.manifest = manifest or {}
+        self.encoder = FeatureEncoder(skills_encoder, interests_encoder, education_encoder, feature_names)
+        self.flat_forest_max_rows = flat_forest_max_rows
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The sklearn model, loaded on first use when a flat forest is serving requests"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = joblib.load(self.model_path)
+        return self._model
+
+    def predict_proba(self, X, classes=None):
+        """Class probabilities for the rows of X, only for the class indices in classes if given.
+
+        Small inputs go through the flat forest, which skips sklearn's per-call
+        overhead. Large batches are cheaper in sklearn's compiled tree traversal.
+        """
+        if self.flat_forest is not None and X.shape[0] <= self.flat_forest_max_rows:
+            return self.flat_forest.predict_proba(X, classes)
+        probabilities = self.model.predict_proba(X)
+        return probabilities if classes is None else probabilities[:, classes]
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_checksums(bundle_dir):
+    checksums = {}
+    for root, _, filenames in os.walk(bundle_dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, bundle_dir).replace(os.sep, '/')
+            if name != MANIFEST_FILE:
+                checksums[name] = {'sha256': hash_file(path), 'size': os.path.getsize(path)}
+    return dict(sorted(checksums.items()))
+
+
+def _combined_checksum(files):
+    digest = hashlib.sha256()
+    for name, info in files.items():
+        digest.update(f"{name}:{info['sha256']}\n".encode())
+    return digest.hexdigest()
+
+
+def write_bundle(model_dir, model, encoders, feature_names, training_data_hash=None,
+                 flat_forest=None, publish=True, extra=None):
+    """Write a new bundle under model_dir/bundles and (by default) make it current.
+
+    encoders must hold skills_encoder, interests_encoder, education_encoder and
+    target_encoder, and may hold anything else needed at prediction time (scaler).
+    Returns the new version string.
+    """
+    bundles_dir = os.path.join(model_dir, BUNDLES_DIR)
+    os.makedirs(bundles_dir, exist_ok=True)
+
+    created = datetime.datetime.now(datetime.timezone.utc)
+    version = created.strftime('%Y%m%d%H%M%S%f')
+    tmp_dir = os.path.join(bundles_dir, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+
+    joblib.dump(dict(encoders, feature_names=list(feature_names)), os.path.join(tmp_dir, ENCODERS_FILE))
+    if model is not None:
+        # Uncompressed, so its arrays could be memory-mapped by joblib.load too
+        joblib.dump(model, os.path.join(tmp_dir, MODEL_FILE))
+    if flat_forest is not None:
+        flat_forest.save_dir(os.path.join(tmp_dir, FOREST_DIR))
+
+    files = _file_checksums(tmp_dir)
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': version,
+        'created': created.isoformat(),
+        'checksum': _combined_checksum(files),
+        'training_data_hash': training_data_hash,
+        'sklearn_version': sklearn.__version__,
+        'numpy_version': np.__version__,
+        'model_class': type(model).__name__ if model is not None else None,
+        'feature_count': len(feature_names),
+        'class_count': len(encoders['target_encoder'].classes_),
+        'tree_count': flat_forest.n_trees if flat_forest is not None else len(getattr(model, 'estimators_', [])),
+        'files': files,
+    }
+    manifest.update(extra or {})
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    bundle_dir = os.path.join(bundles_dir, version)
+    os.rename(tmp_dir, bundle_dir)
+    if publish:
+        publish_bundle(model_dir, version)
+    return version
+
+
+def publish_bundle(model_dir, version):
+    """Point CURRENT at a bundle version. Readers see the old or new name, never half."""
+    if not os.path.isdir(os.path.join(model_dir, BUNDLES_DIR, version)):
+        raise FileNotFoundError(f"No bundle {version} in {model_dir}")
+    tmp_path = os.path.join(model_dir, f".{CURRENT_FILE}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, os.path.join(model_dir, CURRENT_FILE))
+
+
+def current_version(model_dir):
+    """Version named by model_dir/CURRENT, or None for a legacy model directory"""
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def bundle_path(model_dir, version):
+    return os.path.join(model_dir, BUNDLES_DIR, version)
+
+
+def read_manifest(bundle_dir):
+    with open(os.path.join(bundle_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def verify_bundle(bundle_dir):
+    """Re-hash every file and compare with the manifest. Returns a list of problems."""
+    manifest = read_manifest(bundle_dir)
+    actual = _file_checksums(bundle_dir)
+    problems = []
+    for name, info in manifest['files'].items():
+        if name not in actual:
+            problems.append(f"missing {name}")
+        elif actual[name]['sha256'] != info['sha256']:
+            problems.append(f"checksum mismatch for {name}")
+    for name in actual.keys() - manifest['files'].keys():
+        problems.append(f"unexpected file {name}")
+    return problems
+
+
+def load_bundle_dir(bundle_dir, flat_forest_max_rows=32, verify=False):
+    """Load a bundle directory, memory-mapping the forest arrays"""
+    manifest = read_manifest(bundle_dir)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')} in {bundle_dir}")
+    if verify:
+        problems = verify_bundle(bundle_dir)
+        if problems:
+            raise ValueError(f"Bundle {bundle_dir} failed verification: {', '.join(problems)}")
+    if manifest.get('sklearn_version') != sklearn.__version__:
+        print(f"Bundle {manifest['version']} was trained with scikit-learn "
+              f"{manifest.get('sklearn_version')}, running {sklearn.__version__}")
+
+    encoders = joblib.load(os.path.join(bundle_dir, ENCODERS_FILE))
+    flat_forest = None
+    if os.path.isdir(os.path.join(bundle_dir, FOREST_DIR)):
+        flat_forest = FlatForest.load_dir(os.path.join(bundle_dir, FOREST_DIR), mmap_mode='r')
+
+    bundle = ModelBundle(
+        os.path.join(bundle_dir, MODEL_FILE),
+        skills_encoder=encoders['skills_encoder'],
+        interests_encoder=encoders['interests_encoder'],
+        education_encoder=encoders['education_encoder'],
+        target_encoder=encoders['target_encoder'],
+        feature_names=encoders['feature_names'],
+        version=manifest['version'],
+        flat_forest=flat_forest,
+        manifest=manifest,
+        flat_forest_max_rows=flat_forest_max_rows,
+    )
+    if flat_forest is None:
+        # Nothing to serve from without the sklearn forest, so load it up front
+        bundle.model
+    return bundle
+
+
+def load_legacy_bundle(model_dir, version, flat_forest_max_rows=32):
+    """Load the separate pickles train.py wrote before bundles existed"""
+    loaded = {
+        key: joblib.load(os.path.join(model_dir, filename))
+        for key, filename in LEGACY_FILES.items()
+    }
+    flat_forest = None
+    flat_forest_path = os.path.join(model_dir, LEGACY_FLAT_FOREST_FILE)
+    if os.path.exists(flat_forest_path):
+        flat_forest = FlatForest.load(flat_forest_path)
+        if (flat_forest.n_features != len(loaded['feature_names'])
+                or flat_forest.n_classes != len(loaded['target_encoder'].classes_)):
+            print(f"Ignoring {LEGACY_FLAT_FOREST_FILE}: it doesn't match the encoders in {model_dir}")
+            flat_forest = None
+
+    bundle = ModelBundle(os.path.join(model_dir, LEGACY_MODEL_FILE), version=version,
+                         flat_forest=flat_forest, flat_forest_max_rows=flat_forest_max_rows, **loaded)
+    if flat_forest is None:
+        bundle.model
+    return bundle
+
+
+def load_current_bundle(model_dir, flat_forest_max_rows=32, verify=False):
+    """Load the bundle named by CURRENT, falling back to legacy pickles"""
+    version = current_version(model_dir)
+    if version is not None:
+        return load_bundle_dir(bundle_path(model_dir, version), flat_forest_max_rows, verify)
+    return load_legacy_bundle(model_dir, "legacy", flat_forest_max_rows)
+
+
+def prune_bundles(model_dir, keep=3):
+    """Delete all but the newest `keep` bundles, never the current one"""
+    bundles_dir = os.path.join(model_dir, BUNDLES_DIR)
+    if not os.path.isdir(bundles_dir):
+        return []
+    current = current_version(model_dir)
+    versions = sorted(name for name in os.listdir(bundles_dir) if not name.startswith('.'))
+    removed = []
+    for version in versions[:-keep] if keep else versions:
+        if version != current:
+            shutil.rmtree(os.path.join(bundles_dir, version))
+            removed.append(version)
+    return removed
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import pandas as pd
+from django.conf import settings
+
+from matching.cleaning import clean_user_frame
+
+
+def canonical_key(user_input):
+    """Canonical form of a prediction input.
+
+    Inputs that differ only in case, surrounding whitespace, order or repeated tokens
+    encode to the same feature row, so they share one cache entry. Education is only
+    stripped because the education encoder is case-sensitive.
+    """
+    skills = frozenset(skill.lower().strip() for skill in user_input.get('skills', []))
+    interests = frozenset(interest.lower().strip() for interest in user_input.get('interests', []))
+    education = user_input.get('education', "bachelor's").strip()
+    return (education, tuple(sorted(skills)), tuple(sorted(interests)))
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of class probabilities with a per-entry TTL.
+
+    Keys include the model bundle version, so entries from a previous model are never
+    served after a hot reload; they just age out of the LRU.
+    """
+
+    def __init__(self, max_entries=10000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end((version, key))
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[(version, key)]
+            self.misses += 1
+            return None
+
+    def set(self, version, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(version, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+prediction_cache = PredictionCache(
+    max_entries=getattr(settings, 'CAREER_PREDICTION_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'CAREER_PREDICTION_CACHE_TTL', 3600),
+)
+
+
+def prewarm_cache(bundle, user_data_path, top_k, cache=prediction_cache):
+    """Fill the cache with the top_k most frequent profiles in a Cleaned_Users-style CSV.
+
+    Profiles are cleaned the way train.py cleans them, so their keys are the ones
+    requests for the same profiles produce.
+    """
+    user_data = pd.read_csv(user_data_path, encoding='latin1')
+    user_data.columns = user_data.columns.str.strip().str.lower()
+    user_data = clean_user_frame(user_data)
+
+    counts = Counter()
+    for education, skills, interests in zip(user_data['education'], user_data['skills'], user_data['interests']):
+        profile = {'education': education, 'skills': skills, 'interests': interests}
+        if profile['education'] in bundle.encoder.education_values:
+            counts[canonical_key(profile)] += 1
+
+    keys = [key for key, _ in counts.most_common(top_k)]
+    profiles = [
+        {'education': education, 'skills': list(skills), 'interests': list(interests)}
+        for education, skills, interests in keys
+    ]
+    X, rows, _ = bundle.encoder.encode_many(profiles)
+    # Score in chunks small enough for the flat forest, so pre-warming doesn't pull
+    # the full sklearn model into memory
+    chunk = max(1, bundle.flat_forest_max_rows)
+    for start in range(0, len(rows), chunk):
+        probabilities = bundle.predict_proba(X[start:start + chunk])
+        for index, row_probabilities in zip(rows[start:start + chunk], probabilities):
+            cache.set(bundle.version, keys[index], row_probabilities)
+    print(f"Pre-warmed prediction cache with {len(rows)} profiles from {user_data_path}")
+    return len(rows)
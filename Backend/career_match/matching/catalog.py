@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+import pandas as pd
+from django.conf import settings
+
+CareerEntry = namedtuple(
+    'CareerEntry',
+    ['name', 'description', 'required_skills', 'qualifications', 'industry_type']
+)
+
+
+def normalize_career_name(name):
+    """Key used for case-insensitive career lookups"""
+    return str(name).strip().lower()
+
+
+def parse_required_skills(value):
+    """Parse a required_skills cell (JSON list or comma separated text) into a tuple"""
+    if isinstance(value, (list, tuple)):
+        return tuple(str(skill).strip() for skill in value)
+    if not isinstance(value, str):
+        return ()
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return tuple(skill.strip() for skill in value.split(','))
+    return tuple(parsed) if isinstance(parsed, list) else ()
+
+
+def _text(value, default):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return default
+    return value
+
+
+class CareerCatalog:
+    """Immutable in-memory index of career details keyed by normalized career name.
+
+    Built once from career_data.csv or the Career table; required skills are parsed
+    up front so lookups are a single dict access.
+    """
+
+    def __init__(self, entries):
+        index = {}
+        for entry in entries:
+            # Keep the first row for a name, like the old DataFrame lookup did
+            index.setdefault(normalize_career_name(entry.name), entry)
+        self._index = MappingProxyType(index)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a catalog from dicts with career_name, description, required_skills, ..."""
+        return cls(
+            CareerEntry(
+                name=str(record['career_name']),
+                description=_text(record.get('description'), 'No description available'),
+                required_skills=parse_required_skills(record.get('required_skills')),
+                qualifications=_text(record.get('qualifications'), ''),
+                industry_type=_text(record.get('industry_type'), 'Not specified'),
+            )
+            for record in records
+            if _text(record.get('career_name'), None) is not None
+        )
+
+    @classmethod
+    def from_csv(cls, path):
+        career_df = pd.read_csv(path, encoding='latin1')
+        career_df.columns = career_df.columns.str.strip().str.lower()
+        return cls.from_records(career_df.to_dict('records'))
+
+    @classmethod
+    def from_queryset(cls, queryset=None):
+        if queryset is None:
+            from matching.models import Career
+            queryset = Career.objects.all()
+        return cls.from_records(queryset.values(
+            'career_name', 'description', 'required_skills', 'qualifications', 'industry_type'
+        ))
+
+    def get(self, career_name):
+        return self._index.get(normalize_career_name(career_name))
+
+    def __contains__(self, career_name):
+        return normalize_career_name(career_name) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self._index.values())
+
+
+def get_career_data_path():
+    return getattr(settings, 'CAREER_DATA_PATH', os.path.join(settings.BASE_DIR, 'career_data.csv'))
+
+
+def build_catalog(source=None):
+    """Build a catalog from 'csv' (career_data.csv) or 'db' (the Career table)"""
+    source = source or getattr(settings, 'CAREER_CATALOG_SOURCE', 'csv')
+    if source == 'db':
+        return CareerCatalog.from_queryset()
+    if source == 'csv':
+        return CareerCatalog.from_csv(get_career_data_path())
+    raise ValueError(f"Unknown career catalog source: {source}")
+
+
+# Served while the catalog can't be built
+EMPTY_CATALOG = CareerCatalog([])
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_watcher_pid = None
+_listeners = []
+
+
+def on_change(callback):
+    """Call callback(catalog) whenever a refresh swaps in a changed catalog"""
+    _listeners.append(callback)
+
+
+def get_catalog():
+    """Return the process-wide catalog, building it on first use.
+
+    If it can't be built an empty catalog is returned without being kept, so the
+    next call tries again.
+    """
+    catalog = _catalog
+    if catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                refresh_catalog()
+            catalog = _catalog
+    _ensure_watcher()
+    return catalog if catalog is not None else EMPTY_CATALOG
+
+
+def refresh_catalog(source=None):
+    """Rebuild the catalog and swap it in if it changed. Readers holding the old one are unaffected.
+
+    The on_change listeners run after a changed catalog replaces an earlier one.
+    Returns the current catalog, which is None if it has never been built.
+    """
+    global _catalog
+    try:
+        catalog = build_catalog(source)
+    except Exception as e:
+        print(f"Error loading career catalog: {str(e)}")
+        return _catalog
+    # Keep the old object when nothing changed, so the indexes built from it stay valid
+    if _catalog is None:
+        _catalog = catalog
+    elif list(catalog) != list(_catalog):
+        _catalog = catalog
+        for callback in _listeners:
+            try:
+                callback(catalog)
+            except Exception as e:
+                print(f"Error in career catalog change listener: {str(e)}")
+    return _catalog
+
+
+def _ensure_watcher():
+    # Like the model registry: one polling thread per process, restarted after a fork
+    global _watcher_pid
+    interval = getattr(settings, 'CAREER_CATALOG_REFRESH_INTERVAL', 60.0)
+    if interval <= 0 or _watcher_pid == os.getpid():
+        return
+    _watcher_pid = os.getpid()
+    threading.Thread(target=_watch, args=(interval,), name="career-catalog-watcher", daemon=True).start()
+
+
+def _watch(interval):
+    while True:
+        time.sleep(interval)
+        # Workers only see careers added by load_data (or edits to the CSV) through this
+        with _catalog_lock:
+            refresh_catalog()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Raw education values (lowercased, spaces removed) and the level they map to
+EDUCATION_MAPPING = {
+    'phd': 'phd',
+    'doctorate': 'phd',
+    'doctorate(phd/md)': 'phd',
+    "bachelor's": "bachelor's",
+    "bachelor'sdegree": "bachelor's",
+    "bachelors": "bachelor's",
+    "bachelorsdegree": "bachelor's",
+    "master's": "master's",
+    "master'sdegree": "master's",
+    "masters": "master's",
+    "mastersdegree": "master's",
+    "highschooldiploma": "uacecertificate",
+    "uacecertificate": "uacecertificate",
+    "ucecertificate": "ucecertificate"
+}
+
+
+def _split_tokens(entries):
+    """Vectorized token split of a Series of raw entries, one token list per entry"""
+    entries = entries.str.lower().str.strip()
+
+    # Entries without a comma split on whitespace; turning each whitespace run into
+    # a comma lets both kinds go through one split
+    has_comma = entries.str.contains(',', regex=False, na=False)
+    entries = entries.where(has_comma, entries.str.replace(r'\s+', ',', regex=True))
+
+    tokens = entries.str.split(',').explode().str.strip()
+    tokens = tokens[tokens.notna() & (tokens != '')]
+
+    # explode keeps each entry's tokens together and in order, so the token lists
+    # are consecutive slices of the flat token array
+    counts = np.bincount(tokens.index.to_numpy(), minlength=len(entries))
+    return [chunk.tolist() for chunk in np.split(tokens.to_numpy(dtype=object), np.cumsum(counts)[:-1])]
+
+
+def clean_token_column(column):
+    """Split a column of comma- or space-separated tokens into lowercased token lists.
+
+    An entry containing a comma is split on commas only, so multi-word tokens like
+    "data analysis" survive; any other entry is split on whitespace. Tokens are
+    stripped and empty ones dropped. Non-string entries give an empty list, and
+    entries that are already lists are lowercased and stripped.
+
+    User data repeats the same raw entries a lot, so each distinct entry is split
+    once and rows with equal entries share the same list object. Treat the lists as
+    read-only.
+    """
+    column = pd.Series(column).astype(object).reset_index(drop=True)
+    try:
+        codes, uniques = pd.factorize(column)
+        lists = None
+    except TypeError:
+        # Lists aren't hashable; factorize the other entries and clean lists one by one
+        lists = column.map(type) == list
+        codes, uniques = pd.factorize(column.where(~lists))
+
+    # Only strings are split; other entries, and code -1 (missing values) which picks
+    # the trailing slot, clean to an empty list
+    uniques = pd.Series(uniques, dtype=object)
+    is_text = uniques.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    cleaned = np.empty(len(uniques) + 1, dtype=object)
+    for position in range(len(cleaned)):
+        cleaned[position] = []
+    if is_text.any():
+        split = _split_tokens(uniques[is_text].reset_index(drop=True))
+        for position, tokens in zip(np.flatnonzero(is_text), split):
+            cleaned[position] = tokens
+    cleaned = cleaned[codes].tolist()
+
+    if lists is not None:
+        for position in np.flatnonzero(lists.to_numpy()):
+            cleaned[position] = [token.strip().lower() for token in column.iat[position] if token.strip()]
+    return cleaned
+
+
+def clean_skills_column(column):
+    return clean_token_column(column)
+
+
+def clean_interests_column(column):
+    return clean_token_column(column)
+
+
+def clean_education_column(df, column='education'):
+    """Map education values onto the known levels, dropping rows that don't match one"""
+    codes, uniques = pd.factorize(df[column])
+    keys = pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower().str.replace(" ", "", regex=False)
+    # Code -1 (missing values) picks the trailing None
+    levels = np.append(keys.map(EDUCATION_MAPPING).to_numpy(dtype=object), None)
+    df[column] = levels[codes]
+    df.dropna(subset=[column], inplace=True)
+    return df
+
+
+def clean_user_frame(user_data):
+    """Fill missing values and clean every column of a Cleaned_Users-style frame.
+
+    Column names must already be stripped and lowercased. Rows whose education
+    doesn't map to a known level are dropped and the index is reset.
+    """
+    user_data['skills'] = user_data['skills'].fillna('')
+    user_data['interests'] = user_data['interests'].fillna('')
+    user_data['age'] = pd.to_numeric(user_data['age'], errors='coerce').fillna(0)
+    user_data['education'] = user_data['education'].fillna('').astype(str)
+    user_data['recommended_career'] = user_data['recommended_career'].fillna('').astype(str)
+
+    user_data['skills'] = clean_skills_column(user_data['skills'])
+    user_data['interests'] = clean_interests_column(user_data['interests'])
+    user_data = clean_education_column(user_data, column='education')
+
+    # Drop rows with any missing or invalid key fields (after cleaning)
+    required_columns = ['recommended_career', 'skills', 'education', 'age', 'interests']
+    user_data = user_data.dropna(subset=required_columns)
+    return user_data.reset_index(drop=True)
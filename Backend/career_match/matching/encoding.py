@@ -0,0 +1,165 @@
+import warnings
+
+import numpy as np
+import scipy.sparse as sp
+
+from matching.normalize import DEFAULT_THRESHOLD, TokenNormalizer
+
+# The forest was fitted on a DataFrame; rows from FeatureEncoder are plain arrays in
+# the same column order, so sklearn's feature-name check has nothing to add
+warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+
+
+class FeatureEncoder:
+    """Maps skills, interests and education straight to their columns in feature_names.
+
+    Produces the same row as the old DataFrame-based preprocess_input: when a token is
+    both a skill and an interest the skill column wins (it came first before the
+    duplicate columns were dropped). A token that isn't in the vocabularies is
+    mapped to its closest known term when one scores at least fuzzy_threshold (see
+    TokenNormalizer) and ignored otherwise; fuzzy_threshold=None turns that off.
+    """
+
+    def __init__(self, skills_encoder, interests_encoder, education_encoder, feature_names,
+                 fuzzy_threshold=DEFAULT_THRESHOLD):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+
+        skill_classes = set(skills_encoder.classes_)
+        interest_classes = set(interests_encoder.classes_)
+
+        positions = {}
+        for index, name in enumerate(self.feature_names):
+            positions.setdefault(name, []).append(index)
+
+        def columns_for(tokens):
+            return {
+                token: np.array(positions[token], dtype=np.intp)
+                for token in tokens
+                if token in positions
+            }
+
+        self.skill_columns = columns_for(skill_classes)
+        self.interest_columns = columns_for(interest_classes - skill_classes)
+        self.skill_vocabulary = frozenset(skill_classes)
+        self.interest_vocabulary = frozenset(interest_classes)
+        self.skill_normalizer = self.interest_normalizer = None
+        if fuzzy_threshold is not None:
+            self.skill_normalizer = TokenNormalizer(skill_classes, threshold=fuzzy_threshold)
+            self.interest_normalizer = TokenNormalizer(interest_classes, threshold=fuzzy_threshold)
+
+        if 'education_encoded' in skill_classes or 'education_encoded' in interest_classes:
+            self.education_columns = np.array([], dtype=np.intp)
+        else:
+            self.education_columns = np.array(positions.get('education_encoded', []), dtype=np.intp)
+        self.education_values = {
+            level: index for index, level in enumerate(education_encoder.classes_)
+        }
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        return cls(bundle.skills_encoder, bundle.interests_encoder,
+                   bundle.education_encoder, bundle.feature_names)
+
+    def encode(self, user_input):
+        """Encode one user's input into a (1, n_features) float32 row"""
+        X = np.zeros((1, self.n_features), dtype=np.float32)
+        self.fill(X[0], user_input)
+        return X
+
+    def encode_many(self, user_inputs):
+        """Encode a list of inputs into one sparse CSR matrix, skipping the ones that fail.
+
+        Returns (X, rows, errors): X holds one row per successfully encoded input,
+        rows maps those back to positions in user_inputs, and errors maps the
+        position of every failed input to its error message.
+        """
+        indptr = [0]
+        indices = []
+        data = []
+        rows = []
+        errors = {}
+        for index, user_input in enumerate(user_inputs):
+            if not isinstance(user_input, dict):
+                errors[index] = "Each profile must be a JSON object"
+                continue
+            try:
+                features = self.features(user_input)
+            except (AttributeError, TypeError, ValueError) as e:
+                errors[index] = str(e)
+                continue
+            indices.extend(features.keys())
+            data.extend(features.values())
+            indptr.append(len(indices))
+            rows.append(index)
+        X = sp.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+            shape=(len(rows), self.n_features),
+        )
+        X.sort_indices()
+        return X, rows, errors
+
+    def fill(self, row, user_input):
+        """Write the encoded features for user_input into a zeroed row"""
+        features = self.features(user_input)
+        row[list(features.keys())] = list(features.values())
+        return row
+
+    def features(self, user_input):
+        """Non-zero features of user_input as {column: value}"""
+        features = {}
+        education = user_input.get('education', "bachelor's").strip()
+        if education not in self.education_values:
+            # Same error LabelEncoder.transform raises for an unseen level
+            raise ValueError(f"y contains previously unseen labels: '{education}'")
+        if self.education_values[education]:
+            for column in self.education_columns.tolist():
+                features[column] = self.education_values[education]
+
+        for skill in user_input.get('skills', []):
+            skill = self.resolve(skill.lower().strip(), self.skill_vocabulary, self.skill_normalizer, 'skill')
+            if skill is None:
+                continue
+            columns = self.skill_columns.get(skill)
+            if columns is not None:
+                features.update(dict.fromkeys(columns.tolist(), 1))
+
+        for interest in user_input.get('interests', []):
+            interest = self.resolve(interest.lower().strip(), self.interest_vocabulary,
+                                    self.interest_normalizer, 'interest')
+            if interest is None:
+                continue
+            columns = self.interest_columns.get(interest)
+            if columns is not None:
+                features.update(dict.fromkeys(columns.tolist(), 1))
+        return features
+
+    @staticmethod
+    def resolve(token, vocabulary, normalizer, kind):
+        """The vocabulary term token counts as, or None if it is unknown"""
+        if token in vocabulary:
+            return token
+        match = normalizer.match(token) if normalizer is not None else None
+        if match is None:
+            print(f"⚠️ Unknown {kind}: {token}")
+            return None
+        return match[0]
+
+    def normalized_tokens(self, user_input):
+        """Tokens of user_input that were mapped to a different known term.
+
+        Returns {'skills': [...], 'interests': [...]} with one
+        {'input', 'match', 'score'} entry per mapped token.
+        """
+        mapped = {}
+        for kind, vocabulary, normalizer in (('skills', self.skill_vocabulary, self.skill_normalizer),
+                                             ('interests', self.interest_vocabulary, self.interest_normalizer)):
+            mapped[kind] = []
+            if normalizer is None:
+                continue
+            for token in user_input.get(kind, []):
+                token = token.lower().strip()
+                match = None if token in vocabulary else normalizer.match(token)
+                if match is not None:
+                    mapped[kind].append({'input': token, 'match': match[0], 'score': match[1]})
+        return mapped
@@ -0,0 +1,129 @@
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from matching.cache import PredictionCache
+from matching.forest import export_forest, node_value_arrays
+
+_forests = {}
+_forests_lock = threading.Lock()
+
+
+def explainable_forest(bundle, build=True):
+    """A FlatForest with node values for bundle, or None if its model isn't a forest.
+
+    Bundles written by train.py and refresh_model store node values. For older ones
+    they are extracted from the sklearn model (seconds for the shipped forest) by
+    warm_explainer when the bundle loads, and kept for that bundle version. With
+    build False this returns None instead of extracting them.
+    """
+    forest = bundle.flat_forest
+    if forest is not None and forest.has_node_values:
+        return forest
+    cached = _forests.get(bundle.version)
+    if cached is None:
+        if not build:
+            return None
+        with _forests_lock:
+            cached = _forests.get(bundle.version)
+            if cached is None:
+                model = bundle.model
+                if not hasattr(model, 'estimators_'):
+                    cached = (None,)
+                elif forest is None:
+                    cached = (export_forest(model, node_values=True),)
+                else:
+                    cached = (forest.with_node_values(*node_value_arrays(model)),)
+                _forests.clear()
+                _forests[bundle.version] = cached
+    return cached[0]
+
+
+def warm_explainer(bundle):
+    """Get node values ready for a newly loaded bundle so no request extracts them"""
+    explainable_forest(bundle)
+
+
+def feature_kinds(encoder):
+    """'skill', 'interest' or 'education' for every feature column the encoder fills"""
+    kinds = {}
+    for kind, columns in (('skill', encoder.skill_columns), ('interest', encoder.interest_columns)):
+        for token, token_columns in columns.items():
+            for column in token_columns.tolist():
+                kinds.setdefault(column, (kind, token))
+    for column in encoder.education_columns.tolist():
+        kinds[column] = ('education', 'education')
+    return kinds
+
+
+def explain(bundle, row, class_indices, top_k=5):
+    """Per-feature contributions to each of class_indices for one encoded row.
+
+    Returns one dict per class with the baseline probability ('bias'), the top_k
+    contributions by size, the user's own skills and interests that push most
+    towards the class, and whether their education helps. Returns None when the
+    model can't be explained this way.
+    """
+    forest = explainable_forest(bundle)
+    if forest is None:
+        return None
+    row = np.asarray(row, dtype=np.float32).reshape(1, -1)
+    bias, contributions = forest.contributions(row, class_indices)
+    kinds = feature_kinds(bundle.encoder)
+    present = row[0] != 0
+
+    explanations = []
+    for position in range(len(class_indices)):
+        values = contributions[0, position]
+        # A token can fill more than one column, so add up its columns
+        totals = {}
+        present_tokens = set()
+        for column in np.flatnonzero(values).tolist():
+            if column in kinds:
+                totals[kinds[column]] = totals.get(kinds[column], 0.0) + float(values[column])
+                if present[column]:
+                    present_tokens.add(kinds[column])
+        ranked = sorted(totals.items(), key=lambda item: -abs(item[1]))
+        top = [
+            {
+                'feature': token,
+                'kind': kind,
+                'present': (kind, token) in present_tokens,
+                'contribution': round(total, 4),
+            }
+            for (kind, token), total in ranked[:top_k]
+        ]
+        helping = [key for key, total in sorted(totals.items(), key=lambda item: -item[1])
+                   if key in present_tokens and total > 0]
+        education = [values[column] for column in bundle.encoder.education_columns.tolist()]
+        explanations.append({
+            'bias': round(float(bias[position]), 4),
+            'contributions': top,
+            'skills': [token for kind, token in helping if kind == 'skill'][:3],
+            'interests': [token for kind, token in helping if kind == 'interest'][:3],
+            'education_match': bool(education) and float(sum(education)) > 0,
+        })
+    return explanations
+
+
+explanation_cache = PredictionCache(
+    max_entries=getattr(settings, 'CAREER_EXPLANATION_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'CAREER_PREDICTION_CACHE_TTL', 3600),
+)
+
+
+def cached_explain(bundle, user_input, cache_key, class_indices, top_k=5):
+    """explain() for a user's input, cached per model version, input and classes.
+
+    Returns None rather than extracting node values on the request path when
+    warm_explainer hasn't run for the bundle.
+    """
+    if explainable_forest(bundle, build=False) is None:
+        return None
+    key = (cache_key, tuple(int(index) for index in class_indices))
+    explanations = explanation_cache.get(bundle.version, key)
+    if explanations is None:
+        explanations = explain(bundle, bundle.encoder.encode(user_input)[0], class_indices, top_k)
+        explanation_cache.set(bundle.version, key, explanations)
+    return explanations
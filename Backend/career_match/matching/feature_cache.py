@@ -0,0 +1,72 @@
+import hashlib
+import inspect
+import logging
+import os
+
+import joblib
+
+logger = logging.getLogger('matching.feature_cache')
+
+
+def code_version(*objects):
+    """Hash of the source of the given functions or modules, so cached output is
+    invalidated whenever the code that produced it changes"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()[:16]
+
+
+def stage_key(*parts):
+    """Cache key for a pipeline stage built from its inputs (hashes, versions, options)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class FeatureCache:
+    """On-disk cache of the output of each training pipeline stage.
+
+    Each stage result is stored as <cache_dir>/<stage>-<key>.joblib. Keys are derived
+    from everything the stage depends on, so a stale entry is simply never looked up
+    again; prune() removes them.
+    """
+
+    def __init__(self, cache_dir, enabled=True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+
+    def path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}.joblib")
+
+    def get_or_build(self, stage, key, build):
+        """Return the cached result of a stage, running build() on a miss"""
+        path = self.path(stage, key)
+        if self.enabled and os.path.exists(path):
+            try:
+                value = joblib.load(path)
+                logger.info("Using cached %s (%s)", stage, os.path.basename(path))
+                return value
+            except Exception as e:
+                logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+
+        value = build()
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            joblib.dump(value, tmp_path)
+            os.replace(tmp_path, path)
+        return value
+
+    def prune(self, keep):
+        """Delete entries whose file names aren't in keep"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        removed = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.joblib') and filename not in keep:
+                os.remove(os.path.join(self.cache_dir, filename))
+                removed.append(filename)
+        return removed
@@ -0,0 +1,307 @@
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class FlatForest:
+    """A trained RandomForestClassifier flattened into a handful of NumPy arrays.
+
+    All trees share one set of node arrays (feature, threshold, left, right). Leaves
+    point back at themselves, so every tree can be stepped in lock-step and a tree is
+    done once it stops moving. Leaf class distributions are stored sparsely
+    (value_ptr, value_class, value_prob) because deep trees mostly end in pure leaves.
+
+    Forests exported with node_values also keep the class distribution of every
+    node, internal ones included, in the same sparse layout (node_ptr, node_class,
+    node_prob). Those are only needed to explain predictions (see contributions).
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'roots',
+              'value_ptr', 'value_class', 'value_prob', 'classes')
+    NODE_VALUE_ARRAYS = ('node_ptr', 'node_class', 'node_prob')
+
+    def __init__(self, feature, threshold, left, right, roots,
+                 value_ptr, value_class, value_prob, classes, n_features,
+                 node_ptr=None, node_class=None, node_prob=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.roots = roots
+        self.value_ptr = value_ptr
+        self.value_class = value_class
+        self.value_prob = value_prob
+        self.classes_ = classes
+        self.n_features = int(n_features)
+        self.n_classes = len(classes)
+        self.n_trees = len(roots)
+        self.node_ptr = node_ptr
+        self.node_class = node_class
+        self.node_prob = node_prob
+
+    @property
+    def has_node_values(self):
+        return self.node_ptr is not None
+
+    def with_node_values(self, node_ptr, node_class, node_prob):
+        """A copy of this forest that shares its arrays and adds node distributions"""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS if name != 'classes'}
+        return FlatForest(classes=self.classes_, n_features=self.n_features, node_ptr=node_ptr,
+                          node_class=node_class, node_prob=node_prob, **arrays)
+
+    def _saved_arrays(self):
+        names = self.ARRAYS + (self.NODE_VALUE_ARRAYS if self.has_node_values else ())
+        return {name: self.classes_ if name == 'classes' else getattr(self, name) for name in names}
+
+    def save(self, path):
+        np.savez(path, n_features=np.array(self.n_features), **self._saved_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            names = [name for name in cls.ARRAYS + cls.NODE_VALUE_ARRAYS if name in data.files]
+            arrays = {name: data[name] for name in names}
+            return cls(n_features=int(data['n_features']), **arrays)
+
+    def save_dir(self, path):
+        """Save each array as its own .npy file so it can be memory-mapped"""
+        os.makedirs(path, exist_ok=True)
+        for name, array in self._saved_arrays().items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+        np.save(os.path.join(path, "n_features.npy"), np.array(self.n_features))
+
+    @classmethod
+    def load_dir(cls, path, mmap_mode='r'):
+        """Load arrays written by save_dir; with mmap_mode they stay in the page cache"""
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in cls.ARRAYS + cls.NODE_VALUE_ARRAYS
+            if name in cls.ARRAYS or os.path.exists(os.path.join(path, f"{name}.npy"))
+        }
+        n_features = int(np.load(os.path.join(path, "n_features.npy")))
+        return cls(n_features=n_features, **arrays)
+
+    def apply(self, X):
+        """Return the leaf reached in every tree, shape (n_rows, n_trees)"""
+        nodes, _ = self._descend(X, record_edges=False)
+        return nodes
+
+    def _descend(self, X, record_edges):
+        """Leaves reached, plus (row, parent, child) for every step taken if record_edges"""
+        if sp.issparse(X):
+            # Only small inputs come through here, so a dense copy is cheap
+            X = X.toarray()
+        X = np.asarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        nodes = np.tile(self.roots, n_rows)
+        row_of_node = np.repeat(np.arange(n_rows), self.n_trees)
+        edges = []
+
+        # Step every (row, tree) pair down one level, dropping pairs that reached a leaf
+        active = np.arange(nodes.size)
+        while active.size:
+            current = nodes[active]
+            go_left = X[row_of_node[active], self.feature[current]] <= self.threshold[current]
+            next_nodes = np.where(go_left, self.left[current], self.right[current])
+            moved = next_nodes != current
+            nodes[active] = next_nodes
+            if record_edges:
+                edges.append((row_of_node[active[moved]], current[moved], next_nodes[moved]))
+            active = active[moved]
+        return nodes.reshape(n_rows, self.n_trees), edges
+
+    def node_values(self, nodes, classes):
+        """Probability of each of classes at each of nodes, shape (len(nodes), len(classes))"""
+        nodes = np.repeat(np.asarray(nodes), len(classes))
+        wanted = np.tile(np.asarray(classes, dtype=self.node_class.dtype), len(nodes) // max(len(classes), 1))
+
+        # Entries near the roots cover most classes, so binary search each node's
+        # class-sorted entries for the wanted class instead of scanning them
+        lo = self.node_ptr[nodes]
+        remaining = self.node_ptr[nodes + 1] - lo
+        last = len(self.node_class) - 1
+        searching = remaining > 0
+        while searching.any():
+            half = remaining // 2
+            mid = lo + half
+            below = searching & (self.node_class[np.minimum(mid, last)] < wanted)
+            lo = np.where(below, mid + 1, lo)
+            remaining = np.where(below, remaining - half - 1, np.where(searching, half, 0))
+            searching = remaining > 0
+
+        found = self.node_class[np.minimum(lo, last)] == wanted
+        found &= lo < self.node_ptr[nodes + 1]
+        values = np.zeros(nodes.size)
+        values[found] = self.node_prob[lo[found]]
+        return values.reshape(-1, len(classes))
+
+    def contributions(self, X, classes):
+        """Split each prediction into a bias and per-feature contributions (treeinterpreter).
+
+        Along every decision path, the change in a class's probability from a node to
+        its child is credited to the feature the node splits on. Averaged over trees,
+        bias[c] + contributions[row, c].sum() equals predict_proba(X)[row, classes[c]].
+        Returns bias with shape (len(classes),) and contributions with shape
+        (n_rows, len(classes), n_features). Needs node values.
+        """
+        if not self.has_node_values:
+            raise ValueError("This forest was exported without node values")
+        n_rows = X.shape[0]
+        n_classes = len(classes)
+        bias = self.node_values(self.roots, classes).mean(axis=0)
+
+        _, edges = self._descend(X, record_edges=True)
+        totals = np.zeros(n_rows * n_classes * self.n_features)
+        if edges:
+            rows = np.concatenate([row for row, _, _ in edges])
+            parents = np.concatenate([parent for _, parent, _ in edges])
+            children = np.concatenate([child for _, _, child in edges])
+            # Every node on a path is the child of one edge and the parent of the next,
+            # so look each one up once
+            path_nodes, inverse = np.unique(np.concatenate([parents, children]), return_inverse=True)
+            values = self.node_values(path_nodes, classes)
+            changes = values[inverse[len(parents):]] - values[inverse[:len(parents)]]
+            index = ((rows[:, None] * n_classes + np.arange(n_classes)) * self.n_features
+                     + self.feature[parents][:, None])
+            totals = np.bincount(index.ravel(), weights=changes.ravel(), minlength=totals.size)
+        return bias, totals.reshape(n_rows, n_classes, self.n_features) / self.n_trees
+
+    def split_counts(self):
+        """How many internal nodes, over all trees, split on each feature"""
+        internal = self.left != np.arange(len(self.left))
+        return np.bincount(self.feature[internal], minlength=self.n_features)
+
+    def switch_gains(self, x, class_index):
+        """Estimated change in class_index's probability from switching on each feature of one row.
+
+        At every node on the row's decision paths that sends it left, the class's
+        probability at the right child minus the one at the left child is credited to
+        the node's feature, averaged over trees. Returns (gains, tested): features no
+        path tests (tested False) can't change the prediction at all. Needs node values.
+        """
+        if not self.has_node_values:
+            raise ValueError("This forest was exported without node values")
+        _, edges = self._descend(np.asarray(x).reshape(1, -1), record_edges=True)
+        gains = np.zeros(self.n_features)
+        tested = np.zeros(self.n_features, dtype=bool)
+        if edges:
+            parents = np.concatenate([parent for _, parent, _ in edges])
+            children = np.concatenate([child for _, _, child in edges])
+            tested[self.feature[parents]] = True
+            parents = parents[children == self.left[parents]]
+            values = self.node_values(np.concatenate([self.right[parents], self.left[parents]]), [class_index])[:, 0]
+            changes = values[:len(parents)] - values[len(parents):]
+            gains = np.bincount(self.feature[parents], weights=changes, minlength=self.n_features) / self.n_trees
+        return gains, tested
+
+    def predict_proba(self, X, classes=None):
+        """Average of the leaf class distributions, like RandomForestClassifier.predict_proba
+
+        With classes (class indices) only those columns are accumulated and returned.
+        """
+        leaves = self.apply(X)
+        n_rows = leaves.shape[0]
+
+        # Gather the sparse distribution entries of every reached leaf
+        starts = self.value_ptr[leaves].ravel()
+        lengths = self.value_ptr[leaves + 1].ravel() - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        entries = offsets + np.arange(offsets.size)
+        row_of_entry = np.repeat(np.arange(n_rows).repeat(self.n_trees), lengths)
+        entry_class = self.value_class[entries]
+        entry_prob = self.value_prob[entries]
+
+        n_columns = self.n_classes
+        if classes is not None:
+            n_columns = len(classes)
+            column_of_class = np.full(self.n_classes, -1, dtype=np.intp)
+            column_of_class[classes] = np.arange(n_columns)
+            entry_class = column_of_class[entry_class]
+            wanted = entry_class >= 0
+            row_of_entry, entry_class, entry_prob = row_of_entry[wanted], entry_class[wanted], entry_prob[wanted]
+
+        totals = np.bincount(
+            row_of_entry * n_columns + entry_class,
+            weights=entry_prob,
+            minlength=n_rows * n_columns,
+        )
+        return totals.reshape(n_rows, n_columns) / self.n_trees
+
+
+def _float32_threshold(threshold):
+    # Round down so that float32 x <= t32 holds exactly when x <= t in float64
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+
+def node_value_arrays(forest):
+    """Sparse class distributions of every node of every tree, for FlatForest node values"""
+    counts, classes, probs = [], [], []
+    for estimator in forest.estimators_:
+        values = estimator.tree_.value[:, 0, :]
+        values = values / values.sum(axis=1, keepdims=True)
+        node_index, class_index = np.nonzero(values)
+        counts.append(np.bincount(node_index, minlength=len(values)))
+        classes.append(class_index.astype(np.int32))
+        probs.append(values[node_index, class_index].astype(np.float32))
+    node_ptr = np.zeros(sum(len(count) for count in counts) + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(counts), out=node_ptr[1:])
+    return node_ptr, np.concatenate(classes), np.concatenate(probs)
+
+
+def export_forest(forest, node_values=False):
+    """Flatten a fitted RandomForestClassifier into a FlatForest.
+
+    node_values also stores every node's class distribution so predictions can be
+    explained; it makes the forest several times larger.
+    """
+    features, thresholds, lefts, rights, roots = [], [], [], [], []
+    value_counts, value_classes, value_probs = [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(_float32_threshold(np.where(is_leaf, 0.0, tree.threshold)))
+        lefts.append((np.where(is_leaf, node_ids, tree.children_left) + offset).astype(np.int32))
+        rights.append((np.where(is_leaf, node_ids, tree.children_right) + offset).astype(np.int32))
+        roots.append(offset)
+
+        # Normalized class distribution of each leaf, non-zero entries only
+        values = tree.value[:, 0, :]
+        values = values / values.sum(axis=1, keepdims=True)
+        values[~is_leaf] = 0
+        node_index, class_index = np.nonzero(values)
+        value_counts.append(np.bincount(node_index, minlength=tree.node_count))
+        value_classes.append(class_index.astype(np.int32))
+        value_probs.append(values[node_index, class_index].astype(np.float32))
+
+        offset += tree.node_count
+
+    value_ptr = np.zeros(offset + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(value_counts), out=value_ptr[1:])
+
+    node_ptr = node_class = node_prob = None
+    if node_values:
+        node_ptr, node_class, node_prob = node_value_arrays(forest)
+
+    return FlatForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        roots=np.array(roots, dtype=np.int32),
+        value_ptr=value_ptr,
+        value_class=np.concatenate(value_classes),
+        value_prob=np.concatenate(value_probs),
+        classes=np.asarray(forest.classes_),
+        n_features=forest.n_features_in_,
+        node_ptr=node_ptr,
+        node_class=node_class,
+        node_prob=node_prob,
+    )
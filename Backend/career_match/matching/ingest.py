@@ -0,0 +1,157 @@
+import time
+
+import pandas as pd
+from django.db import models, transaction
+from django.utils import timezone
+
+# CSV columns (lowercased) for each model field
+CAREER_FIELD_MAP = {
+    'career_name': 'career_name',
+    'description': 'description',
+    'required_skills': 'required_skills',
+    'qualifications': 'qualifications',
+    'industry_type': 'industry_type',
+}
+USER_PROFILE_FIELD_MAP = {
+    'name': 'name',
+    'age': 'age',
+    'education_level': 'education',
+    'skills': 'skills',
+    'interests': 'interests',
+    'actual_career': 'recommended_career',
+}
+# Cleaned_Users.csv has no gender, experience or career preference, which UserProfile
+# requires. They are only set on the profiles a load creates
+USER_PROFILE_DEFAULTS = {'gender': '', 'experience': 0.0, 'career_preference': ''}
+USER_PROFILE_KEY = ('name', 'age', 'education_level', 'skills')
+
+
+def _field_values(series, field, default):
+    """Convert a CSV column to values that fit a model field"""
+    if isinstance(field, (models.IntegerField, models.FloatField)):
+        values = pd.to_numeric(series, errors='coerce')
+        if default is None and not field.null:
+            default = 0
+        values = values.astype(object).where(values.notna(), default)
+        if isinstance(field, models.IntegerField):
+            return [value if value is None else int(value) for value in values]
+        return [value if value is None else float(value) for value in values]
+
+    if default is None and not field.null:
+        default = ''
+    values = series.astype(object).where(series.notna(), default)
+    values = values.map(lambda value: value if value is None else str(value).strip())
+    if field.max_length:
+        values = values.map(lambda value: value if value is None else value[:field.max_length])
+    return values.tolist()
+
+
+def prepare_chunk(chunk, model, field_map, defaults=None):
+    """Turn a chunk of CSV rows into a list of {field: value} dicts for model.
+
+    Columns are matched case-insensitively. A field whose column is missing from the
+    CSV gets its value from defaults.
+    """
+    defaults = defaults or {}
+    chunk = chunk.rename(columns=lambda column: str(column).strip().lower())
+    columns = {}
+    for field_name in list(field_map) + [name for name in defaults if name not in field_map]:
+        field = model._meta.get_field(field_name)
+        column = field_map.get(field_name)
+        series = chunk[column] if column in chunk.columns else pd.Series([None] * len(chunk), index=chunk.index)
+        columns[field_name] = _field_values(series, field, defaults.get(field_name))
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _upsert(model, rows, key_fields, update_fields, batch_size):
+    """Create rows whose key isn't stored yet and update the ones that are"""
+    first_key = key_fields[0]
+    existing = {}
+    candidates = model.objects.filter(**{f"{first_key}__in": {row[first_key] for row in rows}})
+    for obj in candidates:
+        existing.setdefault(tuple(getattr(obj, name) for name in key_fields), []).append(obj)
+
+    to_create, to_update = [], []
+    for row in rows:
+        matches = existing.get(tuple(row[name] for name in key_fields))
+        if matches is None:
+            to_create.append(model(**row))
+            continue
+        for obj in matches:
+            if any(getattr(obj, name) != row[name] for name in update_fields):
+                for name in update_fields:
+                    setattr(obj, name, row[name])
+                to_update.append(obj)
+
+    model.objects.bulk_create(to_create, batch_size=batch_size)
+    if to_update and update_fields:
+        # bulk_update skips save(), so auto_now fields have to be set here
+        touched = [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        now = timezone.now()
+        for obj in to_update:
+            for name in touched:
+                setattr(obj, name, now)
+        model.objects.bulk_update(to_update, list(update_fields) + touched, batch_size=batch_size)
+    return len(to_create), len(to_update)
+
+
+def ingest_csv(path, model, field_map, key_fields, defaults=None, chunksize=5000, batch_size=500,
+               encoding='latin1', log=print):
+    """Stream a CSV into model, upserting by key_fields.
+
+    The file is read chunksize rows at a time and each chunk is written in its own
+    transaction with bulk_create/bulk_update in batches of batch_size, so a failure
+    only rolls back the chunk it happened in. A key that appears more than once in
+    the file keeps its first row, rows with an empty first key field are skipped,
+    and running the same file twice changes nothing. defaults fill fields the CSV
+    lacks on rows it creates; existing rows keep their values for those fields.
+    Returns counts of rows read, created, updated and skipped, and rows per second.
+    """
+    key_fields = tuple(key_fields)
+    update_fields = [name for name in field_map if name not in key_fields]
+    seen = set()
+    stats = {'rows': 0, 'created': 0, 'updated': 0, 'skipped': 0}
+    start = time.perf_counter()
+
+    for chunk in pd.read_csv(path, encoding=encoding, chunksize=chunksize):
+        rows = []
+        for row in prepare_chunk(chunk, model, field_map, defaults):
+            key = tuple(row[name] for name in key_fields)
+            if key in seen or key[0] in (None, ''):
+                stats['skipped'] += 1
+                continue
+            seen.add(key)
+            rows.append(row)
+
+        with transaction.atomic():
+            created, updated = _upsert(model, rows, key_fields, update_fields, batch_size)
+        stats['rows'] += len(chunk)
+        stats['created'] += created
+        stats['updated'] += updated
+
+        seconds = time.perf_counter() - start
+        log(f"{stats['rows']} rows ({stats['rows'] / seconds:.0f} rows/s): "
+            f"{stats['created']} created, {stats['updated']} updated, {stats['skipped']} skipped")
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    stats['rows_per_second'] = round(stats['rows'] / stats['seconds'], 1) if stats['seconds'] else 0.0
+    return stats
+
+
+def ingest_careers(path, **options):
+    from matching.models import Career
+    return ingest_csv(path, Career, CAREER_FIELD_MAP, key_fields=('career_name',), **options)
+
+
+def ingest_user_profiles(path, trained=True, **options):
+    """Load user profiles from a Cleaned_Users-style CSV.
+
+    With trained, the file is the one the model was trained on, so its labels are
+    also recorded as trained_career and refresh_model doesn't train on them again.
+    """
+    from matching.models import UserProfile
+    field_map = USER_PROFILE_FIELD_MAP
+    if trained:
+        field_map = dict(field_map, trained_career=field_map['actual_career'])
+    return ingest_csv(path, UserProfile, field_map, key_fields=USER_PROFILE_KEY,
+                      defaults=USER_PROFILE_DEFAULTS, **options)
@@ -1,33 +1,29 @@
 # career_match/management/commands/load_data.py
 
-import pandas as pd
 from django.core.management.base import BaseCommand
-from matching.models import Career  # Import your model
+
+from matching.catalog import get_career_data_path
+from matching.ingest import ingest_careers
+
 
 class Command(BaseCommand):
     help = 'Load career data into the database from a CSV file'
 
-    def handle(self, *args, **kwargs):
-        # Define the path to your CSV file (adjust this path)
-        file_path = "C:/Users/SHIRAH/Desktop/career_matching/career_match/career_data.csv"
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="CSV file (defaults to CAREER_DATA_PATH)")
+        parser.add_argument('--chunksize', type=int, default=5000, help="Rows read and committed at a time")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per INSERT/UPDATE statement")
 
-        # Read the CSV file
+    def handle(self, *args, **options):
+        file_path = options['path'] or get_career_data_path()
         try:
-            career_data = pd.read_csv(file_path, encoding='latin1')
+            stats = ingest_careers(file_path, chunksize=options['chunksize'], batch_size=options['batch_size'],
+                                   log=self.stdout.write)
         except Exception as e:
-            self.stderr.write(f"Error reading the CSV file: {str(e)}")
+            self.stderr.write(f"Error loading the CSV file: {str(e)}")
             return
-        career_data.columns = career_data.columns.str.strip()
-        self.stdout.write(self.style.SUCCESS(f"Columns in CSV: {career_data.columns.tolist()}"))
-
-        # Loop through the data and create Career instances
-        for _, row in career_data.iterrows():
-            Career.objects.create(
-                career_name=row['Career_name'],
-                description=row['Description'],
-                required_skills=row['Required_skills'],
-                qualifications=row['Qualifications'],
-                industry_type=row['Industry_type'],
-            )
 
-        self.stdout.write(self.style.SUCCESS(f"Successfully loaded career data from {file_path}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully loaded career data from {file_path}: {stats['created']} created, "
+            f"{stats['updated']} updated, {stats['skipped']} skipped ({stats['rows_per_second']} rows/s)"
+        ))
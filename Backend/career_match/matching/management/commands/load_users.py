@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from matching.ingest import ingest_user_profiles
+
+
+class Command(BaseCommand):
+    help = 'Load user profiles into the database from a Cleaned_Users-style CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="CSV file (defaults to CAREER_USER_DATA_PATH)")
+        parser.add_argument('--chunksize', type=int, default=5000, help="Rows read and committed at a time")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per INSERT/UPDATE statement")
+        parser.add_argument('--feedback', action='store_true',
+                            help="The file holds new labels, not the model's training data, so "
+                                 "refresh_model should train on them")
+
+    def handle(self, *args, **options):
+        file_path = options['path'] or settings.CAREER_USER_DATA_PATH
+        try:
+            stats = ingest_user_profiles(file_path, trained=not options['feedback'],
+                                         chunksize=options['chunksize'], batch_size=options['batch_size'],
+                                         log=self.stdout.write)
+        except Exception as e:
+            self.stderr.write(f"Error loading the CSV file: {str(e)}")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully loaded user profiles from {file_path}: {stats['created']} created, "
+            f"{stats['updated']} updated, {stats['skipped']} skipped ({stats['rows_per_second']} rows/s)"
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from matching.bundle import prune_bundles
+from matching.refresh import (
+    FEEDBACK_FIELDS, WATERMARK_KEY, feedback_frame, feedback_profiles, mark_trained, refresh_bundle,
+)
+from matching.registry import get_model_dir, load_bundle
+
+
+class Command(BaseCommand):
+    help = 'Grow the career model with new labeled UserProfile rows and publish a new bundle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trees', type=int, default=20, help="Trees to add to the forest")
+        parser.add_argument('--min-rows', type=int, default=1,
+                            help="Do nothing until at least this many new labeled profiles exist")
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be used")
+
+    def handle(self, *args, **options):
+        model_dir = get_model_dir()
+        bundle = load_bundle(model_dir)
+        watermark = bundle.manifest.get(WATERMARK_KEY, 0)
+
+        # Profiles added since the training CSV was loaded or the last refresh, and
+        # older ones whose actual career was filled in or changed since
+        rows = list(feedback_profiles().values_list(*FEEDBACK_FIELDS))
+
+        self.stdout.write(f"Model {bundle.version}: {len(rows)} new or relabeled profiles")
+        if len(rows) < options['min_rows']:
+            self.stdout.write("Not enough new profiles, nothing to do")
+            return
+        if options['dry_run']:
+            return
+
+        new_watermark = max(watermark, max(row[0] for row in rows))
+        version = refresh_bundle(model_dir, bundle, feedback_frame(rows), new_watermark, trees=options['trees'])
+        if version is None:
+            return
+        mark_trained(rows)
+        prune_bundles(model_dir, keep=3)
+        self.stdout.write(self.style.SUCCESS(f"Published bundle {version}"))
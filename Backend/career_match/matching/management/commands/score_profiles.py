@@ -0,0 +1,89 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from matching.models import PredictionResult, UserProfile
+from matching.registry import get_model_dir, load_bundle
+from matching.scoring import PROFILE_FIELDS, score_profiles
+
+
+def aware_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"Not an ISO date/time: {value}")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+class Command(BaseCommand):
+    help = 'Precompute PredictionResult rows for stored UserProfile rows with the current model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Score every profile, not just new and changed ones")
+        parser.add_argument('--since', type=aware_datetime, default=None,
+                            help="Score profiles updated after this ISO date/time instead of the ones "
+                                 "the current model hasn't scored since they last changed")
+        parser.add_argument('--chunksize', type=int, default=2000, help="Profiles encoded and scored together")
+        parser.add_argument('--workers', type=int, default=1, help="Worker processes scoring chunks")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per INSERT")
+
+    def handle(self, *args, **options):
+        model_dir = get_model_dir()
+        bundle = load_bundle(model_dir)
+
+        # A profile needs scoring when the current model version hasn't scored it since
+        # it was last created or updated, so a new model rescores everything and a
+        # rerun picks up new and edited profiles. Profiles the model can't encode get
+        # a row without a career, so reruns don't select them again until they change.
+        # (A profile edited while its own chunk is being scored counts as scored; the
+        # next run after another edit catches it.)
+        profiles = UserProfile.objects.order_by('id')
+        if options['since'] is not None:
+            profiles = profiles.filter(updated_at__gt=options['since'])
+            description = f"updated since {options['since'].isoformat()}"
+        elif not options['all']:
+            profiles = (profiles
+                        .annotate(scored_at=Max('predictionresult__timestamp',
+                                                filter=Q(predictionresult__model_version=bundle.version)))
+                        .filter(Q(scored_at__isnull=True) | Q(updated_at__gt=F('scored_at'))))
+            description = "new or changed"
+        else:
+            description = "all"
+        profiles = profiles.values_list(*PROFILE_FIELDS)
+        self.stdout.write(f"Scoring {profiles.count()} {description} profiles with model {bundle.version}")
+
+        def save(results):
+            with transaction.atomic():
+                PredictionResult.objects.bulk_create(
+                    [PredictionResult(user_id=user_id, predicted_career=career, confidence_score=confidence,
+                                      model_version=bundle.version)
+                     for user_id, career, confidence in results],
+                    batch_size=options['batch_size'],
+                )
+
+        def skip(ids):
+            PredictionResult.objects.bulk_create(
+                [PredictionResult(user_id=user_id, predicted_career='', confidence_score=None,
+                                  model_version=bundle.version)
+                 for user_id in ids],
+                batch_size=options['batch_size'],
+            )
+
+        stats = score_profiles(
+            profiles.iterator(chunk_size=options['chunksize']),
+            bundle,
+            model_dir,
+            save,
+            chunksize=options['chunksize'],
+            workers=options['workers'],
+            log=self.stdout.write,
+            skip=skip,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stats['scored']} predictions, skipped {stats['skipped']} profiles "
+            f"({stats['profiles_per_second']} profiles/s)"
+        ))
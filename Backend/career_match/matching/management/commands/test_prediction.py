@@ -1,56 +1,29 @@
 from django.core.management.base import BaseCommand
-import pandas as pd
-import joblib
-import numpy as np
-from sklearn.preprocessing import StandardScaler
-from matching.models import UserProfile, PredictionResult  # Replace with your actual model names
+
+from matching.models import UserProfile, PredictionResult
+from matching.registry import get_model_dir, load_bundle
+from matching.scoring import PROFILE_FIELDS, score_chunk
 
 class Command(BaseCommand):
     help = 'Test career prediction using latest user input'
 
     def handle(self, *args, **kwargs):
-        # 1. Load encoders and model
-        model = joblib.load('matching/rf.pkl')
-        skills_encoder = joblib.load('matching/skills_encoder.pkl')
-        scaler = joblib.load('matching/scaler.pkl')
-        career_label_encoder = joblib.load('matching/career_label_encoder.pkl')
+        # 1. Load the current model bundle
+        bundle = load_bundle(get_model_dir())
 
         # 2. Get latest user profile
-        user = UserProfile.objects.latest('id')
-
-        # 3. Preprocess user input
-        skills = user.skills.lower().replace(',', ' ').split()
-        skills_encoded = pd.DataFrame(skills_encoder.transform([skills]), columns=skills_encoder.classes_)
-
-        experience_scaled = scaler.transform([[user.experience]])
-
-        # Prepare input features
-        features = pd.DataFrame([{
-            'career_preference': user.career_preference,
-            'education_level': user.education_level,
-            'experience': experience_scaled[0][0]
-        }])
-
-        # Combine with encoded skills
-        full_input = pd.concat([features.reset_index(drop=True), skills_encoded.reset_index(drop=True)], axis=1)
-
-        # Align input columns with training model
-        X_columns = model.named_steps['classifier'].feature_importances_.argsort()
-        try:
-            full_input = full_input[model.named_steps['classifier'].feature_importances_.argsort()]
-        except:
-            pass  # Optional: ensure columns match trained model input if needed
+        user = UserProfile.objects.values_list(*PROFILE_FIELDS).latest('id')
 
-        # 4. Predict
-        probs = model.predict_proba(full_input)
-        pred_index = np.argmax(probs)
-        confidence = probs[0][pred_index]
-        predicted_class = model.predict(full_input)[0]
-        predicted_label = career_label_encoder.inverse_transform([predicted_class])[0]
+        # 3. Clean, encode and score it the same way score_profiles does
+        results, _ = score_chunk(bundle, [user])
+        if not results:
+            self.stdout.write(self.style.ERROR(f"Could not encode profile {user[0]}"))
+            return
+        _, predicted_label, confidence = results[0]
 
-        # 5. Save prediction to DB
+        # 4. Save prediction to DB
         PredictionResult.objects.create(
-            user=user,
+            user_id=user[0],
             predicted_career=predicted_label,
             confidence_score=round(confidence, 2)
         )
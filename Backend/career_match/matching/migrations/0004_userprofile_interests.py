@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0003_predictionresult_model_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='interests',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
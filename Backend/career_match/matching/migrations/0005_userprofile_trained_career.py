@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0004_userprofile_interests'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='trained_career',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
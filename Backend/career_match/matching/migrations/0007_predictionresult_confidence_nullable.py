@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0006_userprofile_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='predictionresult',
+            name='confidence_score',
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -8,13 +8,20 @@ class UserProfile(models.Model):
     experience = models.FloatField()
     career_preference = models.CharField(max_length=100)
     skills = models.TextField()
+    interests = models.TextField(blank=True, default='')
     actual_career = models.CharField(max_length=100, null=True, blank=True)
+    # The actual_career refresh_model last trained on, so unchanged labels aren't reused
+    trained_career = models.CharField(max_length=100, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
 
 class PredictionResult(models.Model):
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
     predicted_career = models.CharField(max_length=100)
-    confidence_score = models.FloatField()
+    # None on the rows batch scoring records for profiles the model couldn't encode
+    confidence_score = models.FloatField(null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Set by batch scoring to the bundle version that produced the prediction
+    model_version = models.CharField(max_length=64, blank=True, default='')
 
 class Career(models.Model):
     career_name = models.CharField(max_length=255)
@@ -0,0 +1,96 @@
+from collections import Counter
+from functools import lru_cache
+
+# Common abbreviations and spellings of skills and interests, mapped to the name the
+# training data uses. Entries whose target isn't in a vocabulary are ignored for it.
+SYNONYMS = {
+    'ml': 'machine learning',
+    'dl': 'deep learning',
+    'artificial intelligence': 'ai',
+    'nlp': 'natural language processing',
+    'js': 'javascript',
+    'py': 'python',
+    'k8s': 'kubernetes',
+    'node': 'node.js',
+    'nodejs': 'node.js',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'sklearn': 'scikit-learn',
+    'tf': 'tensorflow',
+    'torch': 'pytorch',
+    'csharp': 'c#',
+    'cpp': 'c++',
+    'dotnet': '.net',
+    'mongo': 'mongodb',
+    'rest': 'rest apis',
+    'rest api': 'rest apis',
+    'ms excel': 'excel',
+    'microsoft excel': 'excel',
+    'photoshop': 'adobe photoshop',
+    'illustrator': 'adobe illustrator',
+    'pm': 'project management',
+    'stats': 'statistics',
+    'math': 'mathematics',
+    'maths': 'mathematics',
+    'cyber security': 'cybersecurity',
+    'infosec': 'cybersecurity',
+    'dataviz': 'data visualization',
+    'team work': 'teamwork',
+    'communication skills': 'communication',
+    'user experience': 'ux',
+    'user interface': 'ui',
+    'programming': 'coding',
+    'tech': 'technology',
+}
+
+# Minimum trigram similarity for an unknown token to be mapped to a known one
+DEFAULT_THRESHOLD = 0.7
+
+
+def trigrams(token):
+    """Character trigrams of token, padded like pg_trgm so word starts and ends count"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TokenNormalizer:
+    """Maps tokens outside a vocabulary to their closest term in it.
+
+    A token is looked up in the synonym table first, then compared with every term
+    that shares at least one trigram with it using the Dice coefficient of their
+    trigram sets. The best term is returned if it scores at least threshold. The
+    trigram index is built once per vocabulary and results are cached per token.
+    """
+
+    def __init__(self, vocabulary, synonyms=SYNONYMS, threshold=DEFAULT_THRESHOLD, cache_size=10000):
+        self.terms = sorted(vocabulary)
+        self.threshold = threshold
+        vocabulary = set(self.terms)
+        self.synonyms = {alias: term for alias, term in synonyms.items() if term in vocabulary}
+
+        self.term_sizes = []
+        self.index = {}
+        for term_id, term in enumerate(self.terms):
+            grams = trigrams(term)
+            self.term_sizes.append(len(grams))
+            for gram in grams:
+                self.index.setdefault(gram, []).append(term_id)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, token):
+        """(term, score) for a lowercased, stripped token, or None if nothing is close enough"""
+        if token in self.synonyms:
+            return self.synonyms[token], 1.0
+        grams = trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.index.get(gram, ()))
+        best = None
+        for term_id, count in shared.items():
+            score = 2 * count / (len(grams) + self.term_sizes[term_id])
+            # Ties go to the shorter, then alphabetically first term
+            if best is None or (score, -self.term_sizes[term_id], -term_id) > best[0]:
+                best = ((score, -self.term_sizes[term_id], -term_id), term_id)
+        if best is None or best[0][0] < self.threshold:
+            return None
+        return self.terms[best[1]], round(best[0][0], 3)
@@ -0,0 +1,108 @@
+import threading
+
+import numpy as np
+
+from matching.catalog import normalize_career_name
+from matching.normalize import DEFAULT_THRESHOLD, TokenNormalizer
+from matching.typeahead import normalize_query
+
+
+class ReadinessMatrix:
+    """Career x required-skill incidence matrix built from the career catalog.
+
+    Row s of incidence has a 1 for every career that requires skill s, so a user's
+    coverage of every career is the sum of the rows of the skills they have divided
+    by each career's number of required skills. User skills are matched to the
+    catalog's wording case-insensitively, then through a TokenNormalizer (so
+    "problem solving" counts as "Problem-solving"); resolved tokens are cached.
+    """
+
+    def __init__(self, catalog, threshold=DEFAULT_THRESHOLD, cache_size=10000):
+        entries = sorted(catalog, key=lambda entry: normalize_career_name(entry.name))
+        skill_ids = {}
+        self.careers = []
+        self.required = []
+        for entry in entries:
+            required = {}
+            for skill in entry.required_skills:
+                key = normalize_query(skill)
+                if key:
+                    required.setdefault(skill_ids.setdefault(key, len(skill_ids)), skill.strip())
+            self.careers.append(entry.name)
+            self.required.append(required)
+        self.index = {normalize_career_name(name): column for column, name in enumerate(self.careers)}
+        self.skill_ids = skill_ids
+
+        self.incidence = np.zeros((len(skill_ids), len(self.careers)), dtype=np.float32)
+        for column, required in enumerate(self.required):
+            self.incidence[list(required), column] = 1
+        # Careers without required skills have zero coverage rather than 0/0
+        self.required_counts = np.maximum(self.incidence.sum(axis=0), 1)
+
+        self.normalizer = None
+        if threshold is not None:
+            self.normalizer = TokenNormalizer(skill_ids, threshold=threshold, cache_size=cache_size)
+
+    def resolve(self, skills):
+        """Ids of the catalog skills among skills; unknown and unmatched ones are dropped"""
+        ids = set()
+        for skill in skills:
+            key = normalize_query(skill)
+            skill_id = self.skill_ids.get(key)
+            if skill_id is None and key and self.normalizer is not None:
+                match = self.normalizer.match(key)
+                if match is not None:
+                    skill_id = self.skill_ids[match[0]]
+            if skill_id is not None:
+                ids.add(skill_id)
+        return ids
+
+    def coverage(self, ids):
+        """Fraction of each career's required skills covered by the skill ids"""
+        if not ids:
+            return np.zeros(len(self.careers), dtype=np.float32)
+        return self.incidence[list(ids)].sum(axis=0) / self.required_counts
+
+    def career_readiness(self, column, ids, coverage):
+        required = self.required[column]
+        return {
+            'career': self.careers[column],
+            'coverage': round(float(coverage[column]) * 100, 1),
+            'matchedSkills': [skill for skill_id, skill in required.items() if skill_id in ids],
+            'missingSkills': [skill for skill_id, skill in required.items() if skill_id not in ids],
+        }
+
+    def score(self, skills, careers=None, top_n=10):
+        """Readiness for the named careers, or the top_n by coverage when careers is None.
+
+        Named careers that aren't in the catalog get None.
+        """
+        ids = self.resolve(skills)
+        coverage = self.coverage(ids)
+        if careers is None:
+            # Stable, so ties keep the catalog's alphabetical order
+            columns = np.argsort(-coverage, kind='stable')[:top_n].tolist()
+        else:
+            columns = [self.index.get(normalize_career_name(career)) for career in careers]
+        return [None if column is None else self.career_readiness(column, ids, coverage) for column in columns]
+
+
+_readiness = None
+_readiness_lock = threading.Lock()
+
+
+def get_readiness(catalog):
+    """The readiness matrix for catalog, rebuilt the first time it's asked for after a refresh"""
+    readiness = _readiness
+    if readiness is None or readiness[0] is not catalog:
+        with _readiness_lock:
+            readiness = _readiness
+            if readiness is None or readiness[0] is not catalog:
+                readiness = _build_readiness(catalog)
+    return readiness[1]
+
+
+def _build_readiness(catalog):
+    global _readiness
+    _readiness = (catalog, ReadinessMatrix(catalog))
+    return _readiness
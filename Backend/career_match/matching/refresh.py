@@ -0,0 +1,167 @@
+"""Grow the current career model with labeled feedback instead of retraining it.
+
+UserProfile.actual_career is the label. A refresh takes the labeled profiles whose
+label differs from the one the model was trained on (UserProfile.trained_career:
+set by load_users for the training CSV and by each refresh for the rows it used),
+adds trees fitted on them to the existing forest with warm_start, and publishes the
+result as a new bundle. The manifest records the highest profile id trained on.
+"""
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from django.db.models import F
+
+from matching.bundle import ENCODERS_FILE, bundle_path, write_bundle
+from matching.cleaning import clean_user_frame
+from matching.forest import export_forest
+
+WATERMARK_KEY = 'user_profile_watermark'
+FEEDBACK_FIELDS = ('id', 'education_level', 'skills', 'interests', 'age', 'actual_career')
+
+
+def feedback_profiles():
+    """Labeled profiles to train on: ones the model hasn't been trained with that label"""
+    from matching.models import UserProfile
+    return (UserProfile.objects.exclude(actual_career=F('trained_career'))
+            .exclude(actual_career__isnull=True).exclude(actual_career=''))
+
+
+def mark_trained(profiles, batch_size=500):
+    """Record the label each profile of FEEDBACK_FIELDS was trained with.
+
+    A profile whose label changed again in the meantime is left unmarked, so the
+    next refresh picks it up.
+    """
+    from matching.models import UserProfile
+    by_career = {}
+    for profile in profiles:
+        by_career.setdefault(profile[-1], []).append(profile[0])
+    for career, ids in by_career.items():
+        for start in range(0, len(ids), batch_size):
+            (UserProfile.objects.filter(id__in=ids[start:start + batch_size], actual_career=career)
+             .update(trained_career=career))
+
+
+def feedback_frame(profiles):
+    """Cleaned frame of labeled profiles, in the shape clean_user_frame expects.
+
+    profiles is an iterable of (id, education_level, skills, interests, age, actual_career).
+    """
+    user_data = pd.DataFrame(
+        list(profiles), columns=['id', 'education', 'skills', 'interests', 'age', 'recommended_career'],
+    )
+    user_data = user_data[user_data['recommended_career'].fillna('').str.strip() != '']
+    return clean_user_frame(user_data)
+
+
+def encode_feedback(bundle, user_data):
+    """Feature rows and label indices for the profiles whose career the model knows.
+
+    Returns (X, y, skipped), where skipped counts profiles with a career that isn't
+    one of the model's classes (trees can't be added for classes the model lacks)
+    or an education level the encoder doesn't know.
+    """
+    class_index = {career: index for index, career in enumerate(bundle.target_encoder.classes_)}
+    skill_vocabulary = bundle.encoder.skill_vocabulary
+    interest_vocabulary = bundle.encoder.interest_vocabulary
+    profiles, labels = [], []
+    for education, skills, interests, career in zip(user_data['education'], user_data['skills'],
+                                                    user_data['interests'], user_data['recommended_career']):
+        label = class_index.get(career.strip())
+        if label is None:
+            continue
+        profiles.append({
+            'education': education,
+            'skills': [skill for skill in skills if skill in skill_vocabulary],
+            'interests': [interest for interest in interests if interest in interest_vocabulary],
+        })
+        labels.append(label)
+    X, rows, _ = bundle.encoder.encode_many(profiles)
+    y = np.array(labels, dtype=np.intp)[rows]
+    return X, y, len(user_data) - len(rows)
+
+
+def grow_forest(model, X, y, n_classes, trees):
+    """Add trees fitted on (X, y) to a fitted forest, keeping its full class list.
+
+    Forests refit classes_ from y, so every class the new rows lack gets one
+    all-zero row with zero weight. The new trees then use the same class columns
+    as the existing ones, without those rows affecting any split.
+    """
+    missing = np.setdiff1d(np.arange(n_classes), y)
+    if missing.size:
+        X = sp.vstack([X, sp.csr_matrix((missing.size, X.shape[1]), dtype=X.dtype)], format='csr')
+        y = np.concatenate([y, missing])
+    sample_weight = np.concatenate([np.ones(len(y) - missing.size), np.zeros(missing.size)])
+
+    # 'balanced' class weights would be computed from this small batch alone, so the
+    # new trees are fitted unweighted
+    class_weight = model.class_weight
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees, class_weight=None)
+    model.fit(X, y, sample_weight=sample_weight)
+    model.set_params(warm_start=False, class_weight=class_weight)
+    return model
+
+
+def load_encoders(model_dir, bundle):
+    """Every encoder of the bundle, including the scaler the bundle doesn't keep"""
+    encoders = {
+        'skills_encoder': bundle.skills_encoder,
+        'interests_encoder': bundle.interests_encoder,
+        'education_encoder': bundle.education_encoder,
+        'target_encoder': bundle.target_encoder,
+    }
+    if bundle.manifest:
+        stored = joblib.load(os.path.join(bundle_path(model_dir, bundle.version), ENCODERS_FILE))
+        encoders.update({key: value for key, value in stored.items() if key not in encoders and key != 'feature_names'})
+    return encoders
+
+
+def refresh_bundle(model_dir, bundle, user_data, watermark, trees=20, publish=True):
+    """Grow bundle's model with the profiles in user_data and write a new bundle.
+
+    Returns the new version, or None when none of the profiles could be used.
+    """
+    start = time.perf_counter()
+    X, y, skipped = encode_feedback(bundle, user_data)
+    if skipped:
+        print(f"Skipped {skipped} profiles with a career or education the model doesn't know")
+    if not len(y):
+        print("No usable feedback rows, keeping the current model")
+        return None
+
+    model = bundle.model
+    n_classes = len(bundle.target_encoder.classes_)
+    if hasattr(model, 'estimators_'):
+        grow_forest(model, X, y, n_classes, trees)
+        flat_forest = export_forest(model, node_values=True)
+    else:
+        # A linear model from streaming training just takes another partial_fit step
+        model.partial_fit(X, y, classes=np.arange(n_classes))
+        flat_forest = None
+
+    version = write_bundle(
+        model_dir,
+        model,
+        encoders=load_encoders(model_dir, bundle),
+        feature_names=bundle.feature_names,
+        training_data_hash=bundle.manifest.get('training_data_hash'),
+        flat_forest=flat_forest,
+        publish=publish,
+        extra={
+            WATERMARK_KEY: int(watermark),
+            'refresh': {
+                'parent_version': bundle.version,
+                'rows': int(len(y)),
+                'trees_added': trees if flat_forest is not None else 0,
+                'seconds': round(time.perf_counter() - start, 2),
+            },
+        },
+    )
+    print(f"Grew model {bundle.version} with {len(y)} profiles into bundle {version} "
+          f"in {time.perf_counter() - start:.1f}s")
+    return version
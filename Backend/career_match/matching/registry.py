@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+from matching.bundle import (
+    CURRENT_FILE, LEGACY_FILES, LEGACY_FLAT_FOREST_FILE, LEGACY_MODEL_FILE,
+    bundle_path, current_version, load_bundle_dir, load_legacy_bundle,
+)
+
+
+def get_model_dir():
+    """Directory holding the trained model and encoders"""
+    return getattr(settings, 'CAREER_MODEL_DIR', os.path.join(settings.BASE_DIR, 'matching', 'model'))
+
+
+def read_signature(model_dir):
+    """Identify what is on disk: the CURRENT bundle version, or the legacy pickle files.
+
+    Returns None when there is nothing loadable in model_dir.
+    """
+    version = current_version(model_dir)
+    if version is not None:
+        return ((CURRENT_FILE, version),)
+
+    signature = []
+    for filename in [LEGACY_MODEL_FILE, *LEGACY_FILES.values()]:
+        try:
+            stat = os.stat(os.path.join(model_dir, filename))
+        except FileNotFoundError:
+            return None
+        signature.append((filename, stat.st_mtime_ns, stat.st_size))
+    # The flat forest is optional; older model directories don't have one
+    try:
+        stat = os.stat(os.path.join(model_dir, LEGACY_FLAT_FOREST_FILE))
+        signature.append((LEGACY_FLAT_FOREST_FILE, stat.st_mtime_ns, stat.st_size))
+    except FileNotFoundError:
+        pass
+    return tuple(signature)
+
+
+def load_bundle(model_dir, signature=None):
+    """Load the current bundle from model_dir, or the legacy pickles if there is none"""
+    if signature is None:
+        signature = read_signature(model_dir)
+    flat_forest_max_rows = getattr(settings, 'CAREER_FLAT_FOREST_MAX_ROWS', 32)
+    verify = getattr(settings, 'CAREER_BUNDLE_VERIFY', False)
+    if signature and signature[0][0] == CURRENT_FILE:
+        return load_bundle_dir(bundle_path(model_dir, signature[0][1]), flat_forest_max_rows, verify)
+    version = str(max(mtime for _, mtime, _ in signature)) if signature else "unknown"
+    return load_legacy_bundle(model_dir, version, flat_forest_max_rows)
+
+
+class ModelRegistry:
+    """Process-wide holder of the current ModelBundle.
+
+    The bundle is loaded once per worker (normally by start_serving, from wsgi.py or
+    asgi.py) and a background thread polls the model files. When they change the new
+    bundle is loaded off the request path and swapped in with a single reference
+    assignment.
+    """
+
+    def __init__(self, model_dir=None, poll_interval=None):
+        self.model_dir = model_dir or get_model_dir()
+        if poll_interval is None:
+            poll_interval = getattr(settings, 'CAREER_MODEL_RELOAD_INTERVAL', 5.0)
+        self.poll_interval = poll_interval
+        self._bundle = None
+        self._signature = None
+        self._pending_signature = None
+        self._load_lock = threading.Lock()
+        self._watcher_pid = None
+        self._listeners = []
+
+    @property
+    def loaded(self):
+        return self._bundle is not None
+
+    def get(self):
+        """Return the current bundle, loading it if this worker hasn't yet"""
+        bundle = self._bundle
+        if bundle is None:
+            with self._load_lock:
+                if self._bundle is None:
+                    self._load(read_signature(self.model_dir))
+                bundle = self._bundle
+        self._ensure_watcher()
+        return bundle
+
+    def on_load(self, callback):
+        """Call callback(bundle) after every bundle this registry loads from now on"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Load the bundle eagerly and start watching the model directory"""
+        try:
+            self.get()
+        except Exception as e:
+            print(f"Could not preload career model from {self.model_dir}: {str(e)}")
+            self._ensure_watcher()
+
+    def reload_if_changed(self):
+        """Swap in a new bundle if the files on disk changed. Returns True on swap.
+
+        A new signature has to be seen on two consecutive polls before it is loaded,
+        so legacy pickles that train.py is still writing are never picked up
+        half-finished. (Bundles are only published once complete.)
+        """
+        signature = read_signature(self.model_dir)
+        if signature is None or signature == self._signature:
+            self._pending_signature = None
+            return False
+        if signature != self._pending_signature:
+            self._pending_signature = signature
+            return False
+        with self._load_lock:
+            self._load(signature)
+        self._pending_signature = None
+        return True
+
+    def _load(self, signature):
+        if signature is None:
+            raise FileNotFoundError(f"Career model files not found in {self.model_dir}")
+        bundle = load_bundle(self.model_dir, signature)
+        # Single assignment: readers see either the old bundle or the new one
+        self._bundle = bundle
+        self._signature = signature
+        print(f"Loaded career model bundle {bundle.version} from {self.model_dir}")
+        for callback in self._listeners:
+            try:
+                callback(bundle)
+            except Exception as e:
+                print(f"Error in career model load listener: {str(e)}")
+
+    def _ensure_watcher(self):
+        # Threads don't survive a fork, so gunicorn --preload workers start their own
+        if self.poll_interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+        watcher = threading.Thread(target=self._watch, name="career-model-watcher", daemon=True)
+        watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.reload_if_changed()
+            except Exception:
+                print("Error reloading career model bundle, keeping the current one")
+                traceback.print_exc()
+
+
+registry = ModelRegistry()
@@ -0,0 +1,54 @@
+import numpy as np
+
+from matching.catalog import normalize_career_name
+
+
+class CandidateIndex:
+    """Shortlists a bundle's classes for a profile by skill overlap with the catalog.
+
+    Each class that has a catalog entry is scored with the readiness matrix: the
+    number of its required skills the profile's skills and interests cover, ties
+    broken by the covered fraction. The best size of them are candidates. Classes
+    the catalog doesn't describe can't be scored, so they are always candidates
+    rather than never being recommended.
+
+    Only matching/bench_retrieval.py uses it. For the current forest, scoring a
+    shortlist costs as much as scoring every class and loses recall, so /predict/
+    doesn't shortlist.
+    """
+
+    def __init__(self, bundle, readiness):
+        self.version = bundle.version
+        self.readiness = readiness
+        columns = [readiness.index.get(normalize_career_name(name)) for name in bundle.target_encoder.classes_]
+        self.indexed_classes = np.array([index for index, column in enumerate(columns) if column is not None],
+                                        dtype=np.intp)
+        self.unindexed_classes = np.array([index for index, column in enumerate(columns) if column is None],
+                                          dtype=np.intp)
+        indexed_columns = [column for column in columns if column is not None]
+        self.incidence = readiness.incidence[:, indexed_columns]
+        self.required_counts = readiness.required_counts[indexed_columns]
+
+    def shortlist(self, user_input, size):
+        """Class indices to rank for user_input: the size best indexed ones plus the unindexed ones"""
+        ids = self.readiness.resolve(list(user_input.get('skills', [])) + list(user_input.get('interests', [])))
+        if ids:
+            overlap = self.incidence[list(ids)].sum(axis=0)
+            scores = overlap + overlap / (self.required_counts + 1)
+        else:
+            scores = np.zeros(len(self.indexed_classes), dtype=np.float32)
+        # Stable, so ties keep the bundle's class order
+        best = np.argsort(-scores, kind='stable')[:size]
+        return np.concatenate([self.indexed_classes[best], self.unindexed_classes])
+
+
+def rank_shortlist(bundle, X, shortlist):
+    """Probabilities of the full class vector for one encoded row, scored only on shortlist.
+
+    Classes outside the shortlist get 0, so the result drops into the code that
+    takes a full predict_proba row.
+    """
+    probabilities = np.zeros(len(bundle.target_encoder.classes_))
+    probabilities[shortlist] = bundle.predict_proba(X, classes=shortlist)[0]
+    return probabilities
+
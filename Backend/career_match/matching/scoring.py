@@ -0,0 +1,133 @@
+"""Score stored UserProfile rows offline so pages can show predictions without the model.
+
+Profiles are read in id order and cut into chunks. Each chunk is cleaned, encoded
+into one sparse matrix and scored in a single predict_proba call, either in this
+process or in a pool of worker processes that each load the bundle once. Results
+come back in chunk order and are written with bulk_create, one transaction per
+chunk, tagged with the bundle version that produced them.
+"""
+import collections
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from matching.bundle import bundle_path, load_bundle_dir, load_legacy_bundle
+from matching.cleaning import clean_user_frame
+
+PROFILE_FIELDS = ('id', 'education_level', 'skills', 'interests')
+
+# The bundle each worker process scores with, set by _init_worker
+_worker_bundle = None
+
+
+def profile_inputs(profiles):
+    """Encoder inputs for profiles of (id, education_level, skills, interests).
+
+    Returns (ids, inputs). Profiles whose education doesn't map to a known level are
+    left out.
+    """
+    user_data = pd.DataFrame(list(profiles), columns=['id', 'education', 'skills', 'interests'])
+    user_data['age'] = 0
+    user_data['recommended_career'] = ''
+    user_data = clean_user_frame(user_data)
+    inputs = [
+        {'education': education, 'skills': skills, 'interests': interests}
+        for education, skills, interests in zip(user_data['education'], user_data['skills'],
+                                                user_data['interests'])
+    ]
+    return user_data['id'].tolist(), inputs
+
+
+def score_chunk(bundle, profiles):
+    """Top career and its probability for each profile in one chunk.
+
+    Returns (results, skipped), where results is a list of (id, career, confidence)
+    and skipped lists the ids of profiles that couldn't be cleaned or encoded.
+    """
+    ids, inputs = profile_inputs(profiles)
+    X, rows, _ = bundle.encoder.encode_many(inputs)
+    if not rows:
+        return [], [profile[0] for profile in profiles]
+    probabilities = bundle.predict_proba(X)
+    best = probabilities.argmax(axis=1)
+    careers = bundle.target_encoder.classes_[best]
+    confidence = probabilities[np.arange(len(best)), best]
+    results = list(zip(np.asarray(ids)[rows].tolist(), careers.tolist(), np.round(confidence, 4).tolist()))
+    scored = {result[0] for result in results}
+    return results, [profile[0] for profile in profiles if profile[0] not in scored]
+
+
+def load_bundle_version(model_dir, version, legacy, flat_forest_max_rows=32):
+    """Load exactly the given version, so workers never score with a newer bundle"""
+    if legacy:
+        return load_legacy_bundle(model_dir, version, flat_forest_max_rows)
+    return load_bundle_dir(bundle_path(model_dir, version), flat_forest_max_rows)
+
+
+def _init_worker(model_dir, version, legacy, flat_forest_max_rows):
+    global _worker_bundle
+    _worker_bundle = load_bundle_version(model_dir, version, legacy, flat_forest_max_rows)
+    # One process per core already; a forest using every core in each would oversubscribe
+    if hasattr(_worker_bundle.model, 'n_jobs'):
+        _worker_bundle.model.n_jobs = 1
+
+
+def _score_in_worker(profiles):
+    return score_chunk(_worker_bundle, profiles)
+
+
+def chunked(iterable, size):
+    """Lists of up to size consecutive items of iterable"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_profiles(profiles, bundle, model_dir, save, chunksize=2000, workers=1, log=print, skip=None):
+    """Score an iterable of profile tuples chunk by chunk and pass each chunk's results to save.
+
+    With workers > 1 chunks are scored in a process pool, with at most two chunks
+    per worker in flight so memory stays bounded however many profiles there are.
+    save(results) is called in the parent process, in chunk order, followed by
+    skip(ids) with the ids of the chunk's profiles that couldn't be scored.
+    Returns counts of profiles scored and skipped, and profiles per second.
+    """
+    stats = {'profiles': 0, 'scored': 0, 'skipped': 0}
+    start = time.perf_counter()
+
+    def collect(results, skipped):
+        save(results)
+        if skip is not None and skipped:
+            skip(skipped)
+        stats['scored'] += len(results)
+        stats['skipped'] += len(skipped)
+        stats['profiles'] += len(results) + len(skipped)
+        seconds = time.perf_counter() - start
+        log(f"{stats['profiles']} profiles ({stats['profiles'] / seconds:.0f}/s): "
+            f"{stats['scored']} scored, {stats['skipped']} skipped")
+
+    if workers <= 1:
+        for chunk in chunked(profiles, chunksize):
+            collect(*score_chunk(bundle, chunk))
+    else:
+        legacy = not bundle.manifest
+        initargs = (str(model_dir), bundle.version, legacy, bundle.flat_forest_max_rows)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            pending = collections.deque()
+            for chunk in chunked(profiles, chunksize):
+                pending.append(pool.submit(_score_in_worker, chunk))
+                if len(pending) >= 2 * workers:
+                    collect(*pending.popleft().result())
+            while pending:
+                collect(*pending.popleft().result())
+
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    stats['profiles_per_second'] = round(stats['profiles'] / stats['seconds'], 1) if stats['seconds'] else 0.0
+    return stats
@@ -0,0 +1,136 @@
+import logging
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+
+from matching.forest import export_forest
+
+logger = logging.getLogger('matching.selection')
+
+
+def _timings_ms(func, inputs):
+    timings = []
+    for X in inputs:
+        start = time.perf_counter()
+        func(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def serialized_size_mb(model):
+    """Size of the model as write_bundle stores it, in megabytes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.joblib")
+        joblib.dump(model, path)
+        return os.path.getsize(path) / (1024 * 1024)
+
+
+def measure_model(model, X_sample, batch_size=1000, repeats=50):
+    """Inference cost of a fitted forest the way the API pays it.
+
+    Single rows are served by the flat forest and large batches by sklearn, so those
+    are the two paths timed here. Sizes are for the files that go into a bundle,
+    node values included.
+    """
+    if not sp.issparse(X_sample):
+        X_sample = np.asarray(X_sample, dtype=np.float32)
+    flat_forest = export_forest(model, node_values=True)
+    rows = [X_sample[i:i + 1] for i in np.arange(repeats) % X_sample.shape[0]]
+    single = _timings_ms(flat_forest.predict_proba, rows)
+
+    batch = X_sample[np.arange(batch_size) % X_sample.shape[0]]
+    batch_timings = _timings_ms(model.predict_proba, [batch] * max(3, repeats // 10))
+
+    flat_mb = sum(np.asarray(array).nbytes for array in (
+        flat_forest.feature, flat_forest.threshold, flat_forest.left, flat_forest.right,
+        flat_forest.roots, flat_forest.value_ptr, flat_forest.value_class, flat_forest.value_prob,
+        flat_forest.node_ptr, flat_forest.node_class, flat_forest.node_prob,
+    )) / (1024 * 1024)
+    return {
+        'single_row_p50_ms': float(np.percentile(single, 50)),
+        'single_row_p99_ms': float(np.percentile(single, 99)),
+        'batch_ms': float(np.median(batch_timings)),
+        'model_mb': serialized_size_mb(model),
+        'flat_forest_mb': flat_mb,
+        'node_count': int(sum(estimator.tree_.node_count for estimator in model.estimators_)),
+    }
+
+
+def evaluate_candidates(search, X_train, y_train, X_test, y_test, max_candidates=None,
+                        batch_size=1000, repeats=50, sample_weight=None):
+    """Refit the candidates of a fitted hyperparameter search and measure each one.
+
+    Candidates are taken in order of CV rank; max_candidates limits how many are
+    refit. Returns a DataFrame with one row per candidate; the refit models are not
+    kept, since holding every forest at once can take gigabytes.
+    """
+    results = search.cv_results_
+    order = np.argsort(results['rank_test_score'], kind='stable')
+    if max_candidates is not None:
+        order = order[:max_candidates]
+
+    X_sample = X_test if sp.issparse(X_test) else np.asarray(X_test, dtype=np.float32)
+    rows = []
+    for rank, index in enumerate(order, start=1):
+        params = results['params'][index]
+        logger.info("Measuring candidate %d/%d: %s", rank, len(order), params)
+        model = clone(search.estimator).set_params(**params)
+        model.fit(X_train, y_train, sample_weight=sample_weight)
+        row = {
+            'candidate': int(index),
+            'params': params,
+            'cv_accuracy': float(results['mean_test_score'][index]),
+            'test_accuracy': float(accuracy_score(y_test, model.predict(X_test))),
+        }
+        row.update(measure_model(model, X_sample, batch_size=batch_size, repeats=repeats))
+        row['size_mb'] = row['model_mb'] + row['flat_forest_mb']
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def within_budget(candidates, max_single_row_ms=None, max_batch_ms=None, max_size_mb=None):
+    """Boolean mask of the candidates that meet every budget that is set"""
+    mask = pd.Series(True, index=candidates.index)
+    if max_single_row_ms is not None:
+        mask &= candidates['single_row_p99_ms'] <= max_single_row_ms
+    if max_batch_ms is not None:
+        mask &= candidates['batch_ms'] <= max_batch_ms
+    if max_size_mb is not None:
+        mask &= candidates['size_mb'] <= max_size_mb
+    return mask
+
+
+def select_candidate(candidates, max_single_row_ms=None, max_batch_ms=None, max_size_mb=None):
+    """Most accurate candidate (by CV accuracy) within the budget.
+
+    When no candidate fits, the one with the fastest single-row latency is returned
+    so training still produces a model. Returns the selected row.
+    """
+    candidates = candidates.assign(within_budget=within_budget(
+        candidates, max_single_row_ms, max_batch_ms, max_size_mb))
+    eligible = candidates[candidates['within_budget']]
+    if eligible.empty:
+        logger.warning("No candidate fits the latency/size budget, using the fastest one")
+        return candidates.loc[candidates['single_row_p99_ms'].idxmin()]
+    # Ties on accuracy go to the cheaper model
+    eligible = eligible.sort_values(['cv_accuracy', 'single_row_p99_ms'], ascending=[False, True])
+    return eligible.iloc[0]
+
+
+def write_report(candidates, path, selected=None, **budget):
+    """Write accuracy, latency and size of every candidate to a CSV file"""
+    report = candidates.assign(
+        within_budget=within_budget(candidates, **budget),
+        selected=candidates['candidate'] == (selected['candidate'] if selected is not None else -1),
+    )
+    report = report.sort_values('cv_accuracy', ascending=False)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    report.to_csv(path, index=False, float_format='%.4f')
+    return report
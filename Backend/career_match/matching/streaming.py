@@ -0,0 +1,132 @@
+"""Out-of-core training for user CSVs too large to load into memory.
+
+The CSV is read in chunks twice. The first pass collects the skill, interest,
+education and career vocabularies, the class counts and the age statistics; the
+second fits an SGDClassifier with partial_fit one chunk at a time. Memory use is
+bounded by the chunk size, not the file size. The result is written as a normal
+model bundle, so the API serves it the same way as a forest.
+"""
+import itertools
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import LabelEncoder, MultiLabelBinarizer, StandardScaler
+
+from matching.bundle import hash_file, write_bundle
+from matching.cleaning import clean_user_frame
+
+
+def read_user_chunks(user_data_path, chunksize):
+    """Cleaned chunks of a Cleaned_Users-style CSV"""
+    for chunk in pd.read_csv(user_data_path, encoding='latin1', chunksize=chunksize):
+        chunk.columns = chunk.columns.str.strip().str.lower()
+        chunk = clean_user_frame(chunk)
+        if len(chunk):
+            yield chunk
+
+
+def scan_vocabulary(user_data_path, chunksize):
+    """First pass: fit the encoders and count users per career without holding the file.
+
+    Returns (encoders, class_counts, rows), with the encoders shaped like the ones
+    train.py fits on the whole file.
+    """
+    skills, interests, education = set(), set(), set()
+    careers = Counter()
+    scaler = StandardScaler()
+    rows = 0
+    for chunk in read_user_chunks(user_data_path, chunksize):
+        skills.update(itertools.chain.from_iterable(chunk['skills']))
+        interests.update(itertools.chain.from_iterable(chunk['interests']))
+        education.update(chunk['education'])
+        careers.update(chunk['recommended_career'])
+        scaler.partial_fit(chunk[['age']])
+        rows += len(chunk)
+
+    target_encoder = LabelEncoder().fit(sorted(careers))
+    encoders = {
+        'skills_encoder': MultiLabelBinarizer(classes=sorted(skills), sparse_output=True).fit([]),
+        'interests_encoder': MultiLabelBinarizer(classes=sorted(interests), sparse_output=True).fit([]),
+        'education_encoder': LabelEncoder().fit(sorted(education)),
+        'target_encoder': target_encoder,
+        'scaler': scaler,
+    }
+    class_counts = np.array([careers[career] for career in target_encoder.classes_])
+    return encoders, class_counts, rows
+
+
+def feature_names_for(encoders):
+    """Column order of encode_chunk, the same as train.py's feature matrix"""
+    return (['education_encoded']
+            + [str(name) for name in encoders['interests_encoder'].classes_]
+            + [str(name) for name in encoders['skills_encoder'].classes_])
+
+
+def encode_chunk(chunk, encoders):
+    """Sparse feature rows and encoded labels for one cleaned chunk"""
+    education = encoders['education_encoder'].transform(chunk['education'])
+    X = sp.hstack((
+        sp.csr_matrix(education.reshape(-1, 1)),
+        encoders['interests_encoder'].transform(chunk['interests']),
+        encoders['skills_encoder'].transform(chunk['skills']),
+    ), format='csr', dtype=np.float32)
+    y = encoders['target_encoder'].transform(chunk['recommended_career'])
+    return X, y
+
+
+def train_streaming(user_data_path, model_dir, chunksize=50000, epochs=1, alpha=1e-5, seed=42):
+    """Train a linear career model chunk by chunk and publish it as a bundle.
+
+    Classes are balanced with per-class sample weights equal to what oversampling
+    would give them. Accuracy is measured progressively: each chunk is scored by
+    the model before the model trains on it. Returns the new bundle version.
+    """
+    start = time.perf_counter()
+    print(f"Scanning {user_data_path} in chunks of {chunksize} rows...")
+    encoders, class_counts, rows = scan_vocabulary(user_data_path, chunksize)
+    feature_names = feature_names_for(encoders)
+    print(f"Found {rows} users, {len(feature_names)} features and {len(class_counts)} careers "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    class_weight = class_counts.max() / np.maximum(class_counts, 1)
+    classes = np.arange(len(class_counts))
+    model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=seed)
+    rng = np.random.default_rng(seed)
+
+    accuracy = None
+    for epoch in range(1, epochs + 1):
+        correct = scored = 0
+        for chunk in read_user_chunks(user_data_path, chunksize):
+            X, y = encode_chunk(chunk, encoders)
+            # Files are often sorted by career; shuffle within the chunk for SGD
+            order = rng.permutation(len(y))
+            X, y = X[order], y[order]
+            if hasattr(model, 'coef_'):
+                correct += int((model.predict(X) == y).sum())
+                scored += len(y)
+            model.partial_fit(X, y, classes=classes, sample_weight=class_weight[y])
+        if scored:
+            accuracy = correct / scored
+            print(f"Epoch {epoch}: progressive accuracy {accuracy:.2%} over {scored} users")
+
+    print("Saving model bundle...")
+    version = write_bundle(
+        model_dir,
+        model,
+        encoders=encoders,
+        feature_names=feature_names,
+        training_data_hash=hash_file(user_data_path),
+        extra={'streaming': {
+            'rows': rows,
+            'chunksize': chunksize,
+            'epochs': epochs,
+            'alpha': alpha,
+            'progressive_accuracy': accuracy,
+        }},
+    )
+    print(f"Published bundle {version} in {model_dir} after {time.perf_counter() - start:.1f}s")
+    return version
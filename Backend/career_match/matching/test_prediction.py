@@ -1,18 +1,17 @@
-import joblib
 import numpy as np
 import pandas as pd
 import os
+import sys
+
+# Make the matching package importable when this file is run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from matching.bundle import load_current_bundle
 
 def load_models(model_dir='model'):
-    """Load all the trained models and encoders"""
-    model = joblib.load(os.path.join(model_dir, "rf_model.pkl"))
-    skills_encoder = joblib.load(os.path.join(model_dir, "skills_encoder.pkl"))
-    interests_encoder = joblib.load(os.path.join(model_dir, "interests_encoder.pkl"))
-    education_encoder = joblib.load(os.path.join(model_dir, "education_encoder.pkl"))
-    target_encoder = joblib.load(os.path.join(model_dir, "target_encoder.pkl"))
-    feature_names = joblib.load(os.path.join(model_dir, "feature_names.pkl"))
-
-    return model, skills_encoder, interests_encoder, education_encoder, target_encoder, feature_names
+    """Load all the trained models and encoders from the current model bundle"""
+    bundle = load_current_bundle(model_dir)
+    return (bundle.model, bundle.skills_encoder, bundle.interests_encoder, bundle.education_encoder,
+            bundle.target_encoder, bundle.feature_names)
 
 
 def predict_career(age, education, skills, interests, top_n=3):
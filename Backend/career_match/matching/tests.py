@@ -0,0 +1,1053 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder, MultiLabelBinarizer
+
+from matching.batching import PredictionCoalescer
+from matching.bench_cleaning import (legacy_clean_education_column, legacy_clean_token_column,
+                                     make_users)
+from matching.bundle import (bundle_path, current_version, load_current_bundle, prune_bundles,
+                             verify_bundle, write_bundle)
+from matching.cache import PredictionCache, canonical_key, prewarm_cache
+from matching import catalog as catalog_module
+from matching.catalog import EMPTY_CATALOG, CareerCatalog, get_catalog, refresh_catalog
+from matching.cleaning import clean_education_column, clean_token_column
+from matching.encoding import FeatureEncoder
+from matching.explain import cached_explain, explain, explainable_forest, warm_explainer
+from matching.feature_cache import FeatureCache, stage_key
+from matching.forest import FlatForest, export_forest
+from matching.ingest import USER_PROFILE_DEFAULTS, USER_PROFILE_FIELD_MAP, ingest_user_profiles, prepare_chunk
+from matching.models import PredictionResult, UserProfile
+from matching.readiness import ReadinessMatrix
+from matching.registry import ModelRegistry
+from matching.refresh import FEEDBACK_FIELDS, feedback_frame, feedback_profiles, mark_trained, refresh_bundle
+from matching.retrieval import CandidateIndex, rank_shortlist
+from matching.scoring import score_profiles
+from matching.selection import select_candidate
+from matching.streaming import train_streaming
+from matching.tracing import NULL_TRACE, Trace, Tracer
+from matching.train import build_search
+from matching import typeahead as typeahead_module
+from matching.typeahead import PrefixTrie, get_typeahead
+from matching.uplift import find_class, skill_uplift
+from matching.weighting import balanced_weights, collapse_duplicates
+from matching.views import build_recommendations, parse_count
+from matching.writebehind import WriteBehindQueue
+
+
+def fit_encoders():
+    """Small encoders shaped like the ones train.py writes"""
+    skills_mlb = MultiLabelBinarizer()
+    skills_mlb.fit([["python", "design", "sql"], ["communication", "teamwork"]])
+    interests_mlb = MultiLabelBinarizer()
+    interests_mlb.fit([["technology", "design"], ["art", "music"]])
+    education_encoder = LabelEncoder()
+    education_encoder.fit(["bachelor's", "master's", "phd", "uacecertificate"])
+    feature_names = (['education_encoded']
+                     + interests_mlb.classes_.tolist()
+                     + skills_mlb.classes_.tolist())
+    return skills_mlb, interests_mlb, education_encoder, feature_names
+
+
+def write_test_bundle(model_dir, seed=1):
+    """Publish a small analyst/designer/developer bundle to model_dir and return its version"""
+    skills_mlb, interests_mlb, education_encoder, feature_names = fit_encoders()
+    rng = np.random.default_rng(seed)
+    X = (rng.random((200, len(feature_names))) < 0.3).astype(np.float32)
+    X[:, 0] = rng.integers(0, 4, 200)
+    y = (X[:, 1] + X[:, 0]).astype(int) % 3
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    encoders = {
+        'skills_encoder': skills_mlb,
+        'interests_encoder': interests_mlb,
+        'education_encoder': education_encoder,
+        'target_encoder': LabelEncoder().fit(["analyst", "designer", "developer"]),
+    }
+    return write_bundle(model_dir, forest, encoders, feature_names, training_data_hash="abc",
+                        flat_forest=export_forest(forest, node_values=True))
+
+
+def legacy_preprocess_input(user_input, skills_encoder, interests_encoder, education_encoder, feature_names):
+    """The DataFrame-based encoding FeatureEncoder replaced"""
+    education = user_input.get('education', "bachelor's")
+    skills = [skill.lower().strip() for skill in user_input.get('skills', [])]
+    interests = [interest.lower().strip() for interest in user_input.get('interests', [])]
+
+    skills_df = pd.DataFrame(columns=skills_encoder.classes_)
+    skills_df.loc[0] = 0
+    for skill in skills:
+        if skill in skills_encoder.classes_:
+            skills_df.loc[0, skill] = 1
+
+    interests_df = pd.DataFrame(columns=interests_encoder.classes_)
+    interests_df.loc[0] = 0
+    for interest in interests:
+        if interest in interests_encoder.classes_:
+            interests_df.loc[0, interest] = 1
+
+    education_value = education_encoder.transform([education.strip()])[0]
+    education_df = pd.DataFrame([[education_value]], columns=['education_encoded'])
+
+    X = pd.concat([skills_df.reset_index(drop=True),
+                   interests_df.reset_index(drop=True),
+                   education_df.reset_index(drop=True)], axis=1)
+    X = X.loc[:, ~X.columns.duplicated()]
+    return X.reindex(columns=feature_names, fill_value=0)
+
+
+class CleaningTestCase(SimpleTestCase):
+    def test_tokens_match_legacy_loop(self):
+        column = pd.Series([
+            "Python, SQL ,  data analysis", "python sql\tExcel", "  ", "", None, np.nan, 42,
+            ",,python,,", "Python, SQL ,  data analysis", ["  Java ", "", "SQL"], "a\u00a0b",
+        ])
+        self.assertEqual(clean_token_column(column), legacy_clean_token_column(column))
+        for column in (pd.Series([None, None]), pd.Series([], dtype=object), pd.Series([['A '], ['b']]),
+                       pd.Series([42, 7.5])):
+            self.assertEqual(clean_token_column(column), legacy_clean_token_column(column))
+
+    def test_synthetic_users_match_legacy(self):
+        users = make_users(2000, seed=3)
+        for name in ('skills', 'interests'):
+            self.assertEqual(clean_token_column(users[name]), legacy_clean_token_column(users[name]))
+        pd.testing.assert_series_equal(
+            clean_education_column(users.copy())['education'],
+            legacy_clean_education_column(users.copy())['education'],
+        )
+
+
+class FeatureEncoderTestCase(SimpleTestCase):
+    def setUp(self):
+        self.encoders = fit_encoders()
+        self.encoder = FeatureEncoder(*self.encoders)
+
+    def assertMatchesLegacy(self, user_input):
+        expected = legacy_preprocess_input(user_input, *self.encoders).to_numpy(dtype=np.float32)
+        np.testing.assert_array_equal(self.encoder.encode(user_input), expected)
+
+    def test_matches_legacy_encoding(self):
+        self.assertMatchesLegacy({
+            "education": "master's",
+            "skills": [" Python", "SQL", "teamwork"],
+            "interests": ["Technology", "music "],
+        })
+
+    def test_shared_token_uses_skill_column(self):
+        # 'design' is both a skill and an interest; only the skill side counts
+        self.assertMatchesLegacy({"education": "phd", "skills": [], "interests": ["design"]})
+        self.assertMatchesLegacy({"education": "phd", "skills": ["design"], "interests": []})
+
+    def test_unknown_tokens_are_ignored(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertMatchesLegacy({"skills": ["cooking", "zz"], "interests": ["gardening"]})
+        encoder = FeatureEncoder(*self.encoders, fuzzy_threshold=None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            np.testing.assert_array_equal(encoder.encode({"skills": ["python3"]}),
+                                          encoder.encode({"skills": []}))
+
+    def test_close_tokens_map_to_known_terms(self):
+        self.assertEqual(self.encoder.skill_normalizer.match("python3"), ("python", 0.8))
+        with contextlib.redirect_stdout(io.StringIO()):
+            np.testing.assert_array_equal(
+                self.encoder.encode({"skills": ["Python3", "team work"], "interests": ["musik"]}),
+                self.encoder.encode({"skills": ["python", "teamwork"], "interests": []}),
+            )
+        mapped = self.encoder.normalized_tokens({"skills": ["python3", "sql"], "interests": ["technolgy"]})
+        self.assertEqual(mapped['skills'], [{'input': 'python3', 'match': 'python', 'score': 0.8}])
+        self.assertEqual([entry['match'] for entry in mapped['interests']], ['technology'])
+
+    def test_unknown_education_raises(self):
+        with self.assertRaises(ValueError):
+            self.encoder.encode({"education": "diploma", "skills": ["python"]})
+
+    def test_encode_many_reports_errors_per_profile(self):
+        profiles = [
+            {"education": "phd", "skills": ["python"]},
+            {"education": "diploma"},
+            "not a profile",
+            {"education": "master's", "interests": ["art"]},
+        ]
+        X, rows, errors = self.encoder.encode_many(profiles)
+        self.assertEqual(rows, [0, 3])
+        self.assertEqual(sorted(errors), [1, 2])
+        self.assertTrue(sp.isspmatrix_csr(X))
+        np.testing.assert_array_equal(X[0].toarray()[0], self.encoder.encode(profiles[0])[0])
+        np.testing.assert_array_equal(X[1].toarray()[0], self.encoder.encode(profiles[3])[0])
+
+
+class FlatForestTestCase(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # Binary skill/interest columns plus an integer education column, like train.py
+        self.X = (rng.random((400, 30)) < 0.2).astype(np.float32)
+        self.X[:, 0] = rng.integers(0, 5, 400)
+        y = (self.X[:, 1] + 2 * self.X[:, 2] + self.X[:, 0]).astype(int) % 6
+        self.forest = RandomForestClassifier(n_estimators=25, random_state=0).fit(self.X, y)
+
+    def test_matches_sklearn_probabilities(self):
+        flat = export_forest(self.forest)
+        np.testing.assert_allclose(flat.predict_proba(self.X), self.forest.predict_proba(self.X), atol=1e-6)
+        np.testing.assert_allclose(flat.predict_proba(self.X[:1]), self.forest.predict_proba(self.X[:1]), atol=1e-6)
+
+    def test_sparse_input(self):
+        flat = export_forest(self.forest)
+        X = sp.csr_matrix(self.X)
+        np.testing.assert_allclose(flat.predict_proba(X[:3]), self.forest.predict_proba(self.X[:3]), atol=1e-6)
+        np.testing.assert_allclose(self.forest.predict_proba(X), self.forest.predict_proba(self.X), atol=1e-6)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rf_flat.npz")
+            export_forest(self.forest).save(path)
+            flat = FlatForest.load(path)
+        self.assertEqual(flat.n_features, 30)
+        np.testing.assert_array_equal(flat.classes_, self.forest.classes_)
+        np.testing.assert_allclose(flat.predict_proba(self.X), self.forest.predict_proba(self.X), atol=1e-6)
+
+    def test_contributions_add_up_to_probabilities(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rf_flat.npz")
+            export_forest(self.forest, node_values=True).save(path)
+            flat = FlatForest.load(path)
+        self.assertTrue(flat.has_node_values)
+        classes = [0, 3, 5]
+        bias, contributions = flat.contributions(self.X[:20], classes)
+        self.assertEqual(contributions.shape, (20, 3, 30))
+        np.testing.assert_allclose(bias + contributions.sum(axis=2),
+                                   self.forest.predict_proba(self.X[:20])[:, classes], atol=1e-6)
+
+
+class ModelBundleTestCase(SimpleTestCase):
+    def setUp(self):
+        skills_mlb, interests_mlb, education_encoder, feature_names = fit_encoders()
+        rng = np.random.default_rng(1)
+        X = (rng.random((200, len(feature_names))) < 0.3).astype(np.float32)
+        X[:, 0] = rng.integers(0, 4, 200)
+        target_encoder = LabelEncoder().fit(["analyst", "designer", "developer"])
+        y = (X[:, 1] + X[:, 0]).astype(int) % 3
+        self.X = X
+        self.forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+        self.encoders = {
+            'skills_encoder': skills_mlb,
+            'interests_encoder': interests_mlb,
+            'education_encoder': education_encoder,
+            'target_encoder': target_encoder,
+        }
+        self.feature_names = feature_names
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self):
+        return write_bundle(self.tmp.name, self.forest, self.encoders, self.feature_names,
+                            training_data_hash="abc", flat_forest=export_forest(self.forest))
+
+    def test_write_and_load(self):
+        version = self.write()
+        self.assertEqual(current_version(self.tmp.name), version)
+        self.assertEqual(verify_bundle(bundle_path(self.tmp.name, version)), [])
+
+        bundle = load_current_bundle(self.tmp.name, verify=True)
+        self.assertEqual(bundle.version, version)
+        self.assertEqual(bundle.manifest['training_data_hash'], "abc")
+        self.assertEqual(bundle.manifest['class_count'], 3)
+        self.assertIsInstance(bundle.flat_forest.threshold, np.memmap)
+        np.testing.assert_allclose(bundle.predict_proba(self.X[:5]), self.forest.predict_proba(self.X[:5]), atol=1e-6)
+        # Large batches go through the sklearn model, loaded on demand
+        np.testing.assert_allclose(bundle.predict_proba(self.X), self.forest.predict_proba(self.X), atol=1e-6)
+
+    def test_refresh_grows_forest(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        # Only two of the three careers appear in the feedback
+        profiles = [(i, "PhD", "python, sql", "art", 30, "developer" if i % 2 else "analyst") for i in range(1, 11)]
+        profiles.append((11, "PhD", "python", "", 30, "astronaut"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            version = refresh_bundle(self.tmp.name, bundle, feedback_frame(profiles), watermark=11, trees=5)
+            refreshed = load_current_bundle(self.tmp.name)
+
+        self.assertEqual(refreshed.version, version)
+        self.assertEqual(refreshed.manifest['user_profile_watermark'], 11)
+        self.assertEqual(refreshed.manifest['refresh']['rows'], 10)
+        self.assertEqual(len(refreshed.model.estimators_), 15)
+        self.assertEqual(refreshed.model.class_weight, self.forest.class_weight)
+        np.testing.assert_allclose(refreshed.flat_forest.predict_proba(self.X[:5]),
+                                   refreshed.model.predict_proba(self.X[:5]), atol=1e-6)
+
+    def test_score_profiles_in_worker_pool(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        profiles = [(i, "PhD", "python, sql", "design") for i in range(1, 8)]
+        profiles.append((8, "Astronaut School", "python", "art"))
+        local, pooled = [], []
+        score_profiles(profiles, bundle, self.tmp.name, local.extend, chunksize=3, log=lambda message: None)
+        stats = score_profiles(profiles, bundle, self.tmp.name, pooled.extend, chunksize=3, workers=2,
+                               log=lambda message: None)
+
+        self.assertEqual(pooled, local)
+        self.assertEqual([user_id for user_id, _, _ in pooled], list(range(1, 8)))
+        self.assertEqual((stats['scored'], stats['skipped']), (7, 1))
+
+    def test_skill_uplift_matches_separate_predictions(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        profile = {"education": "phd", "skills": ["python"], "interests": ["art"]}
+        class_index = find_class(bundle, "Designer")
+        base, ranked, candidates = skill_uplift(bundle, profile, class_index, max_candidates=3, top_n=10)
+
+        self.assertLessEqual(candidates, 3)
+        self.assertAlmostEqual(base, bundle.predict_proba(bundle.encoder.encode(profile))[0, class_index], places=6)
+        for entry in ranked:
+            self.assertNotEqual(entry['skill'], 'python')
+            X = bundle.encoder.encode({**profile, "skills": ["python", entry['skill']]})
+            self.assertAlmostEqual(entry['probability'], bundle.predict_proba(X)[0, class_index], places=4)
+            self.assertGreater(entry['gain'], 0)
+        self.assertEqual([entry['gain'] for entry in ranked], sorted((entry['gain'] for entry in ranked), reverse=True))
+
+    def test_skill_uplift_finds_skills_that_matter_only_for_the_target(self):
+        # python decides most labels, so it dominates overall importance, but only
+        # sql leads to "developer"
+        rng = np.random.default_rng(2)
+        X = np.zeros((400, len(self.feature_names)), dtype=np.float32)
+        X[:, 0] = 2
+        python, sql = (self.feature_names.index(skill) for skill in ("python", "sql"))
+        X[:, python] = rng.random(400) < 0.5
+        X[:, sql] = rng.random(400) < 0.1
+        y = np.where(X[:, python] == 1, 1, np.where(X[:, sql] == 1, 2, 0))
+        self.forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+        self.assertGreater(self.forest.feature_importances_[python], self.forest.feature_importances_[sql])
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        warm_explainer(bundle)
+
+        profile = {"education": "phd", "skills": [], "interests": []}
+        _, ranked, candidates = skill_uplift(bundle, profile, find_class(bundle, "developer"), max_candidates=1)
+        self.assertEqual(candidates, 1)
+        self.assertEqual([entry['skill'] for entry in ranked], ['sql'])
+
+    def test_skill_uplift_doesnt_extract_node_values(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        profile = {"education": "phd", "skills": ["python"], "interests": ["art"]}
+        _, ranked, candidates = skill_uplift(bundle, profile, find_class(bundle, "Designer"), max_candidates=2)
+
+        self.assertEqual(candidates, 2)
+        self.assertIsNone(explainable_forest(bundle, build=False))
+        self.assertIsNone(bundle._model)
+        # Split counts pick the candidates
+        counts = bundle.flat_forest.split_counts()
+        np.testing.assert_array_equal(counts, np.bincount(
+            np.concatenate([tree.tree_.feature[tree.tree_.feature >= 0] for tree in self.forest.estimators_]),
+            minlength=len(self.feature_names)))
+
+    def test_two_stage_ranks_only_the_shortlist(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        catalog = CareerCatalog.from_records([
+            {'career_name': 'Analyst', 'required_skills': 'sql, communication'},
+            {'career_name': 'Developer', 'required_skills': 'python, teamwork'},
+        ])
+        index = CandidateIndex(bundle, ReadinessMatrix(catalog))
+        user_input = {"education": "phd", "skills": ["Python", "teamwork"], "interests": []}
+        # "designer" has no catalog entry, so it is always a candidate
+        shortlist = index.shortlist(user_input, size=1)
+        self.assertEqual(sorted(bundle.target_encoder.classes_[shortlist]), ['designer', 'developer'])
+
+        X = bundle.encoder.encode(user_input)
+        probabilities = rank_shortlist(bundle, X, shortlist)
+        np.testing.assert_allclose(probabilities[shortlist], self.forest.predict_proba(X)[0, shortlist], atol=1e-6)
+        self.assertEqual(probabilities[bundle.target_encoder.transform(['analyst'])[0]], 0)
+
+    def test_explanation_lists_each_matching_skill_once(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        data = {"education": "phd", "skills": ["Python", "python3", "sql"], "interests": ["art"]}
+        probabilities = bundle.predict_proba(bundle.encoder.encode(data))[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            recommendations = build_recommendations(probabilities, data, bundle, CareerCatalog([]), top_n=1)
+        self.assertEqual(recommendations[0]['explanation']['skills'], ['python', 'sql'])
+
+    def test_explain_sums_a_token_over_its_columns(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        # "design" is both a skill and an interest, so it fills two columns
+        row = bundle.encoder.encode({"education": "phd", "skills": ["design"], "interests": ["design"]})[0]
+        classes = [0, 1, 2]
+        explanations = explain(bundle, row, classes, top_k=30)
+        _, contributions = export_forest(self.forest, node_values=True).contributions(row.reshape(1, -1), classes)
+        columns = bundle.encoder.skill_columns['design'].tolist()
+        self.assertEqual(len(columns), 2)
+        for position, explanation in enumerate(explanations):
+            features = [(entry['kind'], entry['feature']) for entry in explanation['contributions']]
+            self.assertEqual(len(features), len(set(features)))
+            design = [entry for entry in explanation['contributions'] if entry['feature'] == 'design']
+            if design:
+                self.assertAlmostEqual(design[0]['contribution'],
+                                       float(contributions[0, position, columns].sum()), places=4)
+
+    def test_only_warmed_bundles_are_explained_on_the_request_path(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        data = {"education": "phd", "skills": ["python", "sql"], "interests": ["art"]}
+        self.assertIsNone(cached_explain(bundle, data, canonical_key(data), [0]))
+
+        warm_explainer(bundle)
+        probabilities = bundle.predict_proba(bundle.encoder.encode(data))[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            recommendations = build_recommendations(probabilities, data, bundle, CareerCatalog([]), top_n=3,
+                                                    cache_key=canonical_key(data))
+        self.assertIn('contributions', recommendations[0]['explanation'])
+        self.assertNotIn('contributions', recommendations[1]['explanation'])
+
+    def test_trace_records_every_stage(self):
+        self.write()
+        bundle = load_current_bundle(self.tmp.name)
+        warm_explainer(bundle)
+        data = {"education": "phd", "skills": ["python", "sql"], "interests": ["art"]}
+        probabilities = bundle.predict_proba(bundle.encoder.encode(data))[0]
+        trace = Trace('test')
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_recommendations(probabilities, data, bundle, CareerCatalog([]), top_n=3, trace=trace,
+                                  cache_key=canonical_key(data))
+        spans = trace.as_dict()['spans']
+        self.assertEqual(set(spans), {'catalog_lookup', 'match_tokens', 'explain', 'build_response'})
+        self.assertAlmostEqual(sum(spans.values()), sum(ms for _, ms in trace.spans), places=2)
+
+        trace = Trace('test')
+        for _ in range(2):
+            with trace.span('inference'):
+                time.sleep(0.001)
+        self.assertEqual(list(trace.as_dict()['spans']), ['inference'])
+        self.assertGreaterEqual(trace.as_dict()['spans']['inference'], 2)
+
+    def test_verify_detects_modified_files(self):
+        version = self.write()
+        path = os.path.join(bundle_path(self.tmp.name, version), "forest", "threshold.npy")
+        with open(path, 'r+b') as f:
+            f.seek(-4, os.SEEK_END)
+            f.write(b"\x00\x00\x80\x7f")
+        with self.assertRaises(ValueError):
+            load_current_bundle(self.tmp.name, verify=True)
+
+    def test_prune_keeps_current(self):
+        versions = [self.write() for _ in range(3)]
+        removed = prune_bundles(self.tmp.name, keep=1)
+        self.assertEqual(removed, versions[:2])
+        self.assertEqual(current_version(self.tmp.name), versions[2])
+
+
+class ModelRegistryTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.first = write_test_bundle(self.tmp.name)
+        # poll_interval 0: no watcher thread, the test polls by hand
+        self.registry = ModelRegistry(self.tmp.name, poll_interval=0)
+        self.loaded = []
+        self.registry.on_load(lambda bundle: self.loaded.append(bundle.version))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.registry.get()
+
+    def poll(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.registry.reload_if_changed()
+
+    def test_swaps_after_two_matching_polls(self):
+        self.assertEqual(self.loaded, [self.first])
+        self.assertFalse(self.poll())
+
+        second = write_test_bundle(self.tmp.name, seed=2)
+        self.assertFalse(self.poll())
+        self.assertEqual(self.registry.get().version, self.first)
+        self.assertTrue(self.poll())
+        self.assertEqual(self.registry.get().version, second)
+        self.assertEqual(self.loaded, [self.first, second])
+        self.assertFalse(self.poll())
+
+    def test_signature_changing_between_polls_restarts_the_wait(self):
+        write_test_bundle(self.tmp.name, seed=2)
+        self.assertFalse(self.poll())
+        third = write_test_bundle(self.tmp.name, seed=3)
+        self.assertFalse(self.poll())
+        self.assertEqual(self.registry.get().version, self.first)
+        self.assertTrue(self.poll())
+        self.assertEqual(self.registry.get().version, third)
+
+    def test_failing_listener_doesnt_block_the_swap(self):
+        def fail(bundle):
+            raise ValueError("broken listener")
+        self.registry.on_load(fail)
+        second = write_test_bundle(self.tmp.name, seed=2)
+        self.poll()
+        self.assertTrue(self.poll())
+        self.assertEqual(self.registry.get().version, second)
+
+
+class StreamingTrainingTestCase(SimpleTestCase):
+    def test_streamed_bundle_serves_predictions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "users.csv")
+            make_users(500, seed=1).to_csv(path, index=False)
+            with contextlib.redirect_stdout(io.StringIO()):
+                train_streaming(path, tmp, chunksize=100, epochs=2)
+                bundle = load_current_bundle(tmp)
+
+            self.assertIsNone(bundle.flat_forest)
+            self.assertEqual(bundle.manifest['model_class'], 'SGDClassifier')
+            X = bundle.encoder.encode({"education": "phd", "skills": ["python", "sql"], "interests": ["art"]})
+            probabilities = bundle.predict_proba(X)
+            self.assertEqual(probabilities.shape, (1, len(bundle.target_encoder.classes_)))
+            self.assertAlmostEqual(probabilities.sum(), 1, places=5)
+
+
+class SelectCandidateTestCase(SimpleTestCase):
+    def setUp(self):
+        self.candidates = pd.DataFrame([
+            {'candidate': 0, 'cv_accuracy': 0.70, 'single_row_p99_ms': 9.0, 'batch_ms': 80.0, 'size_mb': 500.0},
+            {'candidate': 1, 'cv_accuracy': 0.68, 'single_row_p99_ms': 3.0, 'batch_ms': 40.0, 'size_mb': 90.0},
+            {'candidate': 2, 'cv_accuracy': 0.68, 'single_row_p99_ms': 2.0, 'batch_ms': 30.0, 'size_mb': 60.0},
+            {'candidate': 3, 'cv_accuracy': 0.60, 'single_row_p99_ms': 1.0, 'batch_ms': 20.0, 'size_mb': 20.0},
+        ])
+
+    def test_most_accurate_without_budget(self):
+        self.assertEqual(select_candidate(self.candidates)['candidate'], 0)
+
+    def test_most_accurate_within_budget_prefers_cheaper_on_ties(self):
+        self.assertEqual(select_candidate(self.candidates, max_single_row_ms=5)['candidate'], 2)
+        self.assertEqual(select_candidate(self.candidates, max_size_mb=50)['candidate'], 3)
+
+    def test_falls_back_to_fastest(self):
+        with self.assertLogs('matching.selection', 'WARNING'):
+            self.assertEqual(select_candidate(self.candidates, max_single_row_ms=0.5)['candidate'], 3)
+
+
+class FeatureCacheTestCase(SimpleTestCase):
+    def test_builds_once_per_key(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return {'X': np.arange(3)}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = FeatureCache(tmp)
+            key = stage_key("csv-hash", "code-version")
+            first = cache.get_or_build('features', key, build)
+            with self.assertLogs('matching.feature_cache', 'INFO'):
+                second = cache.get_or_build('features', key, build)
+            cache.get_or_build('features', stage_key("other-hash", "code-version"), build)
+            self.assertEqual(len(calls), 2)
+            np.testing.assert_array_equal(first['X'], second['X'])
+
+            removed = cache.prune(keep={os.path.basename(cache.path('features', key))})
+            self.assertEqual(len(removed), 1)
+
+
+class HalvingSearchTestCase(SimpleTestCase):
+    def test_trees_grow_as_candidates_are_dropped(self):
+        rng = np.random.default_rng(0)
+        X = rng.random((90, 6))
+        y = (X[:, 0] * 3).astype(int)
+        search = build_search('halving', n_iter=9, cv_folds=2).set_params(n_jobs=1, verbose=0)
+        search.fit(X, y)
+
+        self.assertEqual(search.n_resources_, [10, 30, 90])
+        self.assertEqual(search.n_candidates_, [9, 3, 1])
+        self.assertNotIn('n_estimators', search.param_distributions)
+        self.assertEqual(search.best_params_['n_estimators'], 90)
+
+
+class WeightingTestCase(SimpleTestCase):
+    def test_collapse_and_weights_match_oversampling(self):
+        X = sp.csr_matrix(np.array([
+            [1, 0, 1], [1, 0, 1], [1, 0, 1], [0, 1, 0], [1, 0, 1], [0, 0, 2],
+        ], dtype=np.float32))
+        y = np.array([0, 0, 0, 0, 1, 1])
+        X_unique, y_unique, counts = collapse_duplicates(X, y)
+
+        np.testing.assert_array_equal(X_unique.toarray(), [[1, 0, 1], [0, 1, 0], [1, 0, 1], [0, 0, 2]])
+        np.testing.assert_array_equal(y_unique, [0, 0, 1, 1])
+        np.testing.assert_array_equal(counts, [3, 1, 1, 1])
+        # Oversampling would bring class 1 up to 4 rows, i.e. each of its rows twice
+        np.testing.assert_allclose(balanced_weights(y_unique, counts), [3, 1, 2, 2])
+
+
+class IngestTestCase(SimpleTestCase):
+    def test_prepare_chunk_converts_and_fills_defaults(self):
+        chunk = pd.DataFrame({
+            'Name': [' Ada ', 'Bob'],
+            'Age': ['31', 'unknown'],
+            'Education': ["Bachelor's", None],
+            'Skills': ['python, sql', 'drawing'],
+            'Interests': ['Data', 'x' * 300],
+            'Recommended_Career': ['Data Scientist', 'y' * 300],
+        })
+        rows = prepare_chunk(chunk, UserProfile, USER_PROFILE_FIELD_MAP, USER_PROFILE_DEFAULTS)
+        self.assertEqual(rows[0]['name'], 'Ada')
+        self.assertEqual(rows[0]['age'], 31)
+        self.assertEqual(rows[0]['actual_career'], 'Data Scientist')
+        self.assertEqual(rows[0]['gender'], '')
+        self.assertEqual(rows[0]['experience'], 0.0)
+        self.assertEqual(rows[1]['age'], 0)
+        self.assertEqual(rows[1]['education_level'], '')
+        self.assertEqual(rows[0]['career_preference'], '')
+        self.assertEqual(len(rows[1]['interests']), 300)
+        self.assertEqual(len(rows[1]['actual_career']), 100)
+
+
+@unittest.skipIf(connection.settings_dict['ENGINE'] == 'django.db.backends.dummy', "needs a configured database")
+class IngestDatabaseTestCase(TestCase):
+    def test_loading_the_same_file_twice_changes_nothing(self):
+        users = pd.DataFrame({
+            'Name': ['Ada', 'Bob', 'Ada'],
+            'Age': [31, 40, 31],
+            'Education': ["Bachelor's", "Master's", "Bachelor's"],
+            'Skills': ['python, sql', 'drawing', 'python, sql'],
+            'Interests': ['data, ' + 'x' * 150, 'art', 'data'],
+            'Recommended_Career': ['Data Scientist', 'Artist', 'Data Scientist'],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "users.csv")
+            users.to_csv(path, index=False)
+            first = ingest_user_profiles(path, chunksize=2, log=lambda message: None)
+            loaded_at = UserProfile.objects.get(name='Bob').updated_at
+            second = ingest_user_profiles(path, chunksize=2, log=lambda message: None)
+            self.assertEqual(UserProfile.objects.get(name='Bob').updated_at, loaded_at)
+            users.loc[1, 'Interests'] = 'art, music'
+            users.to_csv(path, index=False)
+            third = ingest_user_profiles(path, chunksize=2, log=lambda message: None)
+
+        self.assertEqual((first['created'], first['updated'], first['skipped']), (2, 0, 1))
+        self.assertEqual((second['created'], second['updated']), (0, 0))
+        self.assertEqual((third['created'], third['updated']), (0, 1))
+        self.assertEqual(UserProfile.objects.count(), 2)
+        self.assertEqual(UserProfile.objects.get(name='Ada').interests, 'data, ' + 'x' * 150)
+        self.assertEqual(UserProfile.objects.get(name='Bob').interests, 'art, music')
+        # Updated rows count as changed for score_profiles
+        self.assertGreater(UserProfile.objects.get(name='Bob').updated_at, loaded_at)
+
+    def test_reloading_keeps_fields_the_csv_lacks(self):
+        users = pd.DataFrame({
+            'Name': ['Ada'], 'Age': [31], 'Education': ["Bachelor's"], 'Skills': ['python, sql'],
+            'Interests': ['data'], 'Recommended_Career': ['Data Scientist'],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "users.csv")
+            users.to_csv(path, index=False)
+            call_command('load_users', path, stdout=io.StringIO())
+            profile = UserProfile.objects.get(name='Ada')
+            self.assertEqual((profile.gender, profile.experience, profile.career_preference), ('', 0.0, ''))
+            UserProfile.objects.filter(id=profile.id).update(gender='F', experience=4.5, career_preference='Research')
+
+            users.loc[0, 'Interests'] = 'data, ai'
+            users.to_csv(path, index=False)
+            call_command('load_users', path, stdout=io.StringIO())
+
+        profile = UserProfile.objects.get(name='Ada')
+        self.assertEqual((profile.gender, profile.experience, profile.career_preference), ('F', 4.5, 'Research'))
+        self.assertEqual(profile.interests, 'data, ai')
+
+
+@unittest.skipIf(connection.settings_dict['ENGINE'] == 'django.db.backends.dummy', "needs a configured database")
+class FeedbackProfilesTestCase(TestCase):
+    def test_trained_profiles_come_back_only_when_relabeled(self):
+        def profile(name, career):
+            return UserProfile.objects.create(name=name, age=30, gender='', education_level='PhD', experience=0,
+                                              career_preference='', skills='python', interests='art',
+                                              actual_career=career)
+        old, unlabeled, new = profile('a', 'analyst'), profile('b', None), profile('c', 'developer')
+
+        def selected():
+            return sorted(row[0] for row in feedback_profiles().values_list(*FEEDBACK_FIELDS))
+
+        self.assertEqual(selected(), [old.id, new.id])
+        mark_trained(feedback_profiles().values_list(*FEEDBACK_FIELDS))
+        self.assertEqual(selected(), [])
+
+        unlabeled.actual_career = 'designer'
+        unlabeled.save()
+        old.actual_career = 'developer'
+        old.save()
+        self.assertEqual(selected(), [old.id, unlabeled.id])
+
+    def test_refresh_after_loading_the_training_csv_selects_nothing(self):
+        users = pd.DataFrame({
+            'Name': ['Ada', 'Bob'],
+            'Age': [31, 40],
+            'Education': ["PhD", "PhD"],
+            'Skills': ['python, sql', 'design'],
+            'Interests': ['technology', 'art'],
+            'Recommended_Career': ['developer', 'designer'],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "users.csv")
+            users.to_csv(path, index=False)
+            write_test_bundle(tmp)
+            out = io.StringIO()
+            with override_settings(CAREER_MODEL_DIR=tmp):
+                call_command('load_users', path, stdout=io.StringIO())
+                call_command('refresh_model', '--dry-run', stdout=out)
+            self.assertIn(": 0 new or relabeled profiles", out.getvalue())
+            self.assertFalse(feedback_profiles().exists())
+
+            # The same file loaded as feedback is trained on
+            call_command('load_users', path, '--feedback', stdout=io.StringIO())
+            self.assertFalse(feedback_profiles().exists())
+            UserProfile.objects.all().delete()
+            call_command('load_users', path, '--feedback', stdout=io.StringIO())
+            self.assertEqual(feedback_profiles().count(), 2)
+
+
+@unittest.skipIf(connection.settings_dict['ENGINE'] == 'django.db.backends.dummy', "needs a configured database")
+class ScoreProfilesCommandTestCase(TestCase):
+    def test_reruns_select_only_new_or_edited_profiles(self):
+        def profile(name, education):
+            return UserProfile.objects.create(name=name, age=30, gender='', education_level=education, experience=0,
+                                              career_preference='', skills='python', interests='art')
+        profile('a', 'PhD')
+        profile('b', 'PhD')
+        unscorable = profile('c', 'Astronaut School')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            write_test_bundle(tmp)
+
+            def run():
+                out = io.StringIO()
+                with override_settings(CAREER_MODEL_DIR=tmp):
+                    call_command('score_profiles', stdout=out)
+                return out.getvalue()
+
+            self.assertIn("Stored 2 predictions, skipped 1 profiles", run())
+            self.assertIn("Stored 0 predictions, skipped 0 profiles", run())
+
+            unscorable.education_level = 'PhD'
+            unscorable.save()
+            self.assertIn("Stored 1 predictions, skipped 0 profiles", run())
+
+        self.assertEqual(PredictionResult.objects.filter(user=unscorable, confidence_score__isnull=True).count(), 1)
+        self.assertEqual(PredictionResult.objects.filter(confidence_score__isnull=False).count(), 3)
+
+
+class PrefixTrieTestCase(SimpleTestCase):
+    def test_completions_ranked_by_score_from_any_word(self):
+        trie = PrefixTrie({'machine learning': 5, 'deep learning': 9, 'marketing': 2, 'math': 2}, max_results=3)
+        self.assertEqual(trie.complete('ma'), ['machine learning', 'marketing', 'math'])
+        self.assertEqual(trie.complete('learn'), ['deep learning', 'machine learning'])
+        self.assertEqual(trie.complete('', limit=2), ['deep learning', 'machine learning'])
+        self.assertEqual(trie.complete('x'), [])
+
+
+class ServedBundleTestCase(SimpleTestCase):
+    """Serves a small bundle and a career_data.csv through the views' registry and catalog"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        write_test_bundle(self.tmp.name)
+        self.registry = ModelRegistry(self.tmp.name, poll_interval=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.bundle = self.registry.get()
+        for target in ('matching.registry.registry', 'matching.views.registry'):
+            patcher = mock.patch(target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.path = os.path.join(self.tmp.name, "career_data.csv")
+        self.write_catalog({'Developer': 'python, sql', 'Designer': 'design'})
+        settings = override_settings(CAREER_CATALOG_SOURCE='csv', CAREER_DATA_PATH=self.path,
+                                     CAREER_CATALOG_REFRESH_INTERVAL=0, CAREER_USER_DATA_PATH=None)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for module, name in ((catalog_module, '_catalog'), (typeahead_module, '_typeahead')):
+            self.addCleanup(setattr, module, name, getattr(module, name))
+            setattr(module, name, None)
+
+    def write_catalog(self, careers):
+        pd.DataFrame({'career_name': list(careers), 'required_skills': list(careers.values())}).to_csv(
+            self.path, index=False)
+
+
+class TypeaheadViewTestCase(ServedBundleTestCase):
+    def test_completions(self):
+        response = self.client.get('/typeahead/', {'q': 'Py', 'kind': 'skills'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['skills'][0], {'term': 'python', 'count': 0, 'inModel': True})
+        self.assertNotIn('interests', response.json())
+        self.assertIn('interests', self.client.get('/typeahead/', {'q': 'a'}).json())
+        self.assertEqual(self.client.get('/typeahead/', {'q': 'a', 'kind': 'jobs'}).status_code, 400)
+        self.assertEqual(self.client.get('/typeahead/', {'q': 'a', 'limit': 'x'}).status_code, 400)
+
+    def test_catalog_change_is_rebuilt_off_the_request_path(self):
+        self.assertEqual(self.client.get('/typeahead/', {'q': 'kub'}).json()['skills'], [])
+        served = typeahead_module._typeahead
+
+        self.write_catalog({'Developer': 'python, sql', 'Designer': 'design', 'Platform Engineer': 'kubernetes'})
+        # A request between the change and the refresh keeps the old typeahead
+        with mock.patch('matching.typeahead.Typeahead', side_effect=AssertionError("rebuilt in a request")):
+            self.assertIs(get_typeahead(self.bundle, CareerCatalog([])), served)
+        refresh_catalog()
+
+        self.assertIsNot(typeahead_module._typeahead, served)
+        self.assertEqual(self.client.get('/typeahead/', {'q': 'kub'}).json()['skills'],
+                         [{'term': 'kubernetes', 'count': 0, 'inModel': False}])
+
+
+class BatchViewTestCase(ServedBundleTestCase):
+    def post(self, body):
+        return self.client.post('/predict/batch/', json.dumps(body), content_type='application/json')
+
+    def test_results_keep_order_and_report_rows_that_fail(self):
+        profiles = [
+            {"education": "phd", "skills": ["python"], "interests": ["art"]},
+            {"education": "astronaut school", "skills": ["python"]},
+            {"education": "bachelor's", "skills": ["design"], "interests": ["music"]},
+        ]
+        response = self.post({"profiles": profiles, "top_n": 2})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 3)
+        self.assertIn("astronaut school", results[1]['error'])
+        for index in (0, 2):
+            X = self.bundle.encoder.encode(profiles[index])
+            best = self.bundle.target_encoder.classes_[np.argmax(self.bundle.predict_proba(X)[0])]
+            self.assertEqual(len(results[index]['recommendations']), 2)
+            self.assertEqual(results[index]['recommendations'][0]['title'], best)
+
+    def test_validation(self):
+        self.assertEqual(self.client.get('/predict/batch/').status_code, 405)
+        self.assertEqual(self.post({"profiles": {"skills": []}}).status_code, 400)
+        for top_n in (0, 4, "two"):
+            self.assertEqual(self.post({"profiles": [], "top_n": top_n}).status_code, 400)
+        with override_settings(CAREER_BATCH_MAX_PROFILES=2):
+            response = self.post({"profiles": [{"skills": []}] * 3})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "At most 2 profiles per batch")
+        self.assertEqual(self.post({"profiles": []}).json(), {'results': []})
+
+
+class CatalogRefreshTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "career_data.csv")
+        previous = catalog_module._catalog
+        self.addCleanup(setattr, catalog_module, '_catalog', previous)
+        catalog_module._catalog = None
+
+    def write(self, *names):
+        pd.DataFrame({'career_name': names, 'required_skills': ['python'] * len(names)}).to_csv(self.path, index=False)
+
+    def test_failed_build_is_retried_and_unchanged_catalog_kept(self):
+        with override_settings(CAREER_CATALOG_SOURCE='csv', CAREER_DATA_PATH=self.path,
+                               CAREER_CATALOG_REFRESH_INTERVAL=0):
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertIs(get_catalog(), EMPTY_CATALOG)
+            self.write("Analyst")
+            catalog = get_catalog()
+            self.assertIn("analyst", catalog)
+            self.assertIs(refresh_catalog(), catalog)
+            self.write("Analyst", "Developer")
+            self.assertIn("developer", refresh_catalog())
+
+
+class TracerTestCase(SimpleTestCase):
+    def finish(self, tracer, timings):
+        for ms in timings:
+            trace = Trace('predict_career')
+            trace.spans.append(('inference', ms))
+            tracer.finish(trace)
+
+    def test_sampling(self):
+        self.assertIs(Tracer(sample_rate=0).start('predict_career'), NULL_TRACE)
+        self.assertIsInstance(Tracer(sample_rate=1).start('predict_career'), Trace)
+
+        unsampled = Tracer(sample_rate=0)
+        unsampled.finish(unsampled.start('predict_career'))
+        self.assertEqual(unsampled.recent(), [])
+
+    def test_ring_buffer_keeps_the_latest_traces(self):
+        bounded = Tracer(sample_rate=1, buffer_size=3)
+        self.finish(bounded, [1, 2, 3, 4, 5])
+        self.assertEqual([record['spans']['inference'] for record in bounded.recent()], [3, 4, 5])
+        self.assertEqual(len(bounded.recent(limit=2)), 2)
+
+    def test_summary(self):
+        summarized = Tracer(sample_rate=1)
+        self.finish(summarized, range(1, 101))
+        summary = summarized.summary()
+        self.assertEqual(summary['inference'], {'count': 100, 'meanMs': 50.5, 'p50Ms': 51, 'p99Ms': 100})
+        self.assertEqual(summary['total']['count'], 100)
+
+
+class ParseCountTestCase(SimpleTestCase):
+    def test_accepts_integers_in_range_only(self):
+        self.assertEqual(parse_count(3, 107, 'top_n'), 3)
+        self.assertEqual(parse_count("107", 107, 'top_n'), 107)
+        for value in (0, -1, 108, "x", None, 2.5, True):
+            with self.assertRaises(ValueError):
+                parse_count(value, 107, 'top_n')
+
+
+class ReadinessMatrixTestCase(SimpleTestCase):
+    def test_coverage_and_missing_skills(self):
+        catalog = CareerCatalog.from_records([
+            {'career_name': 'Developer', 'required_skills': 'Programming, problem-solving, teamwork'},
+            {'career_name': 'Analyst', 'required_skills': 'Data analysis, communication'},
+            {'career_name': 'Curator', 'required_skills': ''},
+        ])
+        readiness = ReadinessMatrix(catalog)
+        results = readiness.score(['programming', 'Problem solving', 'cooking'], top_n=2)
+        self.assertEqual([result['career'] for result in results], ['Developer', 'Analyst'])
+        self.assertEqual(results[0]['coverage'], 66.7)
+        self.assertEqual(results[0]['matchedSkills'], ['Programming', 'problem-solving'])
+        self.assertEqual(results[0]['missingSkills'], ['teamwork'])
+        self.assertEqual(results[1]['coverage'], 0.0)
+        self.assertEqual(readiness.score([], careers=['curator', 'astronaut']),
+                         [{'career': 'Curator', 'coverage': 0.0, 'matchedSkills': [], 'missingSkills': []}, None])
+
+
+class PredictionCacheTestCase(SimpleTestCase):
+    def test_canonical_key_ignores_case_order_and_duplicates(self):
+        a = canonical_key({"education": "phd ", "skills": ["SQL", " python"], "interests": ["Art"]})
+        b = canonical_key({"education": "phd", "skills": ["python", "sql", "Python"], "interests": ["art "]})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, canonical_key({"education": "PhD", "skills": ["python", "sql"], "interests": ["art"]}))
+
+    def test_lru_eviction_and_version(self):
+        cache = PredictionCache(max_entries=2, ttl=60)
+        cache.set("v1", "a", 1)
+        cache.set("v1", "b", 2)
+        cache.get("v1", "a")
+        cache.set("v1", "c", 3)
+        self.assertIsNone(cache.get("v1", "b"))
+        self.assertEqual(cache.get("v1", "a"), 1)
+        self.assertIsNone(cache.get("v2", "a"))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_prewarm_keys_match_cleaned_profiles(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "users.csv")
+            pd.DataFrame({
+                'Name': ['a', 'b', 'c'],
+                'Age': [20, 21, 22],
+                'Education': ['High School Diploma', "Bachelor's Degree", "Bachelor's"],
+                'Skills': ['Python SQL', 'python, sql', 'python,sql'],
+                'Interests': ['art', 'Art', 'art'],
+                'Recommended_Career': ['analyst'] * 3,
+            }).to_csv(path, index=False)
+            bundle = types.SimpleNamespace(
+                version="v1", encoder=FeatureEncoder(*fit_encoders()), flat_forest_max_rows=32,
+                predict_proba=lambda X: np.zeros((X.shape[0], 2)),
+            )
+            cache = PredictionCache()
+            with contextlib.redirect_stdout(io.StringIO()):
+                prewarm_cache(bundle, path, 10, cache=cache)
+        for education in ("uacecertificate", "bachelor's"):
+            key = canonical_key({"education": education, "skills": ["sql", "python"], "interests": ["art"]})
+            self.assertIsNotNone(cache.get("v1", key))
+        self.assertEqual(cache.stats()['entries'], 2)
+
+    def test_expired_entries_are_misses(self):
+        cache = PredictionCache(max_entries=10, ttl=0)
+        cache.set("v1", "a", 1)
+        self.assertIsNone(cache.get("v1", "a"))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+
+class WriteBehindQueueTestCase(SimpleTestCase):
+    def test_batches_by_size_and_time(self):
+        batches = []
+        writes = WriteBehindQueue('test', batches.append, max_batch=3, max_wait_ms=50)
+        self.addCleanup(writes.close)
+        for record in range(4):
+            self.assertTrue(writes.put(record))
+        deadline = time.monotonic() + 2
+        while sum(len(batch) for batch in batches) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(batches, [[0, 1, 2], [3]])
+        self.assertEqual(writes.stats()['depth'], 0)
+
+    def test_failed_batch_is_retried_per_record(self):
+        written = []
+
+        def write(records):
+            if -1 in records:
+                raise ValueError("bad record")
+            written.extend(records)
+
+        writes = WriteBehindQueue('test', write, max_queue=3)
+        writes._closed = True  # no writer thread; flush by hand
+        for record in (1, -1, 2, 3):
+            writes.put(record)
+        self.assertEqual(writes.depth(), 3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            writes.flush()
+        self.assertEqual(written, [1, 2])
+        stats = writes.stats()
+        self.assertEqual((stats['written'], stats['failed'], stats['dropped']), (2, 1, 1))
+
+
+class RecordingBundle:
+    """Stands in for a ModelBundle and records the batches it scores"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_proba(self, X):
+        self.batches.append(len(X))
+        return np.hstack([X, 1 - X])
+
+
+class PredictionCoalescerTestCase(SimpleTestCase):
+    async def test_concurrent_requests_share_one_call(self):
+        coalescer = PredictionCoalescer(max_wait_ms=20, max_batch=64)
+        bundle = RecordingBundle()
+        rows = [np.array([value], dtype=np.float32) for value in (0.1, 0.2, 0.3)]
+        results = await asyncio.gather(*(coalescer.predict_proba(bundle, row) for row in rows))
+        self.assertEqual(bundle.batches, [3])
+        for row, probabilities in zip(rows, results):
+            np.testing.assert_allclose(probabilities, [row[0], 1 - row[0]])
+
+    async def test_full_batch_is_flushed_without_waiting(self):
+        coalescer = PredictionCoalescer(max_wait_ms=10000, max_batch=2)
+        bundle = RecordingBundle()
+        rows = [np.array([0.5], dtype=np.float32)] * 4
+        await asyncio.wait_for(
+            asyncio.gather(*(coalescer.predict_proba(bundle, row) for row in rows)), timeout=1
+        )
+        self.assertEqual(bundle.batches, [2, 2])
+        self.assertEqual(coalescer._tasks, set())
+
+    def test_requests_on_separate_loops_get_their_own_results(self):
+        # Under WSGI every request runs asyncio.run on its own thread
+        coalescer = PredictionCoalescer(max_wait_ms=30, max_batch=64)
+        bundle = RecordingBundle()
+        results = {}
+
+        def request(value):
+            row = np.array([value], dtype=np.float32)
+            results[value] = asyncio.run(asyncio.wait_for(coalescer.predict_proba(bundle, row), timeout=2))
+
+        threads = [threading.Thread(target=request, args=(value,)) for value in (0.25, 0.75)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        for value in (0.25, 0.75):
+            np.testing.assert_allclose(results[value], [value, 1 - value])
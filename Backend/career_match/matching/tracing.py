@@ -0,0 +1,125 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+
+logger = logging.getLogger('matching.tracing')
+
+
+class Trace:
+    """Timings of the stages of one request, in milliseconds"""
+
+    sampled = True
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.error = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((stage, (time.perf_counter() - start) * 1000))
+
+    def fail(self, message):
+        self.error = message
+
+    def as_dict(self):
+        # A stage entered more than once reports its total time
+        spans = {}
+        for stage, ms in self.spans:
+            spans[stage] = spans.get(stage, 0) + ms
+        return {
+            'name': self.name,
+            'timestamp': time.time(),
+            'totalMs': round((time.perf_counter() - self._start) * 1000, 3),
+            'spans': {stage: round(ms, 3) for stage, ms in spans.items()},
+            'error': self.error,
+        }
+
+
+class NullTrace:
+    """Returned for requests that weren't sampled; every span is a no-op"""
+
+    sampled = False
+
+    @contextmanager
+    def span(self, stage):
+        yield
+
+    def fail(self, message):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class Tracer:
+    """Samples request traces into an in-memory ring buffer and an optional log file"""
+
+    def __init__(self, sample_rate=0.1, buffer_size=1000, log_path=None):
+        self.sample_rate = sample_rate
+        self._traces = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        if log_path:
+            handler = RotatingFileHandler(log_path, maxBytes=5 * 1024 * 1024, backupCount=3)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    def start(self, name):
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            return Trace(name)
+        return NULL_TRACE
+
+    def finish(self, trace):
+        if not trace.sampled:
+            return
+        record = trace.as_dict()
+        with self._lock:
+            self._traces.append(record)
+        if logger.handlers:
+            logger.info(json.dumps(record))
+
+    def recent(self, limit=50):
+        with self._lock:
+            return list(self._traces)[-limit:]
+
+    def summary(self):
+        """Per-stage count, mean, p50 and p99 over the traces in the buffer"""
+        with self._lock:
+            traces = list(self._traces)
+        stages = {}
+        for record in traces:
+            stages.setdefault('total', []).append(record['totalMs'])
+            for stage, ms in record['spans'].items():
+                stages.setdefault(stage, []).append(ms)
+
+        summary = {}
+        for stage, timings in stages.items():
+            timings.sort()
+            summary[stage] = {
+                'count': len(timings),
+                'meanMs': round(sum(timings) / len(timings), 3),
+                'p50Ms': timings[len(timings) // 2],
+                'p99Ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+            }
+        return summary
+
+
+tracer = Tracer(
+    sample_rate=getattr(settings, 'CAREER_TRACE_SAMPLE_RATE', 0.1),
+    buffer_size=getattr(settings, 'CAREER_TRACE_BUFFER_SIZE', 1000),
+    log_path=getattr(settings, 'CAREER_TRACE_LOG_PATH', None),
+)
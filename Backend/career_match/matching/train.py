@@ -10,80 +10,35 @@ import joblib
 import pickle
 import os
 from sklearn.model_selection import RandomizedSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
 from sklearn.metrics import accuracy_score 
 from imblearn.over_sampling import SMOTE
 from sklearn.metrics import classification_report
 from sklearn.preprocessing import MultiLabelBinarizer, LabelEncoder, OneHotEncoder, StandardScaler
+import argparse
+import logging
+import sys
+import time
+import scipy.sparse as sp
+
+# Make the matching package importable when this file is run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from matching import cleaning
+from matching import weighting as weighting_module
+from matching.bundle import hash_file, prune_bundles, write_bundle
+from matching.cleaning import clean_user_frame
+from matching.feature_cache import FeatureCache, code_version, stage_key
+from matching.forest import export_forest
+from matching.selection import evaluate_candidates, select_candidate, write_report
+from matching.streaming import train_streaming
+from matching.weighting import balanced_weights, collapse_duplicates, matrix_mb
 
 # File path - update this to your file path
 user_data_path = "C:/Users/SHIRAH/Desktop/Test/career_matching/career_match/Cleaned_Users.csv"
 
-# Function to clean skills column - improved to better handle different formats
-def clean_skills_column(column):
-    cleaned = []
-    for entry in column:
-        if isinstance(entry, str):
-            # Handle both comma and space separated skills
-            entry = entry.lower().strip()
-            # First split by commas if they exist
-            if ',' in entry:
-                skills = [skill.strip() for skill in entry.split(',') if skill.strip()]
-            else:
-                # Otherwise split by spaces, but be careful with multi-word skills
-                skills = [skill.strip() for skill in entry.split() if skill.strip()]
-            cleaned.append(skills)
-        elif isinstance(entry, list):
-            cleaned.append([skill.strip().lower() for skill in entry if skill.strip()])
-        else:
-            cleaned.append([])
-    return cleaned
-
-def clean_interests_column(column):
-    cleaned = []
-    for entry in column:
-        if isinstance(entry, str):
-            # Handle both comma and space separated skills
-            entry = entry.lower().strip()
-            # First split by commas if they exist
-            if ',' in entry:
-                interests = [interest.strip() for interest in entry.split(',') if interest.strip()]
-            else:
-                # Otherwise split by spaces, but be careful with multi-word skills
-                interests = [interest.strip() for interest in entry.split() if interest.strip()]
-            cleaned.append(interests)
-        elif isinstance(entry, list):
-            cleaned.append([interest.strip().lower() for interest in entry if interest.strip()])
-        else:
-            cleaned.append([])
-    return cleaned
-def clean_education_column(df,column='education'):
-    mapping = {
-        'phd': 'phd',
-        'doctorate': 'phd',
-        'doctorate(phd/md)': 'phd',
-        "bachelor's": "bachelor's",
-        "bachelor'sdegree": "bachelor's",
-        "bachelors": "bachelor's",
-        "bachelorsdegree": "bachelor's",
-        "master's": "master's",
-        "master'sdegree": "master's",
-        "masters": "master's",
-        "mastersdegree": "master's",
-        "highschooldiploma": "uacecertificate",
-        "uacecertificate": "uacecertificate",
-        "ucecertificate": "ucecertificate"
-    }
-
-    def clean_level(level):
-        if pd.isnull(level):
-            return None
-        key = str(level).strip().lower().replace(" ", "")
-        return mapping.get(key)
-
-    df[column] = df[column].apply(clean_level)
-    df.dropna(subset=[column], inplace=True)
-    return df
-
+# Where model bundles are written; matches CAREER_MODEL_DIR in settings
+model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model')
 
 # Function to create a mapping between career names and their encoded values
 def create_career_mapping(encoder, career_names):
@@ -98,8 +53,8 @@ def create_career_mapping(encoder, career_names):
     return mapping
 
 
-# Main function to process data and train model
-def train_career_model(user_data_path):
+# Load the users CSV and clean the skills, interests and education columns
+def clean_user_data(user_data_path):
     print("Loading data...")
     user_data = pd.read_csv(user_data_path, encoding='latin1')
     user_data.columns = user_data.columns.str.strip().str.lower()
@@ -111,29 +66,12 @@ def train_career_model(user_data_path):
     user_data.columns = user_data.columns.str.strip().str.lower()
     
     print("Preprocessing data...")
-    # Handle missing values
-    user_data['skills'] = user_data['skills'].fillna('')
-    user_data['interests'] = user_data['interests'].fillna('')
-    user_data['age'] = pd.to_numeric(user_data['age'], errors='coerce').fillna(0)
-    user_data['education'] = user_data['education'].fillna('')
-    user_data['education'] = user_data['education'].astype(str)
-    user_data['recommended_career'] = user_data['recommended_career'].fillna('').astype(str)
+    user_data = clean_user_frame(user_data)
+    return user_data
 
-    
-    
-    # Clean and process skills
-    print("Processing skills data...")
-    user_data['skills'] = clean_skills_column(user_data['skills'])
-    user_data['interests'] = clean_interests_column(user_data['interests'])
-    user_data = clean_education_column(user_data, column='education')
-    
-        # 3. Drop rows with any missing or invalid key fields (after cleaning)
-    required_columns = ['recommended_career', 'skills', 'education', 'age', 'interests']
-    user_data = user_data.dropna(subset=required_columns)
 
-        # 4. Reset index after cleaning to avoid index misalignment
-    user_data = user_data.reset_index(drop=True)
-    
+# Fit the encoders and build the sparse feature matrix and labels
+def encode_user_data(user_data):
     # Create a global skill vocabulary
     all_user_skills = set(skill for sublist in user_data['skills'] for skill in sublist)
     all_user_interests = set(interest for sublist in user_data['interests'] for interest in sublist)
@@ -141,23 +79,17 @@ def train_career_model(user_data_path):
     print(f"Found {len(all_user_interests)} unique interests across all data.")
     
         # Skills encoder
-    skills_mlb = MultiLabelBinarizer()
+    skills_mlb = MultiLabelBinarizer(sparse_output=True)
     skills_mlb.fit(user_data['skills'])
 
     # Interests encoder
-    interests_mlb = MultiLabelBinarizer()
+    interests_mlb = MultiLabelBinarizer(sparse_output=True)
     interests_mlb.fit(user_data['interests'])
 
-    # Transform skills and interests
-    user_skills_encoded = pd.DataFrame(
-        skills_mlb.transform(user_data['skills']),
-        columns=skills_mlb.classes_
-    )
-
-    user_interests_encoded = pd.DataFrame(
-        interests_mlb.transform(user_data['interests']),
-        columns=interests_mlb.classes_
-    )
+    # Transform skills and interests into sparse multi-hot matrices, so memory
+    # grows with the number of tokens users have rather than rows x vocabulary
+    user_skills_encoded = skills_mlb.transform(user_data['skills'])
+    user_interests_encoded = interests_mlb.transform(user_data['interests'])
 
     
     # Create encoders for categorical variables
@@ -186,12 +118,15 @@ def train_career_model(user_data_path):
     
     # Create feature matrices
     print("Creating feature matrices...")
-    X_user = pd.concat((
-        user_data[['education_encoded']],
+    X_user = sp.hstack((
+        sp.csr_matrix(user_data[['education_encoded']].to_numpy()),
         user_interests_encoded,
         user_skills_encoded
-    ), axis=1)
-    X_user.fillna(0, inplace=True)
+    ), format='csr', dtype=np.float32)
+    # Same column order as the hstack above
+    feature_names = (['education_encoded']
+                     + [str(name) for name in interests_mlb.classes_]
+                     + [str(name) for name in skills_mlb.classes_])
     
     if 'recommended_career' in user_data.columns:
         y_user = user_data['recommended_career_encoded']
@@ -199,8 +134,6 @@ def train_career_model(user_data_path):
         print("Warning: No 'recommended_career' column found. Cannot train supervised model.")
         return None
 
-    # Fix mixed-type column names
-    X_user.columns = X_user.columns.astype(str)
     y_user = y_user.ravel()  # This flattens y into a 1D array, avoiding the column-vector issue
 
     
@@ -209,36 +142,79 @@ def train_career_model(user_data_path):
     counter = Counter(y_user)
     print(f"Class distribution before resampling: {counter}")
 
-    print(f"Length of X_user: {len(X_user)}")
+    print(f"Shape of X_user: {X_user.shape}, {X_user.nnz} non-zeros "
+          f"({X_user.nnz / (X_user.shape[0] * X_user.shape[1]):.2%} dense)")
     print(f"Length of y_user: {len(y_user)}")
 
-    print("X_user head:")
-    print(X_user.head())
+        # Sanity check
+    assert X_user.shape[0] == len(y_user)
+
+    encoders = {
+        'skills_encoder': skills_mlb,
+        'interests_encoder': interests_mlb,
+        'education_encoder': education_encoder,
+        'target_encoder': recommended_career_encoder,
+        'scaler': scaler,
+    }
+    return X_user, y_user, feature_names, encoders
 
-    print("y_user head:")
 
+# Encode, rebalance classes and split
+def build_features(user_data, weighting='oversample'):
+    encoded = encode_user_data(user_data)
+    if encoded is None:
+        return None
+    X_user, y_user, feature_names, encoders = encoded
+
+    sample_weight = None
+    if weighting == 'weights':
+        # Hold out real rows, then collapse the training rows into unique rows whose
+        # sample_weight carries both their duplicate count and the class balancing
+        # RandomOverSampler would have done by copying them
+        print("Splitting data for training...")
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_user, y_user, test_size=0.2, random_state=42, stratify=y_user
+        )
+        train_rows = X_train.shape[0]
+        X_train, y_train, counts = collapse_duplicates(X_train, y_train)
+        sample_weight = balanced_weights(y_train, counts)
+        # The weights sum to the number of rows oversampling would have produced
+        oversampled_rows = int(round(sample_weight.sum()))
+        print(f"Collapsed {train_rows} training rows into {X_train.shape[0]} unique rows "
+              f"({train_rows / X_train.shape[0]:.2f}x); oversampling would train on "
+              f"{oversampled_rows} rows ({oversampled_rows / X_train.shape[0]:.2f}x more)")
+    else:
+        ros = RandomOverSampler(random_state=42)
+        X_resampled, y_resampled = ros.fit_resample(X_user, y_user)
+
+        
+        print(f"Class distribution after resampling: {Counter(y_resampled)}")
+        
+        # Split data for training
+        print("Splitting data for training...")
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_resampled, y_resampled, test_size=0.2, random_state=42, stratify=y_resampled
+        )
+    print(f"Training matrix: {X_train.shape[0]} rows, {matrix_mb(X_train):.2f} MB")
+    return {
+        'X_train': X_train,
+        'X_test': X_test,
+        'y_train': y_train,
+        'y_test': y_test,
+        'sample_weight': sample_weight,
+        'feature_names': feature_names,
+        'encoders': encoders,
+    }
 
 
-    X_user = X_user.reset_index(drop=True)
+def build_search(search, n_iter=30, cv_folds=3, weighting='oversample'):
+    """Hyperparameter search over the random forest.
 
-        # Sanity check
-    assert len(X_user) == len(y_user)
-    
-    
-    ros = RandomOverSampler(random_state=42)
-    X_resampled, y_resampled = ros.fit_resample(X_user, y_user)
-
-    
-    print(f"Class distribution after resampling: {Counter(y_resampled)}")
-    
-    # Split data for training
-    print("Splitting data for training...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_resampled, y_resampled, test_size=0.2, random_state=42, stratify=y_resampled
-    )
-    feature_names = X_train.columns.tolist()
-    # Train model with hyperparameter tuning
-    print("Training model with hyperparameter tuning...")
+    'random' scores n_iter candidates with every tree count on all folds. 'halving'
+    uses successive halving with the number of trees as the resource: many candidates
+    are scored with a few trees, and only the best third move on to three times as
+    many trees, so bad candidates are dropped after costing very little.
+    """
     param_grid = {
     'n_estimators': [100, 200, 300],
     'max_depth': [None, 10, 20, 30],
@@ -249,22 +225,103 @@ def train_career_model(user_data_path):
     'class_weight': ['balanced']
 }
 
-    
+    if weighting == 'weights':
+        # Class balance is already in the sample weights; 'balanced' would count
+        # unique rows and skew it
+        param_grid['class_weight'] = [None]
+
     rf = RandomForestClassifier(random_state=42)
-    
-    grid_search = RandomizedSearchCV(
+    cv = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=42)
+
+    if search == 'halving':
+        param_grid = {name: values for name, values in param_grid.items() if name != 'n_estimators'}
+        return HalvingRandomSearchCV(
+            estimator=rf,
+            param_distributions=param_grid,
+            resource='n_estimators',
+            min_resources=10,
+            max_resources=300,
+            factor=3,
+            n_candidates=n_iter,
+            cv=cv,
+            random_state=42,
+            n_jobs=-1,
+            verbose=1
+        )
+    return RandomizedSearchCV(
         estimator=rf,
         param_distributions=param_grid,
-        cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42),
-        n_iter=30,
+        cv=cv,
+        n_iter=n_iter,
+        random_state=42,
         n_jobs=-1,
         verbose=1
     )
+
+
+def load_features(user_data_path, cache, weighting='oversample'):
+    """Cleaned and encoded training data, reused from the cache when the CSV and the
+    code of each stage are unchanged"""
+    data_hash = hash_file(user_data_path)
+    cleaned_key = stage_key(data_hash, code_version(clean_user_data, cleaning))
+    features_key = stage_key(cleaned_key, code_version(encode_user_data, build_features, weighting_module), weighting)
+
+    features = cache.get_or_build(
+        'features', features_key,
+        lambda: build_features(cache.get_or_build('cleaned', cleaned_key, lambda: clean_user_data(user_data_path)),
+                               weighting),
+    )
+    cache.prune(keep={os.path.basename(cache.path('cleaned', cleaned_key)),
+                      os.path.basename(cache.path('features', features_key))})
+    return features, data_hash
+
+
+# Main function to process data and train model
+def train_career_model(user_data_path, max_single_row_ms=None, max_batch_ms=None, max_size_mb=None,
+                       report_path=None, max_candidates=None, search='random', n_iter=30, cv_folds=3,
+                       cache_dir=None, use_cache=True, weighting='oversample'):
+    cache = FeatureCache(cache_dir or os.path.join(model_dir, 'train_cache'), enabled=use_cache)
+    features, data_hash = load_features(user_data_path, cache, weighting)
+    if features is None:
+        return None
+    X_train, X_test = features['X_train'], features['X_test']
+    y_train, y_test = features['y_train'], features['y_test']
+    feature_names = features['feature_names']
+    sample_weight = features.get('sample_weight')
+    fit_params = {} if sample_weight is None else {'sample_weight': sample_weight}
+
+    # Train model with hyperparameter tuning
+    print("Training model with hyperparameter tuning...")
+    grid_search = build_search(search, n_iter, cv_folds, weighting)
     
-    grid_search.fit(X_train, y_train)
-    
+    start = time.perf_counter()
+    grid_search.fit(X_train, y_train, **fit_params)
+    print(f"Search took {time.perf_counter() - start:.1f}s on {X_train.shape[0]} training rows")
+
+    # Measure inference latency and size of every candidate, then pick the most
+    # accurate one that fits the budget rather than the most accurate overall
+    print("Measuring candidate latency and size...")
+    budget = {
+        'max_single_row_ms': max_single_row_ms,
+        'max_batch_ms': max_batch_ms,
+        'max_size_mb': max_size_mb,
+    }
+    candidates = evaluate_candidates(grid_search, X_train, y_train, X_test, y_test,
+                                     max_candidates=max_candidates, sample_weight=sample_weight)
+    selected = select_candidate(candidates, **budget)
+    report_path = report_path or os.path.join(model_dir, 'selection_report.csv')
+    report = write_report(candidates, report_path, selected, **budget)
+    print(report[['candidate', 'cv_accuracy', 'test_accuracy', 'single_row_p99_ms',
+                  'batch_ms', 'size_mb', 'within_budget', 'selected']].to_string(index=False))
+    print(f"Wrote selection report to {report_path}")
+
     # Get best model
-    best_rf = grid_search.best_estimator_
+    if selected['candidate'] == grid_search.best_index_:
+        best_rf = grid_search.best_estimator_
+    else:
+        print(f"Refitting selected candidate {selected['candidate']}: {selected['params']}")
+        best_rf = RandomForestClassifier(random_state=42).set_params(**selected['params'])
+        best_rf.fit(X_train, y_train, **fit_params)
     
     # Evaluate model
     print("Evaluating model...")
@@ -274,20 +331,72 @@ def train_career_model(user_data_path):
     print("Test Accuracy: {:.2f}%".format(test_accuracy * 100))
 
     
-    print("Cross-validation accuracy: {:.2f}%".format(grid_search.best_score_ * 100))
+    print("Cross-validation accuracy: {:.2f}%".format(selected['cv_accuracy'] * 100))
     
-    # Save model and encoders
-    print("Saving model and encoders...")
-    os.makedirs('model', exist_ok=True)
-    joblib.dump(best_rf, "model/rf_model.pkl")
-    joblib.dump(education_encoder, "model/education_encoder.pkl")
-    joblib.dump(interests_mlb, "model/interests_encoder.pkl")
-    joblib.dump(skills_mlb, "model/skills_encoder.pkl")
-    joblib.dump(scaler, "model/scaler.pkl")
-    joblib.dump(recommended_career_encoder, "model/target_encoder.pkl")
-    joblib.dump(feature_names, "model/feature_names.pkl")
+    # Save model and encoders as one versioned bundle
+    print("Saving model bundle...")
+    version = write_bundle(
+        model_dir,
+        best_rf,
+        encoders=features['encoders'],
+        feature_names=feature_names,
+        training_data_hash=data_hash,
+        # Compact array copy of the forest for low-latency single-row inference
+        flat_forest=export_forest(best_rf, node_values=True),
+        extra={'selection': {
+            'params': selected['params'],
+            'cv_accuracy': selected['cv_accuracy'],
+            'test_accuracy': test_accuracy,
+            'single_row_p99_ms': selected['single_row_p99_ms'],
+            'batch_ms': selected['batch_ms'],
+            'size_mb': selected['size_mb'],
+            'budget': budget,
+            'search': search,
+            'weighting': weighting,
+        }},
+    )
+    print(f"Published bundle {version} in {model_dir}")
+    prune_bundles(model_dir, keep=3)
 
     print("\nTraining complete!")
     
 if __name__ == "__main__":
-    train_career_model(user_data_path)
+    parser = argparse.ArgumentParser(description="Train the career recommendation model")
+    parser.add_argument('--data', default=user_data_path, help="Path to Cleaned_Users.csv")
+    parser.add_argument('--max-latency-ms', type=float, help="p99 single-row inference budget")
+    parser.add_argument('--max-batch-ms', type=float, help="Budget for scoring a 1000-row batch")
+    parser.add_argument('--max-size-mb', type=float, help="Budget for the model files in the bundle")
+    parser.add_argument('--max-candidates', type=int, help="Only measure the N best candidates by CV accuracy")
+    parser.add_argument('--report', help="Where to write the candidate report CSV")
+    parser.add_argument('--search', choices=['random', 'halving'], default='random',
+                        help="Randomized search, or successive halving over the number of trees")
+    parser.add_argument('--n-iter', type=int, default=30, help="Number of candidates to try")
+    parser.add_argument('--cv', type=int, default=3, help="Number of cross-validation folds")
+    parser.add_argument('--cache-dir', help="Where cleaned and encoded data is cached")
+    parser.add_argument('--no-cache', action='store_true', help="Rebuild features without the cache")
+    parser.add_argument('--weighting', choices=['oversample', 'weights'], default='oversample',
+                        help="Balance classes by copying rows, or train on unique rows with sample weights")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Read the CSV in chunks and train a linear model with bounded memory")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Rows per chunk in streaming mode")
+    parser.add_argument('--epochs', type=int, default=1, help="Passes over the data in streaming mode")
+    args = parser.parse_args()
+    # Cache hits and candidate progress from feature_cache and selection
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.streaming:
+        train_streaming(args.data, model_dir, chunksize=args.chunksize, epochs=args.epochs)
+        sys.exit()
+    train_career_model(
+        args.data,
+        max_single_row_ms=args.max_latency_ms,
+        max_batch_ms=args.max_batch_ms,
+        max_size_mb=args.max_size_mb,
+        report_path=args.report,
+        max_candidates=args.max_candidates,
+        search=args.search,
+        n_iter=args.n_iter,
+        cv_folds=args.cv,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        weighting=args.weighting,
+    )
@@ -0,0 +1,168 @@
+import threading
+from collections import Counter
+
+import pandas as pd
+from django.conf import settings
+
+from matching.cleaning import clean_token_column
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+
+class PrefixTrie:
+    """Character trie over terms that keeps each node's best completions.
+
+    Every term is inserted from the start of each of its words, so "learn" finds
+    "machine learning". After building, each node holds up to max_results terms
+    ranked by score, so a lookup is one dict step per typed character plus a slice.
+    """
+
+    def __init__(self, scores, max_results=20):
+        self.root = _Node()
+        ranked = sorted(scores, key=lambda term: (-scores[term], term))
+        for rank, term in enumerate(ranked):
+            self.root.top.append(rank)
+            starts = [0] + [index + 1 for index, char in enumerate(term) if char == ' ']
+            reached = set()
+            for start in starts:
+                node = self.root
+                for char in term[start:]:
+                    node = node.children.setdefault(char, _Node())
+                    # A term reaches the same node twice when two of its words share a prefix
+                    if id(node) not in reached:
+                        reached.add(id(node))
+                        node.top.append(rank)
+        self.terms = ranked
+
+        # Terms were inserted in rank order, so each node's list is already sorted
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node.top = [self.terms[rank] for rank in node.top[:max_results]]
+            stack.extend(node.children.values())
+
+    def complete(self, prefix, limit=10):
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top[:limit]
+
+
+def normalize_query(query):
+    return ' '.join(str(query).lower().split())
+
+
+def token_counts(column):
+    """How many rows of a token column mention each token"""
+    counts = Counter()
+    for tokens in clean_token_column(column):
+        counts.update(set(tokens))
+    return counts
+
+
+class Typeahead:
+    """Skill and interest completions for one model bundle.
+
+    Skills come from the bundle's skill vocabulary plus the required skills in the
+    career catalog; interests from the interest vocabulary. Completions are ranked
+    by how many training users listed the term. Catalog skills the model doesn't
+    know rank after the ones it does and are marked inModel: false.
+    """
+
+    def __init__(self, bundle, catalog, user_data_path=None, max_results=20):
+        self.version = bundle.version
+        self.catalog = catalog
+        skill_counts, interest_counts = Counter(), Counter()
+        if user_data_path is not None:
+            try:
+                user_data = pd.read_csv(user_data_path, encoding='latin1')
+                user_data.columns = user_data.columns.str.strip().str.lower()
+                skill_counts = token_counts(user_data['skills'].fillna(''))
+                interest_counts = token_counts(user_data['interests'].fillna(''))
+            except (OSError, KeyError, ValueError) as e:
+                print(f"Typeahead is ranking alphabetically, could not read {user_data_path}: {str(e)}")
+
+        skills = {term: skill_counts[term] for term in bundle.encoder.skill_vocabulary}
+        catalog_counts = Counter(
+            skill
+            for entry in catalog
+            for skill in {normalize_query(skill) for skill in entry.required_skills}
+            if skill
+        )
+        # Known skills always outrank catalog-only ones, which are ranked by how many
+        # careers require them
+        offset = max(skills.values(), default=0) + 1
+        scores = {term: count + offset for term, count in skills.items()}
+        for skill in catalog_counts.keys() - skills.keys():
+            scores[skill] = catalog_counts[skill] / (len(catalog) + 1)
+
+        self.counts = {
+            'skills': {term: skills.get(term, 0) for term in scores},
+            'interests': {term: interest_counts[term] for term in bundle.encoder.interest_vocabulary},
+        }
+        self.known = {'skills': bundle.encoder.skill_vocabulary, 'interests': bundle.encoder.interest_vocabulary}
+        self.tries = {
+            'skills': PrefixTrie(scores, max_results),
+            'interests': PrefixTrie(self.counts['interests'], max_results),
+        }
+
+    def complete(self, query, kind, limit=10):
+        """Ranked completions of query among 'skills' or 'interests'"""
+        return [
+            {'term': term, 'count': self.counts[kind][term], 'inModel': term in self.known[kind]}
+            for term in self.tries[kind].complete(normalize_query(query), limit)
+        ]
+
+
+_typeahead = None
+_typeahead_lock = threading.Lock()
+
+
+def get_typeahead(bundle, catalog):
+    """The process-wide typeahead, built from bundle and catalog on first use.
+
+    Later bundles and catalogs are picked up by warm_typeahead and
+    catalog_changed off the request path; the previous typeahead keeps serving
+    until their rebuild is swapped in.
+    """
+    typeahead = _typeahead
+    if typeahead is None:
+        with _typeahead_lock:
+            typeahead = _typeahead
+            if typeahead is None:
+                typeahead = refresh_typeahead(bundle, catalog)
+    return typeahead
+
+
+def warm_typeahead(bundle):
+    """Rebuild the typeahead for a newly loaded bundle so no keystroke waits for it"""
+    from matching.catalog import get_catalog
+    with _typeahead_lock:
+        refresh_typeahead(bundle, get_catalog())
+
+
+def catalog_changed(catalog):
+    """Rebuild the typeahead for a refreshed catalog, once a bundle is loaded"""
+    from matching.registry import registry
+    if registry.loaded:
+        with _typeahead_lock:
+            refresh_typeahead(registry.get(), catalog)
+
+
+def refresh_typeahead(bundle, catalog):
+    global _typeahead
+    _typeahead = Typeahead(
+        bundle,
+        catalog,
+        user_data_path=getattr(settings, 'CAREER_USER_DATA_PATH', None),
+        max_results=getattr(settings, 'CAREER_TYPEAHEAD_MAX_RESULTS', 20),
+    )
+    return _typeahead
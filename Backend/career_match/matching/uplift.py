@@ -0,0 +1,93 @@
+import threading
+
+import numpy as np
+
+from matching.explain import explainable_forest
+
+_split_counts = {}
+_split_counts_lock = threading.Lock()
+
+
+def split_counts(bundle):
+    """FlatForest.split_counts of bundle's flat forest, cached per bundle version"""
+    counts = _split_counts.get(bundle.version)
+    if counts is None:
+        with _split_counts_lock:
+            counts = _split_counts.get(bundle.version)
+            if counts is None:
+                counts = bundle.flat_forest.split_counts()
+                _split_counts.clear()
+                _split_counts[bundle.version] = counts
+    return counts
+
+
+def candidate_scores(bundle, row, class_index):
+    """How promising switching on each feature of row looks for class_index.
+
+    Forests use FlatForest.switch_gains on the row's own decision paths, so skills
+    that can't change the prediction are marked untested and skipped. Until
+    warm_explainer has extracted a bundle's node values (it failed, or the bundle was
+    just swapped in) they fall back to how often the forest splits on each feature,
+    rather than extracting them inside the request. Linear models use the target
+    class's coefficients. Returns (scores, tested); tested is None when every
+    feature may matter.
+    """
+    forest = explainable_forest(bundle, build=False)
+    if forest is not None:
+        return forest.switch_gains(row, class_index)
+    if bundle.flat_forest is not None:
+        return split_counts(bundle), None
+    model = bundle.model
+    if hasattr(model, 'coef_'):
+        return np.asarray(model.coef_)[class_index], None
+    return np.zeros(bundle.encoder.n_features), None
+
+
+def find_class(bundle, career):
+    """Index of career among the model's classes, ignoring case; None if unknown"""
+    wanted = str(career).strip().lower()
+    for index, name in enumerate(bundle.target_encoder.classes_):
+        if str(name).lower() == wanted:
+            return index
+    return None
+
+
+def skill_uplift(bundle, user_input, class_index, max_candidates=31, top_n=10):
+    """Rank the skills the profile lacks by how much adding each one raises class_index.
+
+    The missing skills that look most promising for class_index (see
+    candidate_scores) are each added to a copy of the profile's row, and the base
+    row plus every copy is scored in a single predict_proba call. Returns
+    (base_probability, ranked, candidates), where ranked holds up to top_n
+    {'skill', 'probability', 'gain'} entries with a positive gain.
+    """
+    encoder = bundle.encoder
+    base = encoder.encode(user_input)
+    present = set(np.flatnonzero(base[0]).tolist())
+    scores, tested = candidate_scores(bundle, base[0], class_index)
+
+    candidates = [
+        (skill, columns) for skill, columns in encoder.skill_columns.items()
+        if not present.intersection(columns.tolist()) and (tested is None or tested[columns].any())
+    ]
+    candidates.sort(key=lambda candidate: (-scores[candidate[1]].sum(), candidate[0]))
+    candidates = candidates[:max_candidates]
+
+    X = np.repeat(base, len(candidates) + 1, axis=0)
+    for row, (_, columns) in enumerate(candidates, start=1):
+        X[row, columns] = 1
+    probabilities = bundle.predict_proba(X)[:, class_index]
+
+    base_probability = float(probabilities[0])
+    gains = probabilities[1:] - base_probability
+    order = np.argsort(-gains, kind='stable')
+    ranked = [
+        {
+            'skill': candidates[index][0],
+            'probability': round(float(probabilities[index + 1]), 4),
+            'gain': round(float(gains[index]), 4),
+        }
+        for index in order[:top_n]
+        if gains[index] > 0
+    ]
+    return base_probability, ranked, len(candidates)
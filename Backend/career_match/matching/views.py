@@ -1,142 +1,146 @@
+import asyncio
 import json
-import pandas as pd
-import joblib
-import os
 import numpy as np
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 import traceback
 
-# Load the career dataset
-def load_career_dataset():
-    """Load the career dataset with descriptions, required skills, and industry types"""
-    try:
-        # Update this path to where your career dataset is stored
-        career_dataset_path = os.path.join("C:/Users/SHIRAH/Desktop/Test/career_matching/career_match/career_data.csv")
-        career_df = pd.read_csv(career_dataset_path, encoding='latin1')
-        return career_df
-    except Exception as e:
-        print(f"Error loading career dataset: {str(e)}")
-        # Return a minimal dataset if the file can't be loaded
-        return pd.DataFrame({
-            'career_name': [],
-            'description': [],
-            'required_skills': [],
-            'industry_type': []
-        })
-
-# Load the ML model and encoders
-def load_models():
-    """Load all the trained models and encoders"""
-    model_dir = os.path.join(settings.BASE_DIR, 'matching/model')
-    
-    model = joblib.load(os.path.join(model_dir, "rf_model.pkl"))
-    skills_encoder = joblib.load(os.path.join(model_dir, "skills_encoder.pkl"))
-    interests_encoder = joblib.load(os.path.join(model_dir, "interests_encoder.pkl"))
-    education_encoder = joblib.load(os.path.join(model_dir, "education_encoder.pkl"))
-    target_encoder = joblib.load(os.path.join(model_dir, "target_encoder.pkl"))
-    feature_names = joblib.load(os.path.join(model_dir, "feature_names.pkl"))
-    
-    return model, skills_encoder, interests_encoder, education_encoder,  target_encoder, feature_names
+from matching.batching import coalescer
+from matching.cache import canonical_key, prediction_cache
+from matching.catalog import get_catalog
+from matching.explain import cached_explain
+from matching.readiness import get_readiness
+from matching.registry import registry
+from matching.tracing import NULL_TRACE, tracer
+from matching.typeahead import get_typeahead
+from matching.uplift import find_class, skill_uplift
+from matching.writebehind import prediction_writes
 
 # Preprocess user input for prediction
-def preprocess_input(user_input, skills_encoder, interests_encoder, education_encoder, feature_names):
+def preprocess_input(user_input, encoder):
     """Convert user input to the format expected by the model"""
-    # Extract user input
-    age = user_input.get('age', 25)
-    education = user_input.get('education', "bachelor's")
-    skills = [skill.lower().strip() for skill in user_input.get('skills', [])]
-    interests = [interest.lower().strip() for interest in user_input.get('interests', [])]
-
-    # Encode skills
-    skills_df = pd.DataFrame(columns=skills_encoder.classes_)
-    skills_df.loc[0] = 0
-    for skill in skills:
-        if skill in skills_encoder.classes_:
-            skills_df.loc[0, skill] = 1
-        else:
-            print(f"⚠️ Unknown skill: {skill}")  # Handle unknown skills
-
-    # Encode interests
-    interests_df = pd.DataFrame(columns=interests_encoder.classes_)
-    interests_df.loc[0] = 0
-    for interest in interests:
-        if interest in interests_encoder.classes_:
-            interests_df.loc[0, interest] = 1
-        else:
-            print(f"⚠️ Unknown interest: {interest}")  # Handle unknown interests
-
-    print(f"Available education levels: {education_encoder.classes_}")
-    education_cleaned = education.strip()
-    education_value = education_encoder.transform([education_cleaned])[0]
-    education_df = pd.DataFrame([[education_value]], columns=['education_encoded'])
-
-    # Combine features
-    X = pd.concat([skills_df.reset_index(drop=True),
-                    interests_df.reset_index(drop=True),
-                    education_df.reset_index(drop=True)], axis=1)
-
-    # Remove duplicate columns in X
-    X = X.loc[:, ~X.columns.duplicated()]
-
-    print("Prediction DataFrame Columns:")
-    print(X.columns.tolist())
-
-    print("Feature Names From Training:")
-    print(feature_names)
-    missing_cols = set(feature_names) - set(X.columns)
-    extra_cols = set(X.columns) - set(feature_names)
-
-    if missing_cols:
-        print("⚠️ Missing columns in prediction data:", missing_cols)
-    if extra_cols:
-        print("⚠️ Extra columns in prediction data:", extra_cols)
-
-    X = X.reindex(columns=feature_names, fill_value=0)
-
-    # Final check
-    assert list(X.columns) == feature_names, "❌ Feature order mismatch!"
-
-    return X
-
-
-# Get career details from the dataset
-def get_career_details(career_name, career_df):
-    """Get description, required skills, and industry type for a career"""
-    # Find the career in the dataset (case-insensitive)
-    print(career_df.columns)
+    return encoder.encode(user_input)
+
+# Read a count such as top_n from a request
+def parse_count(value, maximum, name):
+    """value as an integer from 1 to maximum; raises ValueError with a message for the client"""
+    if isinstance(value, (bool, float)):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+    if not 1 <= number <= maximum:
+        raise ValueError(f"{name} must be between 1 and {maximum}")
+    return number
 
-    career_df['career_name'] = career_df['career_name'].astype(str)
 
-    career_row = career_df[career_df['career_name'].str.lower() == career_name.lower()]
-    
-    if not career_row.empty:
-        # Get the first matching row
-        row = career_row.iloc[0]
-        
-        # Parse required skills if they're stored as a string
-        required_skills = row.get('required_skills', '')
-        if isinstance(required_skills, str):
-            try:
-                # Try to parse as JSON
-                required_skills = json.loads(required_skills)
-            except:
-                # If that fails, split by comma
-                required_skills = [skill.strip() for skill in required_skills.split(',')]
-        
-        return {
-            'description': row.get('description', 'No description available'),
-            'required_skills': required_skills if isinstance(required_skills, list) else [],
-            'industry_type': row.get('industry_type', 'Not specified')
-        }
-    else:
+# Get career details from the catalog
+def get_career_details(career_name, catalog):
+    """Get description, required skills, and industry type for a career"""
+    entry = catalog.get(career_name)
+    if entry is None:
         # Return default values if career not found
         return {
             'description': 'No description available',
             'required_skills': [],
             'industry_type': 'Not specified'
         }
+    return {
+        'description': entry.description,
+        'required_skills': list(entry.required_skills),
+        'industry_type': entry.industry_type
+    }
+
+# Turn one row of class probabilities into recommendations with career details
+def build_recommendations(probabilities, data, bundle, catalog, top_n=3, trace=NULL_TRACE, cache_key=None):
+    """Build the top_n recommendations for one user from their class probabilities
+
+    With a cache_key, the first CAREER_EXPLAIN_TOP_N explanations hold the real
+    per-feature contributions to that career from the forest's decision paths
+    (cached under the key). The others, and all of them without a cache_key
+    (batches), only list the user's skills and interests the model knows.
+    """
+    with trace.span('catalog_lookup'):
+        top_indices = np.argsort(probabilities)[::-1][:top_n]
+        top_probabilities = probabilities[top_indices]
+
+        # Convert indices to career names (direct lookup, inverse_transform re-validates)
+        top_careers = bundle.target_encoder.classes_[top_indices]
+
+        # Get career details from the catalog
+        details = [get_career_details(career, catalog) for career in top_careers]
+
+        # How many of each career's required skills the user already has
+        readiness = get_readiness(catalog).score(data.get('skills', []), careers=top_careers)
+
+    with trace.span('match_tokens'):
+        # Find matching skills and interests for explanation, including the unknown
+        # tokens that were mapped to a known one (e.g. "python3" -> "python")
+        normalized = bundle.encoder.normalized_tokens(data)
+        matching_skills = [skill.lower().strip() for skill in data.get('skills', [])
+                           if skill.lower().strip() in bundle.encoder.skill_vocabulary]
+        matching_skills += [entry['match'] for entry in normalized['skills']]
+        matching_interests = [interest.lower().strip() for interest in data.get('interests', [])
+                              if interest.lower().strip() in bundle.encoder.interest_vocabulary]
+        matching_interests += [entry['match'] for entry in normalized['interests']]
+        # "python" and "python3" both end up as "python"; keep the first of each
+        matching_skills = list(dict.fromkeys(matching_skills))
+        matching_interests = list(dict.fromkeys(matching_interests))
+
+    explanations = None
+    if cache_key is not None:
+        with trace.span('explain'):
+            # Each explained career costs several times the prediction itself
+            explain_n = getattr(settings, 'CAREER_EXPLAIN_TOP_N', 1)
+            explanations = cached_explain(bundle, data, cache_key, top_indices[:explain_n])
+
+    with trace.span('build_response'):
+        recommendations = []
+        for position, (career, probability, career_details, career_readiness) in enumerate(
+                zip(top_careers, top_probabilities, details, readiness)):
+            if explanations is not None and position < len(explanations):
+                explanation = dict(explanations[position], normalized=normalized)
+            else:
+                explanation = {
+                    "skills": matching_skills[:3],  # Top 3 matching skills
+                    "interests": matching_interests[:3],  # Top 3 matching interests
+                    "education_match": True,  # Not computed without contributions
+                    "normalized": normalized
+                }
+
+            recommendations.append({
+                "title": career,
+                "matchScore": round(float(probability) * 1000),
+                "description": career_details['description'],
+                "requiredSkills": career_details['required_skills'],
+                "industryType": career_details['industry_type'],
+                "skillCoverage": career_readiness['coverage'] if career_readiness else None,
+                "missingSkills": career_readiness['missingSkills'] if career_readiness else [],
+                "explanation": explanation
+            })
+    return recommendations
+
+# Queue the top prediction of a stored profile for saving
+def record_prediction(data, bundle, probabilities):
+    """Queue a PredictionResult when the request names a UserProfile with "userId".
+
+    The row is written by the write-behind queue, not on the request thread.
+    """
+    user_id = data.get('userId')
+    if user_id is None:
+        return
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        print(f"Not saving prediction for invalid userId {user_id!r}")
+        return
+    best = int(np.argmax(probabilities))
+    prediction_writes.put((user_id, str(bundle.target_encoder.classes_[best]),
+                           round(float(probabilities[best]), 4)))
+
 
 @csrf_exempt
 def predict_career(request):
@@ -144,59 +148,288 @@ def predict_career(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
     
+    trace = tracer.start('predict_career')
     try:
         # Parse JSON data from request
-        data = json.loads(request.body)
-        
-        # Load models and career dataset
-        model, skills_encoder, interests_encoder, education_encoder, target_encoder, feature_names = load_models()
-        career_df = load_career_dataset()
+        with trace.span('parse'):
+            data = json.loads(request.body)
         
-        # Preprocess input
-        X = preprocess_input(data, skills_encoder, interests_encoder, education_encoder, feature_names)
+        # Take one snapshot of the models so a hot reload can't swap them mid-request
+        with trace.span('model_load'):
+            bundle = registry.get()
+            catalog = get_catalog()
         
-        # Make prediction
-        probabilities = model.predict_proba(X)
+        # Profiles that only differ in case, order or duplicates share a cache entry
+        with trace.span('cache_lookup'):
+            cache_key = canonical_key(data)
+            probabilities = prediction_cache.get(bundle.version, cache_key)
+        if probabilities is None:
+            # Preprocess input
+            with trace.span('encode'):
+                X = preprocess_input(data, bundle.encoder)
+
+            # Make prediction
+            with trace.span('inference'):
+                probabilities = bundle.predict_proba(X)[0]
+            prediction_cache.set(bundle.version, cache_key, probabilities)
         
         # Get top 3 predictions
-        top_n = 3
-        top_indices = np.argsort(probabilities[0])[::-1][:top_n]
-        top_probabilities = probabilities[0][top_indices]
-        
-        # Convert indices to career names
-        top_careers = target_encoder.inverse_transform(top_indices)
-        
-        # Create results with career details
-        recommendations = []
-        for i, (career, probability) in enumerate(zip(top_careers, top_probabilities)):
-            # Get career details from dataset
-            career_details = get_career_details(career, career_df)
-            
-            # Find matching skills and interests for explanation
-            matching_skills = [skill for skill in data.get('skills', []) 
-                              if skill.lower() in skills_encoder.classes_]
-            matching_interests = [interest for interest in data.get('interests', []) 
-                                 if interest.lower() in interests_encoder.classes_]
-            
-            # Create explanation
-            explanation = {
-                "skills": matching_skills[:3],  # Top 3 matching skills
-                "interests": matching_interests[:3],  # Top 3 matching interests
-                "education_match": True  # Simplified for this example
-            }
-            
-            recommendations.append({
-                "title": career,
-                "matchScore": round(float(probability) * 1000), 
-                "description": career_details['description'],
-                "requiredSkills": career_details['required_skills'],
-                "industryType": career_details['industry_type'],
-                "explanation": explanation
-            })
+        recommendations = build_recommendations(probabilities, data, bundle, catalog, top_n=3, trace=trace,
+                                                cache_key=cache_key)
+
+        with trace.span('persist'):
+            record_prediction(data, bundle, probabilities)
         
-        return JsonResponse({'recommendations': recommendations})
+        with trace.span('serialize'):
+            return JsonResponse({'recommendations': recommendations})
     
     except Exception as e:
+        trace.fail(str(e))
+        print(f"Error in prediction: {str(e)}")
+        traceback.print_exc()
+        return JsonResponse({'error': str(e)}, status=500)
+
+    finally:
+        tracer.finish(trace)
+
+
+@csrf_exempt
+async def predict_career_async(request):
+    """Async variant of predict_career for ASGI deployments
+
+    Under ASGI concurrent requests are coalesced into micro-batches so bursts of
+    traffic share predict_proba calls instead of each running the model on its own.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+
+    trace = tracer.start('predict_career_async')
+    try:
+        with trace.span('parse'):
+            data = json.loads(request.body)
+
+        with trace.span('model_load'):
+            bundle = registry.get()
+            catalog = get_catalog()
+
+        with trace.span('cache_lookup'):
+            cache_key = canonical_key(data)
+            probabilities = prediction_cache.get(bundle.version, cache_key)
+        if probabilities is None:
+            with trace.span('encode'):
+                X = preprocess_input(data, bundle.encoder)
+            # Includes the time spent waiting for the micro-batch to fill
+            with trace.span('inference'):
+                if isinstance(request, ASGIRequest):
+                    probabilities = await coalescer.predict_proba(bundle, X[0])
+                else:
+                    # Under WSGI each request runs on an event loop of its own, so
+                    # there are no concurrent requests to batch with
+                    probabilities = bundle.predict_proba(X)[0]
+            prediction_cache.set(bundle.version, cache_key, probabilities)
+
+        # Explaining the top career takes milliseconds of NumPy work, so keep it off the loop
+        recommendations = await asyncio.to_thread(build_recommendations, probabilities, data, bundle, catalog,
+                                                  top_n=3, trace=trace, cache_key=cache_key)
+
+        with trace.span('persist'):
+            record_prediction(data, bundle, probabilities)
+
+        with trace.span('serialize'):
+            return JsonResponse({'recommendations': recommendations})
+
+    except Exception as e:
+        trace.fail(str(e))
         print(f"Error in prediction: {str(e)}")
         traceback.print_exc()
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=500)
+
+    finally:
+        tracer.finish(trace)
+
+
+@csrf_exempt
+def predict_career_batch(request):
+    """API endpoint to predict careers for a list of user profiles in one model call
+
+    Expects {"profiles": [{...}, ...], "top_n": 3}. Results come back in the same order;
+    a profile that can't be encoded gets an "error" entry instead of failing the batch.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+
+    trace = tracer.start('predict_career_batch')
+    try:
+        with trace.span('parse'):
+            data = json.loads(request.body)
+        profiles = data.get('profiles') if isinstance(data, dict) else None
+        if not isinstance(profiles, list):
+            return JsonResponse({'error': "Expected a 'profiles' list"}, status=400)
+
+        max_profiles = getattr(settings, 'CAREER_BATCH_MAX_PROFILES', 1000)
+        if len(profiles) > max_profiles:
+            return JsonResponse({'error': f"At most {max_profiles} profiles per batch"}, status=400)
+
+        with trace.span('model_load'):
+            bundle = registry.get()
+            catalog = get_catalog()
+        try:
+            top_n = parse_count(data.get('top_n', 3), len(bundle.target_encoder.classes_), 'top_n')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        # Encode every valid profile into one feature matrix
+        with trace.span('encode'):
+            X, rows, errors = bundle.encoder.encode_many(profiles)
+
+        results = [None] * len(profiles)
+        for index, message in errors.items():
+            results[index] = {'error': message}
+
+        if rows:
+            # One predict_proba call for the whole batch
+            with trace.span('inference'):
+                probabilities = bundle.predict_proba(X)
+            for index, row_probabilities in zip(rows, probabilities):
+                results[index] = {
+                    'recommendations': build_recommendations(
+                        row_probabilities, profiles[index], bundle, catalog, top_n=top_n
+                    )
+                }
+                record_prediction(profiles[index], bundle, row_probabilities)
+
+        with trace.span('serialize'):
+            return JsonResponse({'results': results})
+
+    except Exception as e:
+        trace.fail(str(e))
+        print(f"Error in batch prediction: {str(e)}")
+        traceback.print_exc()
+        return JsonResponse({'error': str(e)}, status=500)
+
+    finally:
+        tracer.finish(trace)
+
+
+@csrf_exempt
+def predict_skill_uplift(request):
+    """API endpoint answering "which one skill should I learn to get closer to this career?"
+
+    Expects a profile plus {"career": "...", "top_n": 10}. Returns the skills the
+    profile lacks, ranked by how much adding each one raises the career's probability.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+
+    trace = tracer.start('predict_skill_uplift')
+    try:
+        with trace.span('parse'):
+            data = json.loads(request.body)
+        if not isinstance(data, dict) or not data.get('career'):
+            return JsonResponse({'error': "Expected a profile with a 'career'"}, status=400)
+
+        with trace.span('model_load'):
+            bundle = registry.get()
+        try:
+            top_n = parse_count(data.get('top_n', 10), len(bundle.encoder.skill_vocabulary), 'top_n')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        class_index = find_class(bundle, data['career'])
+        if class_index is None:
+            return JsonResponse({'error': f"Unknown career: {data['career']}"}, status=400)
+
+        # One predict_proba call for the profile and every candidate skill
+        with trace.span('inference'):
+            base_probability, ranked, candidates = skill_uplift(
+                bundle, data, class_index,
+                max_candidates=getattr(settings, 'CAREER_UPLIFT_MAX_CANDIDATES', 31),
+                top_n=top_n,
+            )
+
+        with trace.span('serialize'):
+            return JsonResponse({
+                'career': str(bundle.target_encoder.classes_[class_index]),
+                'baseProbability': round(base_probability, 4),
+                'candidatesEvaluated': candidates,
+                'uplift': ranked,
+            })
+
+    except Exception as e:
+        trace.fail(str(e))
+        print(f"Error in skill uplift: {str(e)}")
+        traceback.print_exc()
+        return JsonResponse({'error': str(e)}, status=500)
+
+    finally:
+        tracer.finish(trace)
+
+
+@csrf_exempt
+def career_readiness(request):
+    """API endpoint scoring a user's skills against the required skills of every career
+
+    Expects {"skills": [...], "top_n": 10} for the careers the user is closest to, or
+    {"skills": [...], "careers": [...]} for specific ones. Each entry has the coverage
+    percentage plus the matched and missing required skills.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict) or not isinstance(data.get('skills', []), list):
+            return JsonResponse({'error': "Expected a 'skills' list"}, status=400)
+        careers = data.get('careers')
+        if careers is not None and not isinstance(careers, list):
+            return JsonResponse({'error': "'careers' must be a list"}, status=400)
+
+        readiness = get_readiness(get_catalog())
+        try:
+            top_n = parse_count(data.get('top_n', 10), max(len(readiness.careers), 1), 'top_n')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        results = readiness.score(data.get('skills', []), careers=careers, top_n=top_n)
+        return JsonResponse({'careers': [result for result in results if result is not None]})
+
+    except Exception as e:
+        print(f"Error in career readiness: {str(e)}")
+        traceback.print_exc()
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def prediction_cache_stats(request):
+    """Hit/miss counters of the prediction cache in this worker"""
+    return JsonResponse(prediction_cache.stats())
+
+
+def prediction_write_stats(request):
+    """Queue depth and counters of the PredictionResult write-behind queue in this worker"""
+    return JsonResponse(prediction_writes.stats())
+
+
+def typeahead(request):
+    """Ranked skill and interest completions for a partly typed token
+
+    GET ?q=pyt&kind=skills&limit=10; kind is 'skills', 'interests' or omitted for both.
+    """
+    kind = request.GET.get('kind')
+    if kind not in (None, 'skills', 'interests'):
+        return JsonResponse({'error': "kind must be 'skills' or 'interests'"}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), getattr(settings, 'CAREER_TYPEAHEAD_MAX_RESULTS', 20)))
+    except ValueError:
+        return JsonResponse({'error': "limit must be an integer"}, status=400)
+    query = request.GET.get('q', '')
+
+    completions = get_typeahead(registry.get(), get_catalog())
+    kinds = [kind] if kind else ['skills', 'interests']
+    return JsonResponse({'query': query, **{name: completions.complete(query, name, limit) for name in kinds}})
+
+
+def prediction_traces(request):
+    """Per-stage latency summary and the most recent sampled traces in this worker"""
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), getattr(settings, 'CAREER_TRACE_BUFFER_SIZE', 1000)))
+    except ValueError:
+        return JsonResponse({'error': "limit must be an integer"}, status=400)
+    return JsonResponse({'summary': tracer.summary(), 'recent': tracer.recent(limit)})
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+def collapse_duplicates(X, y):
+    """Collapse identical (feature row, label) pairs into one row each.
+
+    Returns (X_unique, y_unique, counts), where counts[i] is how many times unique
+    row i occurred. Rows keep the order of their first occurrence.
+    """
+    X = sp.csr_matrix(X, dtype=np.float32)
+    X.sum_duplicates()
+    X.sort_indices()
+    y = np.asarray(y)
+
+    # indices and data have the same length, so label + indices + data is an
+    # unambiguous key for a row
+    keys = [
+        y[row:row + 1].tobytes() + X.indices[start:end].tobytes() + X.data[start:end].tobytes()
+        for row, (start, end) in enumerate(zip(X.indptr[:-1], X.indptr[1:]))
+    ]
+    codes, _ = pd.factorize(pd.Series(keys, dtype=object))
+    _, first = np.unique(codes, return_index=True)
+    counts = np.bincount(codes)
+    return X[first], y[first], counts
+
+
+def balanced_weights(y, counts):
+    """Sample weights that reproduce RandomOverSampler on the collapsed rows.
+
+    Oversampling copies each class's rows until it has as many as the largest class,
+    so a row of class c ends up weighted by largest / n_c. counts carries how many
+    times each unique row appeared in the data.
+    """
+    _, y_index = np.unique(y, return_inverse=True)
+    class_totals = np.bincount(y_index, weights=counts)
+    return counts * (class_totals.max() / class_totals[y_index])
+
+
+def matrix_mb(X):
+    """Memory held by a dense or CSR feature matrix, in megabytes"""
+    if sp.issparse(X):
+        return (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / (1024 * 1024)
+    return np.asarray(X).nbytes / (1024 * 1024)
@@ -0,0 +1,141 @@
+import atexit
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class WriteBehindQueue:
+    """Buffers result records and writes them in batches off the request thread.
+
+    put() only appends to an in-memory queue. A background thread takes records off
+    it and calls write(records) once max_batch records are waiting or max_wait_ms
+    after the first of them arrived, whichever comes first. Remaining records are
+    written when the process exits. When the queue already holds max_queue records
+    new ones are dropped and counted rather than blocking the request.
+
+    A batch that fails is retried one record at a time so a single bad record only
+    loses itself.
+    """
+
+    def __init__(self, name, write, max_batch=500, max_wait_ms=1000, max_queue=10000):
+        self.name = name
+        self.write = write
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._counts = {'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def put(self, record):
+        """Queue a record for writing; returns False if it had to be dropped"""
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('queued')
+        return True
+
+    def depth(self):
+        """Records waiting to be written"""
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts['depth'] = self.depth()
+        return counts
+
+    def flush(self):
+        """Write everything queued so far on the calling thread"""
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def close(self):
+        """Stop the writer thread and write what is left"""
+        self._closed = True
+        if self._thread is not None:
+            self._thread.join(timeout=self.max_wait + 5)
+        self.flush()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counts[key] += amount
+
+    def _ensure_writer(self):
+        if self._thread is not None or self._closed:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _take(self, block):
+        """Up to max_batch records, waiting at most max_wait for the batch to fill"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.max_wait) if block else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if block and remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._closed:
+            batch = self._take(block=True)
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        try:
+            self.write(batch)
+            self._count('written', len(batch))
+        except Exception as e:
+            print(f"Write-behind batch of {len(batch)} {self.name} records failed, retrying one by one: {str(e)}")
+            for record in batch:
+                try:
+                    self.write([record])
+                    self._count('written')
+                except Exception as e:
+                    print(f"Dropping {self.name} record: {str(e)}")
+                    self._count('failed')
+        finally:
+            self._count('batches')
+            # The writer thread has its own connection; respect CONN_MAX_AGE for it
+            if threading.current_thread() is self._thread:
+                close_old_connections()
+
+
+def write_prediction_results(records):
+    """Insert PredictionResult rows for (user_id, predicted_career, confidence_score) records"""
+    from matching.models import PredictionResult
+    PredictionResult.objects.bulk_create([
+        PredictionResult(user_id=user_id, predicted_career=career, confidence_score=confidence)
+        for user_id, career, confidence in records
+    ])
+
+
+prediction_writes = WriteBehindQueue(
+    'prediction',
+    write_prediction_results,
+    max_batch=getattr(settings, 'CAREER_WRITE_BEHIND_MAX_BATCH', 500),
+    max_wait_ms=getattr(settings, 'CAREER_WRITE_BEHIND_MAX_WAIT_MS', 1000),
+    max_queue=getattr(settings, 'CAREER_WRITE_BEHIND_MAX_QUEUE', 10000),
+)
@@ -93,3 +93,16 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CORS_ALLOWED_ORIGINS = ["http://localhost:3000"]
+
+# Per-stage latency tracing of identify_skill_gaps: fraction of calls traced,
+# traces kept in memory (see /api/api/traces/), and an optional rotating log file
+SKILL_TRACE_SAMPLE_RATE = 0.1
+SKILL_TRACE_BUFFER_SIZE = 1000
+SKILL_TRACE_LOG_PATH = None
+
+# Submitted assessments are saved in batches by a background thread: submissions
+# per batch, longest wait before a partial batch is written, and queued
+# submissions beyond which new ones are dropped (see /api/api/assessment-writes/)
+SKILL_WRITE_BEHIND_MAX_BATCH = 200
+SKILL_WRITE_BEHIND_MAX_WAIT_MS = 1000
+SKILL_WRITE_BEHIND_MAX_QUEUE = 10000
@@ -0,0 +1,41 @@
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ai_model.tracing import NULL_TRACE, Trace, Tracer, tracer
+
+
+class TracerTestCase(SimpleTestCase):
+    def finish(self, tracer, timings):
+        for ms in timings:
+            trace = Trace('identify_skill_gaps')
+            trace.spans.append(('inference', ms))
+            tracer.finish(trace)
+
+    def test_sampling(self):
+        self.assertIs(Tracer(sample_rate=0).start('identify_skill_gaps'), NULL_TRACE)
+        self.assertIsInstance(Tracer(sample_rate=1).start('identify_skill_gaps'), Trace)
+
+        unsampled = Tracer(sample_rate=0)
+        unsampled.finish(unsampled.start('identify_skill_gaps'))
+        self.assertEqual(unsampled.recent(), [])
+
+    def test_ring_buffer_keeps_the_latest_traces(self):
+        bounded = Tracer(sample_rate=1, buffer_size=3)
+        self.finish(bounded, [1, 2, 3, 4, 5])
+        self.assertEqual([record['spans']['inference'] for record in bounded.recent()], [3, 4, 5])
+        self.assertEqual(len(bounded.recent(limit=2)), 2)
+
+    def test_summary(self):
+        summarized = Tracer(sample_rate=1)
+        self.finish(summarized, range(1, 101))
+        summary = summarized.summary()
+        self.assertEqual(summary['inference'], {'count': 100, 'meanMs': 50.5, 'p50Ms': 51, 'p99Ms': 100})
+        self.assertEqual(summary['total']['count'], 100)
+
+    def test_traces_view(self):
+        self.finish(tracer, [7])
+        response = self.client.get(reverse('skill_traces'), {'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['recent']), 1)
+        self.assertIn('inference', response.data['summary'])
+        self.assertEqual(self.client.get(reverse('skill_traces'), {'limit': 'x'}).status_code, 400)
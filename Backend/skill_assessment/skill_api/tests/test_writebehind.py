@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from skill_api.models import Skill, UserAssessment
+from skill_api.writebehind import ANONYMOUS_USER_ID, assessment_record, write_assessments
+
+
+class AssessmentRecordTestCase(TestCase):
+    def test_keeps_only_named_and_scored_skills(self):
+        skills = [
+            {"skill_name": "Python Programming", "skill_type": "Technical", "score": 85},
+            {"name": "Communication", "type": "Soft", "score": "70"},
+            {"skill_name": "SQL Databases", "skill_type": "Technical"},
+            {"score": 50},
+            "Git",
+        ]
+        self.assertEqual(assessment_record(7, skills), (7, [
+            ("Python Programming", "Technical", 85.0),
+            ("Communication", "Soft", 70.0),
+        ]))
+
+    def test_write_assessments_adds_missing_skills_once(self):
+        existing = Skill.objects.create(skill_name="SQL Databases", skill_type="Technical", skill_description="")
+        write_assessments([
+            (5, [("Python Programming", "Technical", 85.0), ("SQL Databases", "Technical", 60.0)]),
+            (ANONYMOUS_USER_ID, [("Python Programming", "Technical", 70.0)]),
+        ])
+
+        self.assertEqual(Skill.objects.filter(skill_name="Python Programming").count(), 1)
+        rows = sorted(UserAssessment.objects.values_list('user_id', 'skill__skill_name', 'score'))
+        self.assertEqual(rows, [
+            (ANONYMOUS_USER_ID, "Python Programming", 70.0),
+            (5, "Python Programming", 85.0),
+            (5, "SQL Databases", 60.0),
+        ])
+        self.assertEqual(UserAssessment.objects.get(user_id=5, score=60.0).skill, existing)
+
+    def test_anonymous_submission_is_queued_under_the_anonymous_id(self):
+        skills = [
+            {"skill_name": "Python Programming", "skill_type": "Technical", "score": 85},
+            {"skill_name": "SQL Databases", "skill_type": "Technical", "score": 58},
+        ]
+        with mock.patch('skill_api.views.assessment_writes') as writes:
+            response = self.client.post(reverse('submit_assessment'), {"skills": skills},
+                                        content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        writes.put.assert_called_once_with((ANONYMOUS_USER_ID, [
+            ("Python Programming", "Technical", 85.0),
+            ("SQL Databases", "Technical", 58.0),
+        ]))
+        (record,), _ = writes.put.call_args
+        write_assessments([record])
+        self.assertEqual(UserAssessment.objects.filter(user_id=ANONYMOUS_USER_ID).count(), 2)
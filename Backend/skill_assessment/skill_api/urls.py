@@ -6,6 +6,8 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('api/submit-assessment/', views.submit_assessment, name='submit_assessment'),
     path('api/skills/', views.get_skills, name='get_skills'),
+    path('api/assessment-writes/', views.assessment_write_stats, name='assessment_write_stats'),
+    path('api/traces/', views.skill_traces, name='skill_traces'),
     path('recommend-careers/', views.recommend_careers, name='recommend-careers'),
     path('recommend-learning/', views.recommend_learning, name='recommend-learning'),
 ]
@@ -2,13 +2,15 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from django.http import HttpResponse
-from .models import UserAssessment
 from ai_model.predict import identify_skill_gaps
 from ai_model.resources import get_learning_resources
 from django.http import JsonResponse
 import json
 from django.views.decorators.csrf import csrf_exempt
 from .utils import generate_dynamic_learning_links
+from django.conf import settings
+from ai_model.tracing import tracer
+from .writebehind import ANONYMOUS_USER_ID, assessment_record, assessment_writes
 
 
 def home(request):
@@ -165,12 +167,10 @@ def submit_assessment(request):
             ]
         }
         
-        # Save assessment to database if needed
-        UserAssessment.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            skills=user_skills,
-            results=response_data
-        )
+        # Queue the scored skills for saving; the write-behind queue inserts them in
+        # batches off the request thread
+        user_id = request.user.id if request.user.is_authenticated else ANONYMOUS_USER_ID
+        assessment_writes.put(assessment_record(user_id, user_skills))
         
         return Response(response_data)
 
@@ -180,6 +180,28 @@ def submit_assessment(request):
 
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def assessment_write_stats(request):
+    """
+    Queue depth and counters of the assessment write-behind queue in this worker.
+    """
+    return Response(assessment_writes.stats())
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def skill_traces(request):
+    """
+    Per-stage latency summary and the most recent sampled skill gap traces in this worker.
+    """
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), getattr(settings, 'SKILL_TRACE_BUFFER_SIZE', 1000)))
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=400)
+    return Response({"summary": tracer.summary(), "recent": tracer.recent(limit)})
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_skills(request):
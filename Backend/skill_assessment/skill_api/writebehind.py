@@ -0,0 +1,200 @@
+"""Write-behind saving of submitted assessments.
+
+WriteBehindQueue is a copy of the one in career_match's matching/writebehind.py.
+The two Django projects are deployed separately and share no package, so each keeps
+its own; change them together.
+"""
+import atexit
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+
+class WriteBehindQueue:
+    """Buffers result records and writes them in batches off the request thread.
+
+    put() only appends to an in-memory queue. A background thread takes records off
+    it and calls write(records) once max_batch records are waiting or max_wait_ms
+    after the first of them arrived, whichever comes first. Remaining records are
+    written when the process exits. When the queue already holds max_queue records
+    new ones are dropped and counted rather than blocking the request.
+
+    A batch that fails is retried one record at a time so a single bad record only
+    loses itself.
+    """
+
+    def __init__(self, name, write, max_batch=500, max_wait_ms=1000, max_queue=10000):
+        self.name = name
+        self.write = write
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._counts = {'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def put(self, record):
+        """Queue a record for writing; returns False if it had to be dropped"""
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('queued')
+        return True
+
+    def depth(self):
+        """Records waiting to be written"""
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts['depth'] = self.depth()
+        return counts
+
+    def flush(self):
+        """Write everything queued so far on the calling thread"""
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def close(self):
+        """Stop the writer thread and write what is left"""
+        self._closed = True
+        if self._thread is not None:
+            self._thread.join(timeout=self.max_wait + 5)
+        self.flush()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counts[key] += amount
+
+    def _ensure_writer(self):
+        if self._thread is not None or self._closed:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _take(self, block):
+        """Up to max_batch records, waiting at most max_wait for the batch to fill"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.max_wait) if block else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if block and remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._closed:
+            batch = self._take(block=True)
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        try:
+            self.write(batch)
+            self._count('written', len(batch))
+        except Exception as e:
+            print(f"Write-behind batch of {len(batch)} {self.name} records failed, retrying one by one: {str(e)}")
+            for record in batch:
+                try:
+                    self.write([record])
+                    self._count('written')
+                except Exception as e:
+                    print(f"Dropping {self.name} record: {str(e)}")
+                    self._count('failed')
+        finally:
+            self._count('batches')
+            # The writer thread has its own connection; respect CONN_MAX_AGE for it
+            if threading.current_thread() is self._thread:
+                close_old_connections()
+
+
+def _skill_field(skill, *names):
+    for name in names:
+        if skill.get(name) not in (None, ''):
+            return skill[name]
+    return None
+
+
+# UserAssessment.user_id can't be null, so submissions without a logged-in user are
+# saved under this id
+ANONYMOUS_USER_ID = 0
+
+
+def assessment_record(user_id, user_skills):
+    """(user_id, [(skill_name, skill_type, score), ...]) for the scored skills of one submission"""
+    scored = []
+    for skill in user_skills:
+        if not isinstance(skill, dict):
+            continue
+        name = _skill_field(skill, 'skill_name', 'name')
+        score = _skill_field(skill, 'score')
+        if name is None or score is None:
+            continue
+        scored.append((str(name), str(_skill_field(skill, 'skill_type', 'type') or ''), float(score)))
+    return user_id, scored
+
+
+def write_assessments(records):
+    """Insert one UserAssessment row per scored skill of each queued submission.
+
+    Skills are matched to Skill rows by name; names the table doesn't have yet are
+    added first, so the whole batch takes a fixed number of queries.
+    """
+    from skill_api.models import Skill, UserAssessment
+    with transaction.atomic():
+        _write_assessments(records, Skill, UserAssessment)
+
+
+def _write_assessments(records, Skill, UserAssessment):
+    types = {}
+    for _, scored in records:
+        for name, skill_type, _ in scored:
+            types.setdefault(name, skill_type)
+
+    skills = {}
+    for skill in Skill.objects.filter(skill_name__in=types):
+        skills.setdefault(skill.skill_name, skill)
+    missing = [name for name in types if name not in skills]
+    if missing:
+        Skill.objects.bulk_create([
+            Skill(skill_name=name, skill_type=types[name], skill_description='') for name in missing
+        ])
+        # Not every backend returns primary keys from bulk_create, so read them back
+        for skill in Skill.objects.filter(skill_name__in=missing):
+            skills.setdefault(skill.skill_name, skill)
+
+    UserAssessment.objects.bulk_create([
+        UserAssessment(user_id=user_id, skill=skills[name], score=score)
+        for user_id, scored in records
+        for name, _, score in scored
+    ])
+
+
+assessment_writes = WriteBehindQueue(
+    'assessment',
+    write_assessments,
+    max_batch=getattr(settings, 'SKILL_WRITE_BEHIND_MAX_BATCH', 200),
+    max_wait_ms=getattr(settings, 'SKILL_WRITE_BEHIND_MAX_WAIT_MS', 1000),
+    max_queue=getattr(settings, 'SKILL_WRITE_BEHIND_MAX_QUEUE', 10000),
+)